@@ -0,0 +1,332 @@
+"""!
+\file asyncsearch.py
+
+Asyncio front for search manager
+"""
+# concurrent query intake with bounded offloading of scoring to a pool
+
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Set, Union
+import argparse
+import asyncio
+import itertools
+import json
+import os
+
+from agsearch.smanager import search_query
+from agsearch.server import warm_up
+from agsearch.resultcache import RESULT_CACHE
+
+
+class AsyncSearchManager:
+    """!
+    \brief run searches concurrently from asyncio code
+
+    Preprocessing and scoring are cpu bound, so they run on a pool of
+    threads or processes. At most max_pending queries are either waiting
+    for a worker or running. When all slots are taken, search() waits for a
+    free slot, or fails with asyncio.QueueFull if block is false, so memory
+    does not grow with bursts of queries.
+
+    A slot is given back only when the worker has finished the query. A
+    query that times out or is cancelled before a worker picks it up is
+    removed from the pool, a running query cannot be interrupted and keeps
+    its slot until it ends.
+
+    \code
+
+    >>> async with AsyncSearchManager(workers=4) as manager:
+    ...     results = await manager.search({"text": "χαιρε", "top_k": 10})
+
+    \endcode
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pending: int = 64,
+        timeout: Optional[float] = None,
+        preproc_choice: int = 2,
+        use_processes: bool = False,
+    ):
+        """!
+        \brief constructor for asyncio search manager
+
+        \param workers number of threads or processes, cpu count by default
+        \param max_pending maximum number of queries waiting or running
+        \param timeout default per query timeout in seconds, None for no
+        timeout
+        \param preproc_choice preprocessor applied to search terms
+        \param use_processes run queries on processes instead of threads.
+        Each process keeps its own copy of the databases, warmed up when it
+        starts.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if max_pending < 1:
+            raise ValueError("max_pending should be at least 1")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.preproc_choice = preproc_choice
+        self.use_processes = use_processes
+
+        ## pool running the queries, created on start
+        self.executor: Optional[Executor] = None
+
+        ## free query slots
+        self.slots: Optional[asyncio.Semaphore] = None
+
+        ## serializes queries that save their results
+        self.save_lock: Optional[asyncio.Lock] = None
+
+        ## number of queries waiting for a worker or running
+        self.pending = 0
+
+        ## futures of queries submitted to the pool and not finished
+        self.futures: Set[Future] = set()
+
+    async def start(self) -> None:
+        "Create the worker pool and warm up the databases"
+        loop = asyncio.get_running_loop()
+        self.slots = asyncio.Semaphore(self.max_pending)
+        self.save_lock = asyncio.Lock()
+        if self.use_processes:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=warm_up
+            )
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers)
+            await loop.run_in_executor(self.executor, warm_up)
+
+    async def close(self) -> None:
+        "Cancel queries that have not started and wait for running ones"
+        if self.executor is None:
+            return
+        executor = self.executor
+        self.executor = None
+        # shutdown(cancel_futures=True) needs python 3.9
+        for cfuture in list(self.futures):
+            cfuture.cancel()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, lambda: executor.shutdown(wait=True))
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def acquire_slot(self, block: bool) -> None:
+        if not block and self.slots.locked():
+            raise asyncio.QueueFull("too many pending queries")
+        await self.slots.acquire()
+        self.pending += 1
+
+    def release_slot(self) -> None:
+        self.pending -= 1
+        self.slots.release()
+
+    def query_done(self, cfuture: Future) -> None:
+        "Forget a finished or cancelled query and give back its slot"
+        self.futures.discard(cfuture)
+        self.release_slot()
+
+    async def run(self, query: dict, timeout: Optional[float], block: bool):
+        if self.executor is None:
+            raise RuntimeError("search manager is not started")
+        loop = asyncio.get_running_loop()
+        await self.acquire_slot(block)
+        try:
+            cfuture = self.executor.submit(search_query, query, self.preproc_choice)
+        except BaseException:
+            self.release_slot()
+            raise
+        self.futures.add(cfuture)
+        cfuture.add_done_callback(
+            lambda f: loop.call_soon_threadsafe(self.query_done, f)
+        )
+        future = asyncio.wrap_future(cfuture)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            cfuture.cancel()
+            raise
+
+    async def search(
+        self, query: dict, timeout: Optional[float] = None, block: bool = True
+    ):
+        """!
+        \brief run a search described by a json like query
+
+        \param query see smanager.search_query()
+        \param timeout timeout in seconds, the default timeout if None
+        \param block wait for a free slot instead of raising asyncio.QueueFull
+
+        \return see SearchManager.search_text()
+        """
+        if timeout is None:
+            timeout = self.timeout
+        if query.get("save", False):
+            async with self.save_lock:
+                return await self.run(query, timeout, block)
+        return await self.run(query, timeout, block)
+
+
+async def handle_connection(
+    manager: AsyncSearchManager,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+) -> None:
+    """!
+    \brief answer json line queries of a connection
+
+    Each line is a json query as accepted by AsyncSearchManager.search, with
+    an optional "id", a string or a number that is copied to the response,
+    and an optional "timeout". Queries of a connection run concurrently and
+    responses are written as they finish. A line {"cancel": id} cancels a
+    query, closing the connection cancels all its queries. A query whose id
+    is the one of a query still running is rejected.
+    """
+    # tasks are numbered by the connection, ids of clients may be missing
+    tasks: Dict[int, asyncio.Task] = {}
+    numbers: Dict[Union[str, int, float], int] = {}
+    counter = itertools.count()
+    write_lock = asyncio.Lock()
+
+    async def respond(body: dict) -> None:
+        async with write_lock:
+            if writer.is_closing():
+                return
+            writer.write(json.dumps(body, ensure_ascii=False).encode("utf-8") + b"\n")
+            await writer.drain()
+
+    async def answer(number: int, query_id, query: dict) -> None:
+        try:
+            results = await manager.search(
+                query, timeout=query.get("timeout", None), block=False
+            )
+            body = {"id": query_id, "results": results}
+        except asyncio.CancelledError:
+            body = {"id": query_id, "error": "cancelled"}
+        except asyncio.TimeoutError:
+            body = {"id": query_id, "error": "timeout"}
+        except asyncio.QueueFull as e:
+            body = {"id": query_id, "error": "busy: " + str(e)}
+        except Exception as e:
+            body = {"id": query_id, "error": str(e)}
+        finally:
+            tasks.pop(number, None)
+            if query_id is not None and numbers.get(query_id, None) == number:
+                del numbers[query_id]
+        await respond(body)
+
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                query = json.loads(line.decode("utf-8"))
+                if not isinstance(query, dict):
+                    raise ValueError("query should be a json object")
+                query_id = query.get("cancel", query.get("id", None))
+                if not isinstance(query_id, (str, int, float, type(None))):
+                    raise ValueError("id should be a string or a number")
+            except ValueError as e:
+                await respond({"id": None, "error": str(e)})
+                continue
+            if "cancel" in query:
+                task = tasks.get(numbers.get(query_id, -1), None)
+                if task is not None:
+                    task.cancel()
+                continue
+            if query_id is not None and query_id in numbers:
+                await respond({"id": query_id, "error": "id already in use"})
+                continue
+            number = next(counter)
+            if query_id is not None:
+                numbers[query_id] = number
+            tasks[number] = asyncio.create_task(answer(number, query_id, query))
+    finally:
+        pending = list(tasks.values())
+        for task in pending:
+            task.cancel()
+        writer.close()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def serve(
+    manager: AsyncSearchManager,
+    host: str = "127.0.0.1",
+    port: int = 8766,
+    socket_path: Optional[str] = None,
+) -> None:
+    """!
+    \brief serve json line queries on a tcp address or a unix socket
+    """
+
+    async def on_connection(reader, writer):
+        await handle_connection(manager, reader, writer)
+
+    async with manager:
+        if socket_path is not None:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            server = await asyncio.start_unix_server(on_connection, path=socket_path)
+        else:
+            server = await asyncio.start_server(on_connection, host, port)
+        print("Serving on", [s.getsockname() for s in server.sockets])
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ancient Greek Async Search Server")
+    parser.add_argument("--host", help="address to listen on", default="127.0.0.1")
+    parser.add_argument("--port", help="port to listen on", type=int, default=8766)
+    parser.add_argument(
+        "--socket", help="listen on a unix socket at this path instead of a port"
+    )
+    parser.add_argument(
+        "--workers", help="number of search workers, cpu count by default", type=int
+    )
+    parser.add_argument(
+        "--max-pending",
+        help="maximum number of queries waiting or running, others are rejected",
+        type=int,
+        default=64,
+    )
+    parser.add_argument(
+        "--timeout", help="default per query timeout in seconds", type=float
+    )
+    parser.add_argument(
+        "--processes",
+        help="run searches on processes instead of threads",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--preprocessor",
+        help="preprocessor of search terms: 1->Simple text, 2->Greek text",
+        choices=[1, 2],
+        type=int,
+        default=2,
+    )
+    parser.add_argument("--cache-dir", help="directory where search results are cached")
+    args = parser.parse_args()
+    RESULT_CACHE.cache_dir = args.cache_dir
+    manager = AsyncSearchManager(
+        workers=args.workers,
+        max_pending=args.max_pending,
+        timeout=args.timeout,
+        preproc_choice=args.preprocessor,
+        use_processes=args.processes,
+    )
+    try:
+        asyncio.run(serve(manager, args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        pass
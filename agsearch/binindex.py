@@ -0,0 +1,237 @@
+"""!
+\file binindex.py
+
+Binary on disk format for term info database
+"""
+# memory mapped inverted index with varint encoded postings
+
+from array import array
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple
+import mmap
+import struct
+
+from agsearch.safeio import atomic_open
+
+if TYPE_CHECKING:
+    from agsearch.postings import PostingArrays
+
+## magic bytes at the start of the file
+MAGIC = b"AGSI"
+
+## version of the format
+VERSION = 1
+
+## magic, version, number of documents, number of terms, offsets of doc
+## table, lexicon and postings
+HEADER = struct.Struct("<4sIIIQQQ")
+
+## term byte length
+U32 = struct.Struct("<I")
+
+## document frequency, postings offset, postings byte length
+LEXICON_ENTRY = struct.Struct("<IQI")
+
+
+def encode_varint(value: int, buf: bytearray) -> None:
+    """!
+    \brief append unsigned integer to buffer as a variable length integer
+
+    Each byte holds 7 bits of the value, high bit is set if more bytes follow.
+    """
+    while value >= 0x80:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def decode_varint(buf, pos: int) -> Tuple[int, int]:
+    """!
+    \brief decode variable length integer starting at pos
+
+    \return decoded value and the position after it
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode_postings(doc_indices: List[Tuple[int, int]]) -> bytes:
+    """!
+    \brief encode sorted (doc index, count) pairs
+
+    Document indices are delta encoded, so that dense postings take one byte
+    per document gap.
+    """
+    buf = bytearray()
+    previous = 0
+    for doc_index, count in doc_indices:
+        encode_varint(doc_index - previous, buf)
+        encode_varint(count, buf)
+        previous = doc_index
+    return bytes(buf)
+
+
+def write_binary_index(path: str, term_db: Dict[str, Dict[str, int]]) -> None:
+    """!
+    \brief write term info database to path in binary format
+
+    \param path output path
+    \param term_db term to {doc_id: count} mapping
+
+    The file contains a header, a table of interned document ids, a lexicon
+    of sorted terms pointing to their postings, and the postings themselves.
+    """
+    doc_ids = sorted(set(d for counts in term_db.values() for d in counts))
+    doc_index = {doc_id: i for i, doc_id in enumerate(doc_ids)}
+    doc_table = bytearray()
+    for doc_id in doc_ids:
+        bdoc = doc_id.encode("utf-8")
+        doc_table += U32.pack(len(bdoc))
+        doc_table += bdoc
+    #
+    terms = sorted(term_db.keys())
+    lexicon = bytearray()
+    postings = bytearray()
+    for term in terms:
+        counts = term_db[term]
+        pairs = sorted((doc_index[d], c) for d, c in counts.items())
+        encoded = encode_postings(pairs)
+        bterm = term.encode("utf-8")
+        lexicon += U32.pack(len(bterm))
+        lexicon += bterm
+        lexicon += LEXICON_ENTRY.pack(len(pairs), len(postings), len(encoded))
+        postings += encoded
+    #
+    doc_table_offset = HEADER.size
+    lexicon_offset = doc_table_offset + len(doc_table)
+    postings_offset = lexicon_offset + len(lexicon)
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        len(doc_ids),
+        len(terms),
+        doc_table_offset,
+        lexicon_offset,
+        postings_offset,
+    )
+    with atomic_open(path, "wb") as f:
+        f.write(header)
+        f.write(doc_table)
+        f.write(lexicon)
+        f.write(postings)
+
+
+class BinaryIndex(Mapping):
+    """!
+    \brief read only view of a binary term info database
+
+    The file is memory mapped. Document ids and the lexicon are read when the
+    index is opened, postings are decoded only for the terms that are
+    accessed. The object behaves like the term to {doc_id: count} dictionary
+    of the json database.
+    """
+
+    def __init__(self, path: str):
+        """!
+        \brief open binary index at path
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            nb_docs,
+            nb_terms,
+            doc_table_offset,
+            lexicon_offset,
+            postings_offset,
+        ) = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC:
+            raise ValueError("not a binary term info database: " + path)
+        if version != VERSION:
+            raise ValueError("unsupported binary index version: " + str(version))
+        self.postings_offset = postings_offset
+
+        ## interned document ids, position is the document index
+        self.doc_ids: List[str] = []
+        pos = doc_table_offset
+        for _ in range(nb_docs):
+            (size,) = U32.unpack_from(self.buf, pos)
+            pos += U32.size
+            self.doc_ids.append(self.buf[pos : pos + size].decode("utf-8"))
+            pos += size
+
+        ## term to (document frequency, postings offset, postings length)
+        self.lexicon: Dict[str, Tuple[int, int, int]] = {}
+        pos = lexicon_offset
+        for _ in range(nb_terms):
+            (size,) = U32.unpack_from(self.buf, pos)
+            pos += U32.size
+            term = self.buf[pos : pos + size].decode("utf-8")
+            pos += size
+            self.lexicon[term] = LEXICON_ENTRY.unpack_from(self.buf, pos)
+            pos += LEXICON_ENTRY.size
+
+    def close(self) -> None:
+        self.buf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.lexicon)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.lexicon)
+
+    def __contains__(self, term) -> bool:
+        return term in self.lexicon
+
+    def doc_freq(self, term: str) -> int:
+        """!
+        \brief number of documents containing term without decoding postings
+        """
+        entry = self.lexicon.get(term, None)
+        return 0 if entry is None else entry[0]
+
+    def postings(self, term: str) -> List[Tuple[int, int]]:
+        """!
+        \brief decode (doc index, count) pairs of term
+        """
+        df, offset, _ = self.lexicon[term]
+        pos = self.postings_offset + offset
+        pairs: List[Tuple[int, int]] = []
+        doc_index = 0
+        for _ in range(df):
+            gap, pos = decode_varint(self.buf, pos)
+            count, pos = decode_varint(self.buf, pos)
+            doc_index += gap
+            pairs.append((doc_index, count))
+        return pairs
+
+    def arrays(self, term: str) -> "PostingArrays":
+        """!
+        \brief decode document indices and counts of term as uint32 arrays
+        """
+        import numpy as np
+
+        docs = array("I")
+        counts = array("I")
+        for doc_index, count in self.postings(term):
+            docs.append(doc_index)
+            counts.append(count)
+        return np.array(docs, dtype=np.uint32), np.array(counts, dtype=np.uint32)
+
+    def __getitem__(self, term: str) -> Dict[str, int]:
+        return {self.doc_ids[i]: c for i, c in self.postings(term)}
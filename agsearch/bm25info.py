@@ -0,0 +1,154 @@
+"""!
+\file bm25info.py
+
+BM25 info data base member
+"""
+# okapi bm25 ranking over term info database
+
+from typing import List, Dict, Optional, Tuple
+import math
+
+import numpy as np
+
+from agsearch.fuzzy import FUZZY_DISTANCE
+from agsearch.fuzzy import FUZZY_DOWN_WEIGHT
+from agsearch.searcher import Searcher
+from agsearch.utils import DOCINFO_STORE
+from agsearch.utils import get_term_index
+from agsearch.utils import add_to_bm25_info_db
+from agsearch.utils import add_many_to_bm25_info_db
+
+
+class DocLengths:
+    """!
+    \brief document lengths of doc info database as arrays
+
+    Built once per doc info database change, see JsonStore.derive()
+    """
+
+    def __init__(self, doc_info: dict):
+        lengths = doc_info["lengths"]
+
+        ## document identifier per position
+        self.doc_ids: List[str] = list(lengths.keys())
+
+        ## document identifier to position
+        self.positions: Dict[str, int] = {d: i for i, d in enumerate(self.doc_ids)}
+
+        ## number of terms per document
+        self.lengths = np.array(list(lengths.values()), dtype=np.float64)
+
+        ## average number of terms per document
+        self.average_length: float = doc_info["average_length"]
+
+
+class BM25Info(Searcher):
+    """!
+    \brief rank documents with okapi bm25
+
+    Unlike raw tf-idf, term frequencies saturate with k1 and are normalized
+    by document length with b, so long texts do not drown out short
+    inscriptions. Document lengths are computed during indexing by
+    CorpusManager.
+    """
+
+    def __init__(
+        self,
+        terms: List[str],
+        match: str = "exact",
+        k1: float = 1.2,
+        b: float = 0.75,
+        max_distance: float = FUZZY_DISTANCE,
+        down_weight: float = FUZZY_DOWN_WEIGHT,
+    ):
+        """!
+        \brief constructor for bm25 searcher
+
+        \param terms search terms
+        \param match term matching mode, see TermIndex.match()
+        \param k1 term frequency saturation
+        \param b document length normalization
+        \param max_distance largest weighted edit distance of fuzzy matches
+        \param down_weight weight of a fuzzy match at distance 1, see
+        TfIdfInfo
+        """
+        self.terms = terms
+        self.match = match
+        self.max_distance = max_distance
+        self.down_weight = down_weight
+        self.k1 = k1
+        self.b = b
+        self.index = get_term_index()
+        self.docs: DocLengths = DOCINFO_STORE.derive("doc_lengths", DocLengths)
+        self.search_results: Optional[Dict[str, float]] = None
+
+    def scores(self) -> np.ndarray:
+        """!
+        \brief bm25 score of every document in doc info order
+
+        Postings of each query term are read as arrays of document numbers,
+        mapped to doc info positions, and their contributions are added to
+        the score vector in one vectorized step.
+        """
+        docs = self.docs
+        nb_docs = len(docs.doc_ids)
+        scores = np.zeros(nb_docs, dtype=np.float64)
+        if nb_docs == 0:
+            return scores
+        average = docs.average_length if docs.average_length > 0 else 1.0
+        norms = self.k1 * (1.0 - self.b + self.b * docs.lengths / average)
+        positions_per_doc = self.index.align(docs.doc_ids)
+        for term in dict.fromkeys(self.terms):
+            doc_numbers, counts = self.index.weighted_arrays(
+                term,
+                mode=self.match,
+                max_distance=self.max_distance,
+                down_weight=self.down_weight,
+            )
+            if doc_numbers.shape[0] == 0:
+                continue
+            positions = positions_per_doc[doc_numbers]
+            known = positions >= 0
+            positions = positions[known]
+            freqs = counts[known]
+            doc_freq = doc_numbers.shape[0]
+            idf = math.log(1.0 + (nb_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+            scores[positions] += (
+                idf * freqs * (self.k1 + 1.0) / (freqs + norms[positions])
+            )
+        return scores
+
+    def search(self):
+        ""
+        scores = self.scores()
+        nonzero = np.nonzero(scores)[0]
+        self.search_results = {self.docs.doc_ids[i]: float(scores[i]) for i in nonzero}
+
+    def top_k(self, k: int) -> List[Tuple[str, float]]:
+        """!
+        \brief obtain k documents with highest bm25 score
+
+        Only documents containing a query term are ranked, as in search().
+        """
+        scores = self.scores()
+        nonzero = np.nonzero(scores)[0]
+        k = min(k, nonzero.shape[0])
+        if k <= 0:
+            return []
+        best = nonzero[np.argpartition(-scores[nonzero], k - 1)[:k]]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(self.docs.doc_ids[i], float(scores[i])) for i in best]
+
+    def result_info(self) -> dict:
+        ""
+        docs = sorted(self.search_results.items(), key=lambda x: x[1], reverse=True)
+        return {"terms": self.terms, "docs": dict(docs)}
+
+    def save_results(self):
+        ""
+        add_to_bm25_info_db(self.result_info())
+
+    @classmethod
+    def save_many_results(cls, infos: List[dict]) -> None:
+        ""
+        add_many_to_bm25_info_db(infos)
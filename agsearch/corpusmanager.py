@@ -1,92 +1,482 @@
 # corpus manager for term and text info
 
-from typing import List, Set, Dict
-import pdb
+from typing import List, Set, Dict, Optional, Tuple
+import hashlib
+import os
+import threading
 
 from agsearch.textinfo import TextInfo
 from agsearch.terminfo import TermInfo
 from agsearch.text import Text
+from agsearch.greektext import GreekText
 from agsearch.utils import get_text_info_db
 from agsearch.utils import get_term_info_db
+from agsearch.utils import save_term_info_bin
 from agsearch.utils import save_term_info_db
+from agsearch.utils import has_term_info_bin
+from agsearch.utils import get_doc_info_db
+from agsearch.utils import update_doc_lengths
+from agsearch.utils import bump_index_generation
+from agsearch.utils import get_doc_registry
+from agsearch.utils import save_doc_registry
+from agsearch.utils import add_term_info_segment
+from agsearch.utils import merge_term_info_segments
+from agsearch.utils import TERMINFO_SEGMENTS
+from agsearch.utils import CORPUS_LOCK
+from agsearch.utils import TFIDF_MODEL_PATH
+from agsearch.utils import TERMINFO_BIN_PATH
+from agsearch.utils import POSITIONS_PATH
+from agsearch.utils import DATA_DIR
+from agsearch.positions import Positions
+from agsearch.positions import update_positions_file
+from agsearch.profiling import PROFILER
+
+## text classes per preprocessor choice: 1 simple text, 2 greek text
+TEXT_CLASSES = {1: Text, 2: GreekText}
+
+## number of term info segments above which they are merged in background
+MAX_SEGMENTS = 8
+
+
+def text_file_stamp(path: str) -> Optional[List[int]]:
+    """!
+    \brief obtain modification time and size of a text file
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def text_file_hash(path: str) -> Optional[str]:
+    """!
+    \brief obtain sha1 digest of the content of a text file
+    """
+    digest = hashlib.sha1()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+@PROFILER.timed("corpus.count_text_terms")
+def count_text_terms(
+    item: Tuple[str, dict, int, bool, bool],
+) -> Tuple[Dict[str, Dict[str, int]], Optional[Positions]]:
+    """!
+    \brief obtain term counts of a single text
+
+    \param item text id, text info dictionary, preprocessor choice, whether
+    to stream the text and whether to record term positions. Module level
+    function so that it can be sent to worker processes.
+    \return term counts and, if requested, term occurrences of the text
+    """
+    text_id, info, preproc_choice, stream, positions = item
+    tinfo = TextInfo.from_info(info, text_id)
+    text = TEXT_CLASSES[preproc_choice].from_info(
+        info=tinfo, stream=stream, positions=positions
+    )
+    if not positions:
+        return text.to_doc_counts(), None
+    return text.to_doc_counts(), text.to_doc_positions()
+
+
+def merge_term_counts(
+    terms: Dict[str, Dict[str, int]], term_doc_id_counts: Dict[str, Dict[str, int]]
+) -> Dict[str, Dict[str, int]]:
+    """!
+    \brief merge term counts of a text into accumulated term counts
+
+    Also used for term occurrences, which have the same shape.
+    """
+    for term, doc_id_count in term_doc_id_counts.items():
+        doc_ids = terms.get(term, None)
+        if doc_ids is None:
+            terms[term] = doc_id_count
+        else:
+            doc_ids.update(doc_id_count)
+    return terms
 
 
 class CorpusManager:
     """!
     Corpus manager for managing search
+
+    Indexed texts are recorded in a document registry with the stamp and
+    content hash of their file, the version of the tokenizer that indexed
+    them and the list of their terms. Texts that are added, changed or
+    removed from text info database, or indexed by another tokenizer, are
+    found by comparing it with the registry. Only the postings of those
+    texts are written, as a delta segment of the term info database, see
+    segments.py. Segments are merged into the term info database file in
+    background once there are enough of them.
+
+    The positional index used by phrase search is optional. Once it has
+    been built, it is updated with the occurrences of the same texts.
     """
 
-    def __init__(self):
+    @PROFILER.timed("corpus.update")
+    def __init__(
+        self,
+        write_binary: bool = False,
+        workers: int = 1,
+        preproc_choice: int = 2,
+        stream: bool = False,
+        merge: bool = False,
+        max_segments: int = MAX_SEGMENTS,
+        positions: bool = False,
+        rebuild: bool = False,
+    ):
         """!
         \brief Constructor for corpus manager
 
-        During construction phase, we obtain text info database and term info
-        database. During initialization we obtain observed texts from term info
-        database. If there are new terms we update term info database.
+        During construction phase, we obtain text info database and document
+        registry. During initialization we find added, changed and removed
+        texts. If there are any, we write their postings to term info
+        database. Nothing is written if the corpus has not changed.
+
+        \param write_binary also write term info database in binary format,
+        see binindex.py
+        \param workers number of processes used for tokenizing new texts
+        \param preproc_choice preprocessor of texts, 1 simple text, 2 greek
+        text. It should be the same as the one used for reading search terms.
+        \param stream read texts incrementally with bounded memory, useful for
+        very large documents.
+        \param merge merge term info segments before returning
+        \param max_segments merge term info segments in background when there
+        are at least this many
+        \param positions build the positional index if it does not exist,
+        see positions.py
+        \param rebuild drop term info database and document registry and
+        index every text again, see drop_index()
         """
         # pdb.set_trace()
-        self.text_info_db = get_text_info_db()
-        self.term_info_db = get_term_info_db()
-        self.term_info_text_ids: Set[str] = set()
+        self.workers = workers
+        self.preproc_choice = preproc_choice
+        self.stream = stream
+
+        ## preprocessor choice and version of its tokenizer, recorded for
+        ## each indexed text
+        self.tokenizer = [
+            preproc_choice,
+            TEXT_CLASSES[preproc_choice].TOKENIZER_VERSION,
+        ]
+        self.text_info_db: Dict[str, dict] = {}
+        self.registry: Dict[str, dict] = {}
+
+        ## texts to index, either new or changed
         self.term_info_diff: Set[str] = set()
 
+        ## indexed texts whose file content has changed
+        self.changed_text_ids: Set[str] = set()
+
+        ## indexed texts that are no longer in text info database
+        self.removed_text_ids: Set[str] = set()
+
+        ## file stamps and hashes of texts to record in registry
+        self.file_infos: Dict[str, dict] = {}
+        self.doc_lengths: Dict[str, int] = {}
+
+        ## whether term occurrences are recorded in the positional index
+        self.with_positions = positions or os.path.isfile(POSITIONS_PATH)
+
+        ## occurrences of new and changed texts
+        self.new_positions: Positions = {}
+
+        ## thread merging term info segments in background
+        self.merge_thread: Optional[threading.Thread] = None
+
         # --------- Init funcs -----------------
-        self.get_observed_texts_from_term_info()
-        self.get_term_info_diff()
-        self.update_term_info_with_terms()
-        save_term_info_db(self.term_info_db)
+        # concurrent updates run one after the other, each one sees the
+        # texts indexed by the previous ones
+        with CORPUS_LOCK:
+            if rebuild:
+                self.drop_index()
+            self.text_info_db = get_text_info_db()
+            self.registry = get_doc_registry()
+            self.register_indexed_texts()
+            self.get_term_info_diff()
+            if self.has_changes():
+                self.update_term_info_with_terms()
+            elif self.file_infos:
+                self.update_registry({})
+            self.update_doc_lengths()
+            if write_binary and not has_term_info_bin():
+                save_term_info_bin(get_term_info_db())
+            self.update_tfidf_model()
+            self.update_positional_index()
+            if self.has_changes() or rebuild:
+                bump_index_generation()
+            if merge:
+                merge_term_info_segments()
+            elif len(TERMINFO_SEGMENTS) >= max_segments:
+                # the process may exit before the merge ends, files are
+                # replaced atomically and merged segments are kept until the
+                # merged database is written, so the next merge starts over
+                self.merge_thread = threading.Thread(
+                    target=merge_term_info_segments, daemon=True
+                )
+                self.merge_thread.start()
+
+    def has_changes(self) -> bool:
+        "Whether texts are added, changed or removed"
+        return bool(self.term_info_diff or self.removed_text_ids)
+
+    def wait_merge(self) -> None:
+        "Wait for background merge of term info segments to finish"
+        if self.merge_thread is not None:
+            self.merge_thread.join()
+
+    @staticmethod
+    def text_path(info: dict) -> str:
+        return os.path.join(DATA_DIR, info["local_path"])
 
-    def get_observed_texts_from_term_info(self):
+    def file_info(self, text_id: str, stamp: Optional[List[int]]) -> dict:
+        "Stamp and content hash of text file"
+        info = self.text_info_db.get(text_id, None)
+        if info is None:
+            return {"stamp": None, "hash": None}
+        return {"stamp": stamp, "hash": text_file_hash(self.text_path(info))}
+
+    @PROFILER.timed("corpus.drop_index")
+    def drop_index(self) -> None:
         """!
-        \brief obtain a text list from term info database
+        \brief remove every indexed text
+
+        Term info database and document registry are emptied, document
+        lengths are dropped, and the tf-idf model, positional index and
+        binary term info database are deleted. The positional index is
+        built again if it existed, the tf-idf model is fitted again on first
+        similarity search.
         """
-        self.term_info_text_ids = set()
-        for term, doc_id_counts in self.term_info_db.items():
+        save_term_info_db({})
+        save_doc_registry({})
+        update_doc_lengths({}, removed=set(get_doc_info_db()["lengths"].keys()))
+        for path in [TFIDF_MODEL_PATH, POSITIONS_PATH, TERMINFO_BIN_PATH]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    @PROFILER.timed("corpus.register_indexed_texts")
+    def register_indexed_texts(self):
+        """!
+        \brief add texts indexed before document registry existed
+
+        Their terms are found by scanning term info database once. The
+        tokenizer that indexed them is unknown, so they are indexed again,
+        which also drops terms left by former tokenizers.
+        """
+        if self.registry:
+            return
+        doc_terms: Dict[str, List[str]] = {}
+        for term, doc_id_counts in get_term_info_db().items():
             for doc_id in doc_id_counts.keys():
-                self.term_info_text_ids.add(doc_id)
+                if doc_id in doc_terms:
+                    doc_terms[doc_id].append(term)
+                else:
+                    doc_terms[doc_id] = [term]
+        if not doc_terms:
+            return
+        for doc_id, terms in doc_terms.items():
+            info = self.text_info_db.get(doc_id, None)
+            stamp = None if info is None else text_file_stamp(self.text_path(info))
+            self.registry[doc_id] = self.file_info(doc_id, stamp)
+            self.registry[doc_id]["terms"] = sorted(terms)
+        save_doc_registry(self.registry)
 
+    @PROFILER.timed("corpus.get_term_info_diff")
     def get_term_info_diff(self) -> None:
         """!
-        \brief obtain differences between text info and term info databases
+        \brief obtain differences between text info database and registry
 
-        We compare text ids in text info database and term info database.
+        A text whose file stamp has changed is hashed, and it is indexed
+        again only if its content has changed. A text indexed by another
+        tokenizer is always indexed again.
         """
-        text_ids = set(self.text_info_db.keys())
-        text_ids = text_ids.difference(self.term_info_text_ids)
-        self.term_info_diff = text_ids
+        for text_id, info in self.text_info_db.items():
+            entry = self.registry.get(text_id, None)
+            stamp = text_file_stamp(self.text_path(info))
+            if entry is None:
+                self.term_info_diff.add(text_id)
+                self.file_infos[text_id] = self.file_info(text_id, stamp)
+                continue
+            same_tokenizer = entry.get("tokenizer", None) == self.tokenizer
+            if entry["stamp"] == stamp and same_tokenizer:
+                continue
+            file_info = self.file_info(text_id, stamp)
+            self.file_infos[text_id] = file_info
+            if file_info["hash"] != entry["hash"] or not same_tokenizer:
+                self.term_info_diff.add(text_id)
+                self.changed_text_ids.add(text_id)
+        self.removed_text_ids = set(self.registry.keys()).difference(
+            self.text_info_db.keys()
+        )
+        PROFILER.count(
+            "corpus.texts_added", len(self.term_info_diff) - len(self.changed_text_ids)
+        )
+        PROFILER.count("corpus.texts_changed", len(self.changed_text_ids))
+        PROFILER.count("corpus.texts_removed", len(self.removed_text_ids))
+
+    @PROFILER.timed("corpus.index_texts")
+    def index_texts(
+        self, text_ids: Set[str]
+    ) -> Tuple[Dict[str, Dict[str, int]], Positions]:
+        """!
+        \brief obtain term counts and occurrences of texts
+
+        If more than one worker is requested, texts are tokenized in a
+        process pool and their counts are merged as they arrive. Occurrences
+        are empty unless the positional index is used.
+        """
+        terms: Dict[str, Dict[str, int]] = {}
+        positions: Positions = {}
+        PROFILER.count("corpus.texts_tokenized", len(text_ids))
+        items = [
+            (
+                t,
+                self.text_info_db[t],
+                self.preproc_choice,
+                self.stream,
+                self.with_positions,
+            )
+            for t in sorted(text_ids)
+        ]
+        if self.workers <= 1 or len(items) <= 1:
+            results = map(count_text_terms, items)
+            for counts, occurrences in results:
+                merge_term_counts(terms, counts)
+                if occurrences is not None:
+                    merge_term_counts(positions, occurrences)
+            return terms, positions
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunksize = max(1, len(items) // (self.workers * 4))
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            results = executor.map(count_text_terms, items, chunksize=chunksize)
+            for counts, occurrences in results:
+                merge_term_counts(terms, counts)
+                if occurrences is not None:
+                    merge_term_counts(positions, occurrences)
+        return terms, positions
 
     def get_new_term_counts(self) -> Dict[str, Dict[str, int]]:
         """!
         \brief obtain new term counts from texts
 
-        Texts come from difference between term info database and text info
-        databases.
+        Texts are the ones that are added or changed since they were
+        indexed. Their occurrences are kept for the positional index.
         """
-        terms: Dict[str, Dict[str, int]] = {}
-        for text_id in self.term_info_diff:
-            info = self.text_info_db[text_id]
-            tinfo = TextInfo.from_info(info, text_id)
-            text = Text.from_info(info=tinfo)
-            term_doc_id_counts = text.to_doc_counts()
-            for term, doc_id_count in term_doc_id_counts.items():
-                doc_ids = terms.get(term, None)
-                if doc_ids is None:
-                    terms[term] = doc_id_count
-                else:
-                    terms[term].update(doc_id_count)
+        terms, self.new_positions = self.index_texts(self.term_info_diff)
         return terms
 
+    @PROFILER.timed("corpus.update_term_info_with_terms")
     def update_term_info_with_terms(self):
         """!
-        \brief update term info database with given new term counts.
+        \brief update term info database with postings of changed texts.
 
-        We update term info database using term counts that come from new texts
-        that are found in text info database but not in term info database.
+        Postings of changed and removed texts are dropped, and postings of
+        new and changed texts are added, in a single delta segment.
         """
         terms = self.get_new_term_counts()
+        doc_terms: Dict[str, List[str]] = {}
         for term, doc_id_count in terms.items():
-            term_dict = self.term_info_db.get(term, None)
-            if term_dict is None:
-                self.term_info_db[term] = doc_id_count
+            for doc_id, count in doc_id_count.items():
+                self.doc_lengths[doc_id] = self.doc_lengths.get(doc_id, 0) + count
+                if doc_id in doc_terms:
+                    doc_terms[doc_id].append(term)
+                else:
+                    doc_terms[doc_id] = [term]
+        stale = self.changed_text_ids.union(self.removed_text_ids)
+        removed = {doc_id: self.registry[doc_id]["terms"] for doc_id in stale}
+        add_term_info_segment(removed, terms)
+        self.update_registry(doc_terms)
+
+    @PROFILER.timed("corpus.update_registry")
+    def update_registry(self, doc_terms: Dict[str, List[str]]) -> None:
+        """!
+        \brief record indexed texts in document registry
+
+        \param doc_terms terms of texts that are indexed again
+        """
+        for text_id, file_info in self.file_infos.items():
+            if text_id in self.term_info_diff:
+                terms = sorted(doc_terms.get(text_id, []))
             else:
-                self.term_info_db[term].update(doc_id_count)
+                terms = self.registry[text_id]["terms"]
+            self.registry[text_id] = dict(
+                file_info, terms=terms, tokenizer=self.tokenizer
+            )
+        for text_id in self.removed_text_ids:
+            del self.registry[text_id]
+        save_doc_registry(self.registry)
+
+    @PROFILER.timed("corpus.update_doc_lengths")
+    def update_doc_lengths(self):
+        """!
+        \brief save lengths of indexed documents to doc info database
+
+        Lengths of new texts come from their term counts. Documents indexed
+        before doc info database existed are measured once from term info
+        database.
+        """
+        known = get_doc_info_db()["lengths"]
+        missing = set(self.registry.keys()).difference(known.keys())
+        missing.difference_update(self.doc_lengths.keys())
+        if missing:
+            term_db = get_term_info_db()
+            for doc_id in missing:
+                self.doc_lengths[doc_id] = sum(
+                    term_db[term][doc_id] for term in self.registry[doc_id]["terms"]
+                )
+        stale = set(known.keys()).intersection(self.removed_text_ids)
+        if self.doc_lengths or stale:
+            update_doc_lengths(self.doc_lengths, removed=stale)
+
+    @PROFILER.timed("corpus.update_tfidf_model")
+    def update_tfidf_model(self):
+        """!
+        \brief update persisted tf-idf model if there is one
+
+        Changed and removed texts are dropped from the model, then texts
+        that are not in the model are read and processed. If the model has
+        not been created yet, it is fitted on first similarity search.
+        """
+        if not os.path.isfile(TFIDF_MODEL_PATH):
+            return
+        if not self.has_changes():
+            return
+        # numpy and scipy are loaded only when there is a model to update
+        from agsearch.tfidfmodel import TfIdfModel
+
+        model = TfIdfModel.load(TFIDF_MODEL_PATH)
+        stale = self.changed_text_ids.union(self.removed_text_ids)
+        removed = model.remove_documents(stale)
+        if model.update_with_text_infos(self.text_info_db) or removed:
+            model.save(TFIDF_MODEL_PATH)
+
+    @PROFILER.timed("corpus.update_positional_index")
+    def update_positional_index(self):
+        """!
+        \brief update positional index if it exists or is requested
+
+        Occurrences of changed and removed texts are dropped and those of
+        new and changed texts are added. When the index is built for the
+        first time, texts that were already indexed are tokenized again to
+        obtain their occurrences.
+        """
+        if not self.with_positions:
+            return
+        exists = os.path.isfile(POSITIONS_PATH)
+        if exists and not self.has_changes():
+            return
+        if not exists:
+            indexed = set(self.text_info_db.keys()).difference(self.term_info_diff)
+            _, positions = self.index_texts(indexed)
+            merge_term_counts(self.new_positions, positions)
+        stale = self.changed_text_ids.union(self.removed_text_ids)
+        update_positions_file(POSITIONS_PATH, self.new_positions, stale)
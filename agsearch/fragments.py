@@ -0,0 +1,281 @@
+"""!
+\file fragments.py
+
+Wildcard terms for fragmentary texts
+"""
+# lacunae of epigraphic fragments as wildcards resolved on the term index
+
+from typing import Callable, List, Optional, Pattern, Tuple, Union
+import re
+
+## number of letters of a gap, at least the first, at most the second or
+## any number if it is None
+Gap = Tuple[int, Optional[int]]
+
+## literal letters or gap of a wildcard term
+Segment = Union[str, Gap]
+
+## wildcards of terms: ? one letter, ?{m,n} m to n letters, ?{m,} at least
+## m letters, * any number of letters
+WILDCARD_PATTERN = re.compile(r"\?\{(\d+)(?:(,)(\d*))?\}|\?|\*")
+
+## estimated length of a lacuna, such as [ca. 5] or [c.5]
+ESTIMATE_PATTERN = re.compile(r"c\s*a?\s*\.?\s*(\d+)", re.IGNORECASE)
+
+## letters added and removed around an estimated lacuna length
+ESTIMATE_TOLERANCE = 2
+
+## dashes, a lacuna of unknown length or long syllables in metrical context
+DASHES = "-‐‑‒–—―"
+
+## short and anceps syllable signs, which make dashes long syllables
+SHORT_SIGNS = "⏑⏒˘∪◡"
+ANCEPS_SIGNS = "⏓×"
+
+## number of letters of a missing short, long and anceps syllable
+SHORT_SYLLABLE: Gap = (1, 3)
+LONG_SYLLABLE: Gap = (1, 4)
+ANCEPS_SYLLABLE: Gap = (1, 4)
+
+## dot below an uncertain letter
+UNDERDOT = "̣"
+
+## characters of a word besides letters, Leiden signs and punctuations are
+## dropped
+WORD_MARKS = set(UNDERDOT)
+
+
+def add_gaps(first: Gap, second: Gap) -> Gap:
+    "Gap of two consecutive gaps"
+    if first[1] is None or second[1] is None:
+        return (first[0] + second[0], None)
+    return (first[0] + second[0], first[1] + second[1])
+
+
+def append_segment(segments: List[Segment], segment: Segment) -> None:
+    """!
+    \brief append segment, merging it with the last one if they have the
+    same kind
+    """
+    if segments and isinstance(segment, str) == isinstance(segments[-1], str):
+        if isinstance(segment, str):
+            segments[-1] = segments[-1] + segment
+        else:
+            segments[-1] = add_gaps(segments[-1], segment)
+    elif segment != "":
+        segments.append(segment)
+
+
+def parse_wildcard(term: str) -> List[Segment]:
+    """!
+    \brief split wildcard term into literal letters and gaps
+
+    \code
+
+    >>> parse_wildcard("ψα*")
+    >>> ["ψα", (0, None)]
+    >>> parse_wildcard("ε?{2,4}ος")
+    >>> ["ε", (2, 4), "ος"]
+
+    \endcode
+    """
+    segments: List[Segment] = []
+    pos = 0
+    for match in WILDCARD_PATTERN.finditer(term):
+        append_segment(segments, term[pos : match.start()])
+        pos = match.end()
+        if match.group(0) == "*":
+            gap: Gap = (0, None)
+        elif match.group(0) == "?":
+            gap = (1, 1)
+        else:
+            least = int(match.group(1))
+            if match.group(2) is None:
+                gap = (least, least)
+            elif match.group(3) == "":
+                gap = (least, None)
+            else:
+                gap = (least, max(least, int(match.group(3))))
+        append_segment(segments, gap)
+    append_segment(segments, term[pos:])
+    return segments
+
+
+def render_wildcard(segments: List[Segment]) -> str:
+    """!
+    \brief write segments as a wildcard term, see parse_wildcard()
+    """
+    parts: List[str] = []
+    for segment in segments:
+        if isinstance(segment, str):
+            parts.append(segment)
+            continue
+        least, most = segment
+        if most is None:
+            parts.append("?" * least + "*")
+        elif least == most:
+            parts.append("?" * least)
+        else:
+            parts.append("?{" + str(least) + "," + str(most) + "}")
+    return "".join(parts)
+
+
+def has_wildcard(term: str) -> bool:
+    return WILDCARD_PATTERN.search(term) is not None
+
+
+def wildcard_regex(segments: List[Segment]) -> Pattern:
+    """!
+    \brief regular expression matching whole terms of segments
+    """
+    parts: List[str] = []
+    for segment in segments:
+        if isinstance(segment, str):
+            parts.append(re.escape(segment))
+        elif segment[1] is None:
+            parts.append(".{" + str(segment[0]) + ",}")
+        else:
+            parts.append(".{" + str(segment[0]) + "," + str(segment[1]) + "}")
+    return re.compile("".join(parts), re.DOTALL)
+
+
+def length_range(segments: List[Segment]) -> Gap:
+    """!
+    \brief shortest and longest length of terms matching segments
+    """
+    total: Gap = (0, 0)
+    for segment in segments:
+        if isinstance(segment, str):
+            total = add_gaps(total, (len(segment), len(segment)))
+        else:
+            total = add_gaps(total, segment)
+    return total
+
+
+def lacuna_segments(content: str) -> List[Union[Segment, None]]:
+    """!
+    \brief interpret the content of square brackets
+
+    Restored letters are kept. A dot is a missing letter, dashes are a
+    lacuna of unknown length and "ca. n" a lacuna of about n letters. If
+    the lacuna is described by metrical signs, each short, long or anceps
+    sign is a missing syllable of a few letters, dashes being long
+    syllables.
+
+    \return segments, None standing for a white space between restored
+    words
+    """
+    estimate = ESTIMATE_PATTERN.search(content)
+    if estimate is not None:
+        length = int(estimate.group(1))
+        return [(max(0, length - ESTIMATE_TOLERANCE), length + ESTIMATE_TOLERANCE)]
+    metrical = any(ch in SHORT_SIGNS or ch in ANCEPS_SIGNS for ch in content)
+    items: List[Union[Segment, None]] = []
+    for ch in content:
+        if ch.isspace():
+            items.append(None)
+        elif metrical and ch in SHORT_SIGNS:
+            items.append(SHORT_SYLLABLE)
+        elif metrical and ch in ANCEPS_SIGNS:
+            items.append(ANCEPS_SYLLABLE)
+        elif metrical and ch in DASHES:
+            items.append(LONG_SYLLABLE)
+        elif ch in DASHES:
+            items.append((0, None))
+        elif ch == ".":
+            items.append((1, 1))
+        elif ch.isalpha() or ch in WORD_MARKS:
+            items.append(ch)
+    # spaces separate restored words, not the signs of a lacuna
+    kept: List[Union[Segment, None]] = []
+    for i, item in enumerate(items):
+        if item is None:
+            before = next((x for x in reversed(items[:i]) if x is not None), None)
+            after = next((x for x in items[i + 1 :] if x is not None), None)
+            if not isinstance(before, str) or not isinstance(after, str):
+                continue
+        kept.append(item)
+    return kept
+
+
+def fragment_items(line: str) -> List[Union[Segment, None]]:
+    """!
+    \brief split a line of a fragment into letters, gaps and word breaks
+
+    Text in square brackets is read with lacuna_segments(), an opening
+    bracket without a closing one runs to the end of the line and a closing
+    one without an opening one from its start. Outside brackets, ?, ?{m,n}
+    and * are wildcards typed by the user. Other signs, such as the
+    parentheses of expanded abbreviations or the dots below uncertain
+    letters, are dropped and the letters they mark are kept.
+    """
+    if "]" in line and ("[" not in line or line.index("]") < line.index("[")):
+        line = "[" + line
+    items: List[Union[Segment, None]] = []
+    pos = 0
+    while pos < len(line):
+        ch = line[pos]
+        if ch == "[":
+            end = line.find("]", pos + 1)
+            if end < 0:
+                end = len(line)
+            items.extend(lacuna_segments(line[pos + 1 : end]))
+            pos = end + 1
+            continue
+        match = WILDCARD_PATTERN.match(line, pos)
+        if match is not None:
+            items.extend(parse_wildcard(match.group(0)))
+            pos = match.end()
+            continue
+        if ch.isspace():
+            items.append(None)
+        elif ch.isalpha() or ch in WORD_MARKS:
+            items.append(ch)
+        pos += 1
+    return items
+
+
+def fragment_terms(line: str, normalize: Callable[[str], str]) -> List[str]:
+    """!
+    \brief obtain wildcard terms of a line of a fragment
+
+    \param line raw line of an epigraphic fragment, such as "ψα[— — —]"
+    \param normalize function cleaning letters as the indexed terms are,
+    applied to each run of letters
+
+    Words are separated by white space. Lacunae become gaps of the word
+    they are attached to, so "ΕΜ̣[⏑⏑––]" gives "εμ?{4,14}". Words without
+    any letter left, such as a lacuna standing alone, are dropped.
+
+    \code
+
+    >>> fragment_terms("ψα[— — —]", normalize)
+    >>> ["ψα*"]
+    >>> fragment_terms("[γ]α̣ῖ̣ά̣ μ̣ε", normalize)
+    >>> ["γαια", "με"]
+
+    \endcode
+    """
+    words: List[List[Segment]] = [[]]
+    letters: List[str] = []
+
+    def flush_letters() -> None:
+        if letters:
+            append_segment(words[-1], normalize("".join(letters).replace(UNDERDOT, "")))
+            letters.clear()
+
+    for item in fragment_items(line):
+        if item is None:
+            flush_letters()
+            words.append([])
+        elif isinstance(item, str):
+            letters.append(item)
+        else:
+            flush_letters()
+            append_segment(words[-1], item)
+    flush_letters()
+    return [
+        render_wildcard(segments)
+        for segments in words
+        if any(isinstance(s, str) and s for s in segments)
+    ]
@@ -0,0 +1,231 @@
+"""!
+\file fuzzy.py
+
+Orthographic variants of greek terms
+"""
+# weighted edit distance and symmetric delete index over the term lexicon
+
+from typing import Dict, Iterable, List, Set, Tuple
+import re
+
+## largest weighted edit distance of variants by default
+FUZZY_DISTANCE = 1.0
+
+## weight of a variant at distance 1, see variant_weight()
+FUZZY_DOWN_WEIGHT = 0.5
+
+## query terms shorter than this only match variants with the same
+## spelling key, see variant_key(), since many unrelated words are one
+## edit away from a short term
+FUZZY_MIN_LENGTH = 4
+
+## cost of inserting, deleting or substituting a letter
+EDIT_COST = 1.0
+
+## interchangeable spellings of inscriptions and their cost, in both
+## directions: itacism, vowel quantity, dialectal alpha, assimilation of
+## nasals, aspiration, zeta for sigma and simplified double consonants
+VARIANT_COSTS: List[Tuple[str, str, float]] = [
+    ("ι", "η", 0.3),
+    ("ι", "υ", 0.3),
+    ("η", "υ", 0.3),
+    ("ι", "ει", 0.3),
+    ("η", "ει", 0.3),
+    ("ι", "οι", 0.3),
+    ("υ", "οι", 0.3),
+    ("ε", "αι", 0.3),
+    ("ο", "ω", 0.3),
+    ("ο", "ου", 0.5),
+    ("ε", "η", 0.5),
+    ("α", "η", 0.5),
+    ("ν", "μ", 0.5),
+    ("ν", "γ", 0.5),
+    ("σ", "ζ", 0.5),
+    ("τ", "θ", 0.5),
+    ("π", "φ", 0.5),
+    ("κ", "χ", 0.5),
+    ("σ", "ς", 0.1),
+] + [(c + c, c, 0.4) for c in "λμνπρστ"]
+
+## vowels, they are dropped from spelling keys
+VOWELS = "αεηιουω"
+
+## consonants replaced by the one of their class in spelling keys
+KEY_FOLDS = {"θ": "τ", "φ": "π", "χ": "κ", "ζ": "σ", "ς": "σ", "μ": "ν", "γ": "ν"}
+
+## translation table of the consonant classes
+FOLD_TABLE = str.maketrans(KEY_FOLDS)
+
+## translation table dropping vowels
+VOWEL_TABLE = str.maketrans("", "", VOWELS)
+
+## runs of a repeated letter
+REPEAT_PATTERN = re.compile(r"(.)\1+")
+
+
+def variant_key(term: str) -> str:
+    """!
+    \brief spelling key of term
+
+    Consonants that are often interchanged are replaced by a single one,
+    repeated letters are simplified and vowels are dropped. Replacing a
+    spelling of VARIANT_COSTS by its variant never changes the key, so all
+    the spellings of a word that only differ by such variants have the
+    same key.
+    """
+    return REPEAT_PATTERN.sub(r"\1", term.translate(FOLD_TABLE)).translate(VOWEL_TABLE)
+
+
+def make_rules() -> Dict[str, List[Tuple[str, float]]]:
+    "Replacement and cost of each spelling of VARIANT_COSTS"
+    rules: Dict[str, List[Tuple[str, float]]] = {}
+    for first, second, cost in VARIANT_COSTS:
+        rules.setdefault(first, []).append((second, cost))
+        rules.setdefault(second, []).append((first, cost))
+    return rules
+
+
+## spelling to its variants and their cost
+VARIANT_RULES = make_rules()
+
+## longest spelling of VARIANT_RULES
+LONGEST_RULE = max(len(s) for s in VARIANT_RULES)
+
+## lowest cost of changing the length of a term by one letter
+LENGTH_COST = min([EDIT_COST] + [c for a, b, c in VARIANT_COSTS if len(a) != len(b)])
+
+## lowest cost of a variant spelling
+VARIANT_COST = min(c for _, _, c in VARIANT_COSTS)
+
+
+def weighted_distance(first: str, second: str, limit: float = float("inf")) -> float:
+    """!
+    \brief edit distance of first and second with greek spelling costs
+
+    Letters are inserted, deleted or substituted at EDIT_COST, spellings
+    of VARIANT_COSTS are replaced by one another at their own cost.
+
+    \param limit the computation stops as soon as the distance is known to
+    be larger, the returned value is then infinite
+    """
+    if first == second:
+        return 0.0
+    if abs(len(first) - len(second)) * LENGTH_COST > limit:
+        return float("inf")
+    rows: List[List[float]] = [[j * EDIT_COST for j in range(len(second) + 1)]]
+    for i in range(1, len(first) + 1):
+        row = [i * EDIT_COST]
+        for j in range(1, len(second) + 1):
+            best = min(
+                rows[i - 1][j] + EDIT_COST,
+                row[j - 1] + EDIT_COST,
+                rows[i - 1][j - 1]
+                + (0.0 if first[i - 1] == second[j - 1] else EDIT_COST),
+            )
+            for size in range(1, min(i, LONGEST_RULE) + 1):
+                for variant, cost in VARIANT_RULES.get(first[i - size : i], ()):
+                    k = j - len(variant)
+                    if k >= 0 and second[k:j] == variant:
+                        best = min(best, rows[i - size][k] + cost)
+            row.append(best)
+        if min(row) > limit:
+            return float("inf")
+        rows.append(row)
+    distance = rows[-1][-1]
+    return distance if distance <= limit else float("inf")
+
+
+def variant_weight(distance: float, down_weight: float = FUZZY_DOWN_WEIGHT) -> float:
+    """!
+    \brief weight of a variant at distance of the query term
+
+    The term itself has weight 1, an itacistic variant at distance 0.3 has
+    weight 0.81 and a variant at distance 1 has weight down_weight.
+    """
+    return down_weight**distance
+
+
+def deletions(key: str, depth: int) -> Set[str]:
+    """!
+    \brief strings obtained by deleting 1 to depth letters of key
+    """
+    found: Set[str] = set()
+    level = {key}
+    for _ in range(depth):
+        level = set(k[:i] + k[i + 1 :] for k in level for i in range(len(k)))
+        found.update(level)
+    return found
+
+
+class FuzzyIndex:
+    """!
+    \brief spelling key and symmetric delete index of the lexicon
+
+    Terms are grouped by spelling key, see variant_key(), so that all the
+    variants of a term that do not need a plain edit are found with a
+    single lookup. Terms are also indexed by the strings obtained by
+    deleting one of their letters, and the same deletions of the query are
+    looked up, which finds the terms one edit away. Only these candidates
+    are compared to the query with weighted_distance(), so a lookup does
+    not depend on the size of the lexicon.
+
+    Together they find every variant within a distance smaller than
+    EDIT_COST + VARIANT_COST, which covers FUZZY_DISTANCE. Lookups with a
+    larger distance compare the query with every term.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        "Build fuzzy index over terms"
+
+        ## spelling key to terms
+        self.keys: Dict[str, List[str]] = {}
+
+        ## term with a deleted letter to terms
+        self.deletes: Dict[str, List[str]] = {}
+        for term in terms:
+            key = variant_key(term)
+            if key in self.keys:
+                self.keys[key].append(term)
+            else:
+                self.keys[key] = [term]
+            for deleted in deletions(term, 1):
+                if deleted in self.deletes:
+                    self.deletes[deleted].append(term)
+                else:
+                    self.deletes[deleted] = [term]
+
+        ## terms of the lexicon
+        self.terms: Set[str] = set(t for ts in self.keys.values() for t in ts)
+
+    def neighbours(self, term: str) -> Set[str]:
+        "Terms of the index one insertion, deletion or substitution away"
+        found: Set[str] = set(self.deletes.get(term, ()))
+        for deleted in deletions(term, 1):
+            if deleted in self.terms:
+                found.add(deleted)
+            found.update(self.deletes.get(deleted, ()))
+        return found
+
+    def lookup(
+        self, term: str, max_distance: float = FUZZY_DISTANCE
+    ) -> List[Tuple[str, float]]:
+        """!
+        \brief obtain terms of the lexicon that are variants of term
+
+        \param max_distance largest weighted edit distance of variants
+
+        \return (term, distance) pairs by increasing distance
+        """
+        candidates: Iterable[str] = self.keys.get(variant_key(term), [])
+        if len(term) >= FUZZY_MIN_LENGTH and max_distance >= EDIT_COST:
+            if max_distance < EDIT_COST + VARIANT_COST:
+                candidates = self.neighbours(term).union(candidates)
+            else:
+                candidates = self.terms
+        matches: List[Tuple[str, float]] = []
+        for candidate in candidates:
+            distance = weighted_distance(term, candidate, max_distance)
+            if distance <= max_distance:
+                matches.append((candidate, distance))
+        matches.sort(key=lambda x: (x[1], x[0]))
+        return matches
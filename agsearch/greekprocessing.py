@@ -4,21 +4,116 @@
 Greek preprocessing functions
 """
 
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterator, List
+import re
+import unicodedata
 
-from cltk.corpus.greek.alphabet import filter_non_greek
-from cltk.stop.greek.stops import STOPS_LIST
-from greek_accentuation.characters import base
-
+from agsearch import tables
 from agsearch.utils import DATA_DIR
 from agsearch.utils import PUNCTUATIONS
+from agsearch.utils import GREEK_PUNCTUATION
 from agsearch.preprocessing import Preprocessing
+from agsearch.preprocessing import punk_table
 from agsearch.interfaces import AbstractGreekPreprocessor
+from agsearch.profiling import PROFILER
 
 
-class GreekProcessing(Preprocessing, AbstractGreekPreprocessor):
+class GreekNormalizer:
     """!
+    \brief precompiled tables for cleaning greek text in linear passes
+
+    Accent removal uses a translation table built from greek_accentuation's
+    base(), punctuation removal uses the same table, and stop words are
+    matched per token against a set. The accent table, greek characters and
+    stop words are read from the generated tables module, see maketables.py,
+    so neither cltk nor greek_accentuation is imported. Use get_normalizer()
+    to obtain the shared instance.
     """
 
+    def __init__(self):
+        ""
+        ## stop words as a set for constant time membership. The list spells
+        ## acute accents with oxia, texts usually with tonos, the composed
+        ## form, so both spellings are kept.
+        self.stop_words: FrozenSet[str] = frozenset(
+            tables.STOP_WORDS
+            + [unicodedata.normalize("NFC", w) for w in tables.STOP_WORDS]
+        )
+
+        ## base character of each accented character
+        self.accent_table: Dict[int, str] = tables.ACCENT_TABLE
+
+        ## accents and punctuations in a single table, punctuations are
+        ## replaced first as in the original pipeline
+        self.clean_table: Dict[int, str] = dict(self.accent_table)
+        self.clean_table.update(punk_table())
+
+        ## a token is delimited by white space and punctuations
+        delimiters = "".join(PUNCTUATIONS + GREEK_PUNCTUATION)
+        self.token_pattern = re.compile(r"[^\s" + re.escape(delimiters) + "]+")
+
+        ## characters kept by cltk's filter_non_greek
+        greek_chars = tables.GREEK_CHARS
+        self.non_greek_pattern = re.compile("[^ " + re.escape(greek_chars) + "]+")
+
+    def replace_stop_word(self, match) -> str:
+        ""
+        return " " if match.group(0) in self.stop_words else match.group(0)
+
+    def remove_stop_words(self, txt: str) -> str:
+        """!
+        \brief replace tokens that are stop words with a space
+        """
+        return self.token_pattern.sub(self.replace_stop_word, txt)
+
+    def remove_accent(self, txt: str) -> str:
+        ""
+        return txt.translate(self.accent_table)
+
+    def remove_non_greek(self, txt: str) -> str:
+        """!
+        \brief same as cltk's filter_non_greek with a compiled pattern
+        """
+        return self.non_greek_pattern.sub("", txt).strip()
+
+    def tokens(self, txt: str) -> Iterator[str]:
+        """!
+        \brief yield cleaned terms of text one by one
+
+        Text is split on white space and punctuations first. Stop words are
+        dropped as whole tokens, then accents and non greek characters are
+        removed from each remaining token.
+        """
+        for match in self.token_pattern.finditer(txt.lower()):
+            token = match.group(0)
+            if token in self.stop_words:
+                continue
+            token = self.non_greek_pattern.sub("", token.translate(self.accent_table))
+            if token:
+                yield token
+
+    def normalize(self, txt: str) -> str:
+        """!
+        \brief lower case, remove stop words, punctuations and accents
+
+        Stop words are compared before accent removal since the stop word
+        list is accented.
+        """
+        txt = self.remove_stop_words(txt.lower())
+        return txt.translate(self.clean_table)
+
+
+@lru_cache(maxsize=None)
+@PROFILER.timed("preprocess.build_normalizer")
+def get_normalizer() -> GreekNormalizer:
+    "Obtain greek normalizer, built once on first use"
+    return GreekNormalizer()
+
+
+class GreekProcessing(Preprocessing, AbstractGreekPreprocessor):
+    """!"""
+
     def __init__(self, raw_txt: str):
         ""
         self.raw_txt = raw_txt
@@ -27,7 +122,7 @@ class GreekProcessing(Preprocessing, AbstractGreekPreprocessor):
         """!
         \brief remove non greek characters from texts
 
-        Using cltk's filter_non_greek() function.
+        Using the characters of cltk's filter_non_greek() function.
         The function simply uses unicode code points to determine whether a
         given character is considered as greek or not.
         \warning this will NOT filter out sigma, omega and related characters
@@ -35,7 +130,7 @@ class GreekProcessing(Preprocessing, AbstractGreekPreprocessor):
         to be different by unicode consortium. Make sure the text does not
         contain those.
         """
-        return filter_non_greek(txt)
+        return get_normalizer().remove_non_greek(txt)
 
     def remove_accent(self, txt: str) -> str:
         """!
@@ -48,22 +143,13 @@ class GreekProcessing(Preprocessing, AbstractGreekPreprocessor):
 
         \endcode
         """
-        txts: List[str] = []
-        for t in txt:
-            tclean = base(t)
-            txts.append(tclean)
-        return "".join(txts)
+        return get_normalizer().remove_accent(txt)
 
     def remove_stop_words(self, txt: str) -> str:
         """!
-        \brief remove stop words starting from longer
+        \brief replace whole tokens that are stop words with a space
         """
-        text = txt
-        slist = STOPS_LIST.copy()
-        slist.sort(key=lambda x: len(x), reverse=True)
-        for word in slist:
-            text = text.replace(word, " ")
-        return text
+        return get_normalizer().remove_stop_words(txt)
 
     def clean_chunk(self, txt: str):
         """!
@@ -75,6 +161,7 @@ class GreekProcessing(Preprocessing, AbstractGreekPreprocessor):
         txt = self.remove_non_greek(txt)
         return self.remove_multiple_space(txt)
 
+    @PROFILER.timed("preprocess.clean_text")
     def clean_text(self, text: str) -> str:
         """!
         \brief Text cleaning procedure if scikit learn procedure does not satisfy
@@ -87,12 +174,25 @@ class GreekProcessing(Preprocessing, AbstractGreekPreprocessor):
         characters if they exist and make all characters lower case for easy
         comparison. We also compare forms without accents since they are more
         or less a later adopted convention.
+
+        Cleaning is done by a precompiled normalizer in one regular
+        expression pass for stop words and one translation pass for
+        punctuations and accents.
+        """
+        return get_normalizer().normalize(text)
+
+    def tokenize(self, txt: str, sep: str = " ") -> Iterator[str]:
+        """!
+        \brief clean text chunk and yield its terms one by one
+
+        \param txt raw text chunk
+        \param sep separator of terms inside chunk, a space stands for white
+        space and punctuations.
         """
-        txt = self.to_lower(text)
-        txt = self.remove_stop_words(txt)
-        txt = self.remove_punk(txt)
-        txt = self.remove_accent(txt)
-        return txt
+        if sep == " ":
+            return get_normalizer().tokens(txt)
+        parts = self.clean_text(txt).split(sep)
+        return (t for t in (self.clean_chunk(p) for p in parts) if t)
 
 
 def clean_greek_text(txt: str):
@@ -5,9 +5,8 @@ Represents a brut greek text object. Greek Text is considered at document level
 """
 # simple text object
 
-from typing import List, Dict
+from typing import List, Dict, Iterable, Optional, Tuple
 import os
-import pdb
 import re
 
 from agsearch.textinfo import TextInfo
@@ -15,9 +14,6 @@ from agsearch.terminfo import TermInfo
 from agsearch.utils import DATA_DIR
 from agsearch.utils import PUNCTUATIONS
 from agsearch.greekprocessing import GreekProcessing
-from greek_accentuation.characters import base
-from cltk.stop.greek.stops import STOPS_LIST
-from cltk.corpus.greek.alphabet import filter_non_greek
 
 
 class GreekText:
@@ -25,6 +21,12 @@ class GreekText:
     \brief Document object that contains text string
     """
 
+    ## version of term extraction, texts indexed with another version are
+    ## indexed again, see CorpusManager. Increase it when tokenization or
+    ## normalization changes, version 2 removes stop words as whole tokens,
+    ## spelled with tonos or oxia, instead of substrings.
+    TOKENIZER_VERSION = 2
+
     def __init__(
         self, chunks: List[str], has_chunks: bool, is_clean: bool, text_id: str
     ):
@@ -47,57 +49,143 @@ class GreekText:
         ## term frequency dictionary for document
         self.term_freq: Dict[str, int] = {}
 
+        ## (chunk index, token offset) of each term occurrence, only filled
+        ## when positions are requested
+        self.term_positions: Dict[str, List[Tuple[int, int]]] = {}
+
     @classmethod
-    def get_terms(cls, chunks: List[str], sep: str) -> Dict[str, int]:
+    def get_terms(
+        cls, tokens: Iterable[str], terms: Optional[Dict[str, int]] = None
+    ) -> Dict[str, int]:
         """!
-        \brief Obtain term count from given chunks.
+        \brief Obtain term count from given tokens.
 
-        \param chunks a set of text parts.
-        \param sep separator for text inside chunk
+        \param tokens cleaned terms, usually a generator from tokenize() of a
+        preprocessor, so that they are counted as they are produced.
+        \param terms term count dictionary to update, a new one is created if
+        not given.
 
-        We strip each term using sep and for each resulting non empty string we
-        increment its slot in terms dictionary
+        For each token we increment its slot in terms dictionary
         """
-        terms: Dict[str, int] = {}
-        for chunk in chunks:
-            chunk_terms = [t.strip() for t in chunk.split(sep) if t]
-            for t in chunk_terms:
-                if t in terms:
-                    terms[t] += 1
-                else:
-                    terms[t] = 1
+        if terms is None:
+            terms = {}
+        for t in tokens:
+            if t in terms:
+                terms[t] += 1
+            else:
+                terms[t] = 1
         return terms
 
     @classmethod
-    def from_info(cls, info: TextInfo, chunk_sep: str = " "):
+    def get_positions(
+        cls,
+        tokens: List[str],
+        chunk_index: int,
+        positions: Dict[str, List[Tuple[int, int]]],
+        start: int = 0,
+    ) -> Dict[str, List[Tuple[int, int]]]:
+        """!
+        \brief record occurrences of chunk tokens
+
+        \param tokens cleaned terms of a chunk
+        \param chunk_index position of the chunk in document
+        \param positions term to occurrences dictionary to update
+        \param start token offset of the first token inside chunk
+        """
+        for offset, t in enumerate(tokens, start=start):
+            if t in positions:
+                positions[t].append((chunk_index, offset))
+            else:
+                positions[t] = [(chunk_index, offset)]
+        return positions
+
+    @classmethod
+    def from_info(
+        cls,
+        info: TextInfo,
+        chunk_sep: str = " ",
+        stream: bool = False,
+        positions: bool = False,
+    ):
         """!
         \brief create text from text info
 
         \param info info we are going to use for creating text
         \param chunk_sep we assume that text inside chunk is separated by space
-
-        Create a text/document from given text info
+        \param stream read the document incrementally, see from_stream()
+        \param positions also record chunk index and token offset of every
+        term occurrence, see positions.py. Chunks are counted before empty
+        ones are dropped, so a chunk index is a line number for line chunked
+        texts.
+
+        Create a text/document from given text info. Each chunk is cleaned and
+        tokenized by the preprocessor, chunks keep their cleaned terms joined
+        by a space.
         """
+        if stream:
+            return cls.from_stream(info, chunk_sep=chunk_sep, positions=positions)
         text_id = info.text_id
         text_path = os.path.join(DATA_DIR, info.local_path)
-        text: str = GreekProcessing.read_text(text_path)
-        greek_processor = GreekProcessing(text)
-        text = greek_processor.clean_text(text)
+        text: str = GreekProcessing.read(text_path)
+        procs = GreekProcessing(text)
+        raw_chunks: List[str] = [text]
+        if info.has_chunks:
+            raw_chunks = text.split(info.chunk_separator)
         terms: Dict[str, int] = {}
+        term_positions: Dict[str, List[Tuple[int, int]]] = {}
         chunks: List[str] = []
-        if info.has_chunks:
-            chunks = text.split(info.chunk_separator)
-            chunks = [greek_processor.clean_chunk(c) for c in chunks if c]
-            terms = cls.get_terms(chunks, chunk_sep)
-        else:
-            chunks = [text]
-            chunks = [greek_processor.clean_chunk(c) for c in chunks if c]
-            terms = cls.get_terms(chunks, chunk_sep)
+        for chunk_index, raw_chunk in enumerate(raw_chunks):
+            chunk_terms = list(procs.tokenize(raw_chunk, sep=chunk_sep))
+            if chunk_terms:
+                chunks.append(" ".join(chunk_terms))
+                cls.get_terms(chunk_terms, terms)
+                if positions:
+                    cls.get_positions(chunk_terms, chunk_index, term_positions)
         #
-        text_obj = Text(
+        text_obj = GreekText(
             chunks=chunks, has_chunks=info.has_chunks, is_clean=True, text_id=text_id
         )
         text_obj.term_freq = terms
+        text_obj.term_positions = term_positions
+        return text_obj
+
+    @classmethod
+    def from_stream(cls, info: TextInfo, chunk_sep: str = " ", positions: bool = False):
+        """!
+        \brief create text from text info reading the document incrementally
+
+        \param info info we are going to use for creating text
+        \param chunk_sep we assume that text inside chunk is separated by space
+        \param positions also record term occurrences, see from_info()
+
+        Chunks are read one at a time and their tokens are counted as they are
+        produced. Memory use is bounded by the chunk size, so chunks are not
+        kept in the text object, only term frequencies are.
+        """
+        text_path = os.path.join(DATA_DIR, info.local_path)
+        procs = GreekProcessing("")
+        sep = info.chunk_separator if info.has_chunks else None
+        terms: Dict[str, int] = {}
+        term_positions: Dict[str, List[Tuple[int, int]]] = {}
+        chunk_index = 0
+        offset = 0
+        for raw_chunk in GreekProcessing.read_chunks(text_path, sep):
+            tokens = procs.tokenize(raw_chunk, sep=chunk_sep)
+            if positions:
+                tokens = list(tokens)
+                cls.get_positions(tokens, chunk_index, term_positions, start=offset)
+                if sep is None:
+                    # pieces of a text without chunks form a single chunk
+                    offset += len(tokens)
+                else:
+                    chunk_index += 1
+            cls.get_terms(tokens, terms)
+        #
+        text_obj = GreekText(
+            chunks=[], has_chunks=info.has_chunks, is_clean=True, text_id=info.text_id
+        )
+        text_obj.term_freq = terms
+        text_obj.term_positions = term_positions
         return text_obj
 
     def to_doc_counts(self) -> Dict[str, Dict[str, int]]:
@@ -112,3 +200,12 @@ class GreekText:
             doc_id_count = {self.text_id: count}
             term_doc_id_counts[term] = doc_id_count
         return term_doc_id_counts
+
+    def to_doc_positions(self) -> Dict[str, Dict[str, List[Tuple[int, int]]]]:
+        """!
+        \brief obtain occurrences per document per term, see to_doc_counts()
+        """
+        return {
+            term: {self.text_id: occurrences}
+            for term, occurrences in self.term_positions.items()
+        }
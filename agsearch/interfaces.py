@@ -2,6 +2,7 @@
 Abstract objects to be used as interfaces
 """
 from abc import ABC, abstractmethod
+from typing import Iterator
 
 
 class AbstractPreprocessor(ABC):
@@ -40,6 +41,13 @@ class AbstractPreprocessor(ABC):
         ""
         raise NotImplementedError
 
+    @abstractmethod
+    def tokenize(self, txt: str, sep: str = " ") -> Iterator[str]:
+        """!
+        Clean text and yield its terms
+        """
+        raise NotImplementedError
+
 
 class AbstractGreekPreprocessor(AbstractPreprocessor):
     """!
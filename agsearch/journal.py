@@ -0,0 +1,102 @@
+"""!
+\file journal.py
+
+Write ahead journal of database changes
+"""
+# replayable log of operations applied to json databases
+
+from typing import Any, Callable, Dict, List, Tuple
+import json
+import os
+
+## operation name to function applying the operation to a database
+Operations = Dict[str, Callable[[Any, Any], None]]
+
+
+class Journal:
+    """!
+    \brief write ahead journal of a json database
+
+    An operation is appended to the journal and flushed to disk before it
+    is applied to the database, and the journal is cleared once the
+    database file has been written. If a process crashes in between, the
+    operations are replayed the next time the database is read.
+
+    Operations must be idempotent: an operation may be applied to a
+    database that already contains it, for instance when the database file
+    was written by another process but the journal was not yet cleared.
+    """
+
+    def __init__(self, path: str, operations: Operations):
+        """!
+        \brief constructor for journal
+
+        \param path path of the journal file
+        \param operations operation name to function applying it in place
+        """
+        self.path = path
+        self.operations = operations
+
+    def append(self, op: str, payload: Any) -> None:
+        """!
+        \brief durably record an operation
+        """
+        if op not in self.operations:
+            raise ValueError("Unknown journal operation: " + op)
+        line = json.dumps({"op": op, "payload": payload}, ensure_ascii=False)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def entries(self) -> List[Tuple[str, Any]]:
+        """!
+        \brief obtain recorded operations in order
+
+        A last line that is not terminated, left by a crash during append,
+        is ignored: its operation was never applied.
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        entries = []
+        for line in lines:
+            if not line.endswith("\n"):
+                break
+            entry = json.loads(line)
+            entries.append((entry["op"], entry["payload"]))
+        return entries
+
+    def apply(self, data: Any, op: str, payload: Any) -> None:
+        "Apply a single operation to database in place"
+        self.operations[op](data, payload)
+
+    def replay(self, data: Any) -> int:
+        """!
+        \brief apply recorded operations to database in place
+
+        \return number of replayed operations
+        """
+        entries = self.entries()
+        for op, payload in entries:
+            self.apply(data, op, payload)
+        return len(entries)
+
+    def clear(self) -> None:
+        "Drop recorded operations once the database is written"
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __len__(self) -> int:
+        return len(self.entries())
+
+
+if __name__ == "__main__":
+    from agsearch.utils import replay_journals
+
+    for path, nb_ops in replay_journals():
+        print(path, nb_ops, sep="\t")
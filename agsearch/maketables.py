@@ -0,0 +1,128 @@
+"""!
+\file maketables.py
+
+Generate character tables module
+"""
+# writes tables.py from unicode ranges, greek_accentuation and cltk
+
+from typing import Dict, List
+import argparse
+import os
+import sys
+
+from cltk.corpus.greek.alphabet import filter_non_greek
+from cltk.stop.greek.stops import STOPS_LIST
+from greek_accentuation.characters import base
+
+from agsearch.utils import generate_punctuation
+
+## code point ranges covering latin, greek and greek extended characters,
+## punctuations and letterlike symbols such as the ohm sign
+ACCENT_RANGES = [(0x00C0, 0x2400)]
+
+## code point range of greek and greek extended characters
+GREEK_RANGE = (0x0370, 0x2000)
+
+## path of the generated module
+TABLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables.py")
+
+HEADER = '''"""!
+\\file tables.py
+
+Character tables for cleaning texts
+"""
+# generated by python -m agsearch.maketables, do not edit
+'''
+
+
+def make_accent_table() -> Dict[int, str]:
+    """!
+    \brief base character of each accented character of ACCENT_RANGES
+    """
+    table: Dict[int, str] = {}
+    for start, end in ACCENT_RANGES:
+        for code in range(start, end):
+            ch = chr(code)
+            bch = base(ch)
+            if bch != ch:
+                table[code] = bch
+    return table
+
+
+def make_greek_chars() -> str:
+    """!
+    \brief characters of GREEK_RANGE kept by cltk's filter_non_greek
+    """
+    candidates = "".join(chr(c) for c in range(*GREEK_RANGE))
+    return filter_non_greek(candidates)
+
+
+def make_stop_words() -> List[str]:
+    "Greek stop words of cltk"
+    return sorted(set(STOPS_LIST))
+
+
+def escape(txt: str) -> str:
+    "String literal of txt with non ascii characters escaped"
+    return '"' + txt.encode("unicode_escape").decode("ascii").replace('"', '\\"') + '"'
+
+
+def render_tables() -> str:
+    """!
+    \brief obtain source code of tables module
+    """
+    lines = [HEADER]
+    lines.append("## characters of unicode punctuation blocks, see")
+    lines.append("## utils.generate_punctuation()")
+    lines.append("PUNCTUATIONS = [")
+    for punk in generate_punctuation():
+        lines.append("    " + escape(punk) + ",")
+    lines.append("]")
+    lines.append("")
+    lines.append("## code point of accented characters to their base character")
+    lines.append("ACCENT_TABLE = {")
+    for code, bch in sorted(make_accent_table().items()):
+        lines.append("    0x%04X: %s," % (code, escape(bch)))
+    lines.append("}")
+    lines.append("")
+    lines.append("## greek characters kept by cltk's filter_non_greek")
+    lines.append("GREEK_CHARS = (")
+    greek_chars = make_greek_chars()
+    for i in range(0, len(greek_chars), 8):
+        lines.append("    " + escape(greek_chars[i : i + 8]))
+    lines.append(")")
+    lines.append("")
+    lines.append("## greek stop words of cltk")
+    lines.append("STOP_WORDS = [")
+    for word in make_stop_words():
+        lines.append("    " + escape(word) + ",")
+    lines.append("]")
+    return "\n".join(lines) + "\n"
+
+
+def tables_up_to_date(path: str = TABLES_PATH) -> bool:
+    "Whether the tables module at path is the one render_tables() writes"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read() == render_tables()
+    except FileNotFoundError:
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate character tables module")
+    parser.add_argument(
+        "--check",
+        help="only check that the tables module is up to date",
+        action="store_true",
+    )
+    args = parser.parse_args()
+    if args.check:
+        if not tables_up_to_date():
+            print("tables are out of date:", TABLES_PATH)
+            sys.exit(1)
+        print("tables are up to date")
+    else:
+        with open(TABLES_PATH, "w", encoding="utf-8") as f:
+            f.write(render_tables())
+        print(TABLES_PATH)
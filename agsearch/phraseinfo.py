@@ -0,0 +1,135 @@
+"""!
+\file phraseinfo.py
+
+Phrase and proximity search over the positional index
+"""
+# phrase and NEAR/k queries evaluated by merging position lists
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import re
+
+from agsearch.searcher import Searcher
+from agsearch.positions import PositionalIndex
+from agsearch.positions import Span
+from agsearch.positions import near_spans
+from agsearch.positions import phrase_spans
+from agsearch.utils import get_positional_index
+from agsearch.utils import add_to_phrase_info_db
+from agsearch.utils import add_many_to_phrase_info_db
+
+## proximity operator between two phrases, NEAR/k
+NEAR_PATTERN = re.compile(r"\s+NEAR/(\d+)\s+", re.IGNORECASE)
+
+## parsed query: first phrase, then (distance, phrase) pairs
+Query = Tuple[List[str], List[Tuple[int, List[str]]]]
+
+
+def parse_query(line: str, tokenize: Callable[[str], Iterable[str]]) -> Query:
+    """!
+    \brief parse a phrase query with optional proximity operators
+
+    \param line query such as "χαῖρε παροδῖτα" or "χαῖρε NEAR/3 παροδῖτα".
+    Words separated by spaces form a phrase, phrases joined by NEAR/k match
+    when they are at most k tokens apart in the same chunk, in any order.
+    \param tokenize function that cleans a phrase into terms, it should be
+    the one used for indexing texts.
+
+    \throws ValueError if a phrase has no term left after cleaning
+    """
+    parts = NEAR_PATTERN.split(line.strip())
+    phrases = [list(tokenize(part)) for part in parts[0::2]]
+    for phrase, part in zip(phrases, parts[0::2]):
+        if not phrase:
+            raise ValueError("no search term in phrase: " + repr(part))
+    distances = [int(d) for d in parts[1::2]]
+    return phrases[0], list(zip(distances, phrases[1:]))
+
+
+class PhraseInfo(Searcher):
+    """!
+    \brief count matches of phrase and proximity queries per document
+
+    Each line of the query is a phrase or phrases joined with NEAR/k, see
+    parse_query(). Candidate documents are those containing every term of a
+    line, found from the postings without decoding occurrences. Occurrences
+    are then decoded for candidates only and matched by merging sorted
+    position lists, so raw texts are never read. The score of a document is
+    its number of matches over all lines.
+    """
+
+    def __init__(
+        self,
+        queries: List[str],
+        tokenize: Callable[[str], Iterable[str]],
+        index: Optional[PositionalIndex] = None,
+    ):
+        """!
+        \brief constructor for phrase searcher
+
+        \param queries query lines
+        \param tokenize function that cleans a phrase into terms
+        \param index positional index, obtained from disk if not given
+        """
+        self.queries = queries
+        self.parsed = [parse_query(q, tokenize) for q in queries]
+        self.index = index if index is not None else get_positional_index()
+        self.search_results: Optional[Dict[str, int]] = None
+
+    def line_spans(self, query: Query) -> Dict[str, List[Span]]:
+        """!
+        \brief find matches of a parsed query line per document
+        """
+        first, nears = query
+        phrases = [first] + [phrase for _, phrase in nears]
+        terms = set(t for phrase in phrases for t in phrase)
+        candidates = None
+        for term in sorted(terms, key=lambda t: self.index.lexicon.get(t, (0,))[0]):
+            docs = self.index.docs(term)
+            candidates = docs if candidates is None else candidates & docs
+            if not candidates:
+                return {}
+        positions = {t: self.index.positions(t, candidates) for t in terms}
+        matches: Dict[str, List[Span]] = {}
+        for doc_id in sorted(candidates):
+            spans = phrase_spans([positions[t][doc_id] for t in first])
+            for distance, phrase in nears:
+                if not spans:
+                    break
+                other = phrase_spans([positions[t][doc_id] for t in phrase])
+                spans = near_spans(spans, other, distance)
+            if spans:
+                matches[doc_id] = spans
+        return matches
+
+    def scores(self) -> Dict[str, int]:
+        "Number of matches per document over every query line"
+        counts: Dict[str, int] = {}
+        for query in self.parsed:
+            for doc_id, spans in self.line_spans(query).items():
+                counts[doc_id] = counts.get(doc_id, 0) + len(spans)
+        return counts
+
+    def search(self):
+        ""
+        self.search_results = self.scores()
+
+    def top_k(self, k: int) -> List[Tuple[str, float]]:
+        """!
+        \brief obtain k documents with the most matches
+        """
+        ranked = sorted(self.scores().items(), key=lambda x: (-x[1], x[0]))
+        return [(doc_id, float(count)) for doc_id, count in ranked[:k]]
+
+    def result_info(self) -> dict:
+        ""
+        docs = sorted(self.search_results.items(), key=lambda x: (-x[1], x[0]))
+        return {"queries": self.queries, "docs": dict(docs)}
+
+    def save_results(self):
+        ""
+        add_to_phrase_info_db(self.result_info())
+
+    @classmethod
+    def save_many_results(cls, infos: List[dict]) -> None:
+        ""
+        add_many_to_phrase_info_db(infos)
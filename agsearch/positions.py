@@ -0,0 +1,354 @@
+"""!
+\file positions.py
+
+Positional index of term occurrences
+"""
+# chunk and token offset of every occurrence, for phrase and proximity search
+
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import bisect
+import mmap
+import os
+import struct
+
+from agsearch.safeio import atomic_open
+from agsearch.binindex import decode_varint
+from agsearch.binindex import encode_varint
+
+## magic bytes at the start of the file
+MAGIC = b"AGSP"
+
+## version of the format
+VERSION = 1
+
+## magic, version, number of documents, number of terms, offsets of doc
+## table, lexicon and postings
+HEADER = struct.Struct("<4sIIIQQQ")
+
+## term byte length
+U32 = struct.Struct("<I")
+
+## document frequency, postings offset, postings byte length
+LEXICON_ENTRY = struct.Struct("<IQI")
+
+## (chunk index, token offset inside chunk) of an occurrence
+Occurrence = Tuple[int, int]
+
+## term to {doc_id: sorted occurrences} mapping
+Positions = Dict[str, Dict[str, List[Occurrence]]]
+
+## (chunk index, first token offset, last token offset) of a match
+Span = Tuple[int, int, int]
+
+
+def encode_occurrences(occurrences: List[Occurrence]) -> bytes:
+    """!
+    \brief encode sorted occurrences of a term in a document
+
+    Chunk indices are delta encoded. Token offsets are delta encoded inside
+    a chunk and start again from zero in the next chunk, so most occurrences
+    take two bytes.
+    """
+    buf = bytearray()
+    previous_chunk = 0
+    previous_offset = 0
+    for chunk, offset in occurrences:
+        if chunk != previous_chunk:
+            previous_offset = 0
+        encode_varint(chunk - previous_chunk, buf)
+        encode_varint(offset - previous_offset, buf)
+        previous_chunk = chunk
+        previous_offset = offset
+    return bytes(buf)
+
+
+def decode_occurrences(buf, pos: int, end: int) -> List[Occurrence]:
+    """!
+    \brief decode occurrences stored between pos and end
+    """
+    occurrences: List[Occurrence] = []
+    chunk = 0
+    offset = 0
+    while pos < end:
+        chunk_gap, pos = decode_varint(buf, pos)
+        offset_gap, pos = decode_varint(buf, pos)
+        if chunk_gap > 0:
+            offset = 0
+        chunk += chunk_gap
+        offset += offset_gap
+        occurrences.append((chunk, offset))
+    return occurrences
+
+
+def write_positional_index(path: str, postings: Dict[str, Dict[str, bytes]]) -> None:
+    """!
+    \brief write positional index to path
+
+    \param path output path
+    \param postings term to {doc_id: encoded occurrences} mapping, see
+    encode_occurrences()
+
+    The layout follows the binary term info database: a header, a table of
+    interned document ids, a lexicon of sorted terms and the postings. The
+    postings of a term hold, for each document, the gap to the previous
+    document index, the byte length of its occurrences and the occurrences,
+    so documents that are not looked for are skipped without decoding.
+    """
+    doc_ids = sorted(set(d for docs in postings.values() for d in docs))
+    doc_index = {doc_id: i for i, doc_id in enumerate(doc_ids)}
+    doc_table = bytearray()
+    for doc_id in doc_ids:
+        bdoc = doc_id.encode("utf-8")
+        doc_table += U32.pack(len(bdoc))
+        doc_table += bdoc
+    #
+    terms = sorted(postings.keys())
+    lexicon = bytearray()
+    blob = bytearray()
+    for term in terms:
+        docs = sorted((doc_index[d], encoded) for d, encoded in postings[term].items())
+        encoded_term = bytearray()
+        previous = 0
+        for index, encoded in docs:
+            encode_varint(index - previous, encoded_term)
+            encode_varint(len(encoded), encoded_term)
+            encoded_term += encoded
+            previous = index
+        bterm = term.encode("utf-8")
+        lexicon += U32.pack(len(bterm))
+        lexicon += bterm
+        lexicon += LEXICON_ENTRY.pack(len(docs), len(blob), len(encoded_term))
+        blob += encoded_term
+    #
+    doc_table_offset = HEADER.size
+    lexicon_offset = doc_table_offset + len(doc_table)
+    postings_offset = lexicon_offset + len(lexicon)
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        len(doc_ids),
+        len(terms),
+        doc_table_offset,
+        lexicon_offset,
+        postings_offset,
+    )
+    with atomic_open(path, "wb") as f:
+        f.write(header)
+        f.write(doc_table)
+        f.write(lexicon)
+        f.write(blob)
+
+
+class PositionalIndex:
+    """!
+    \brief read only view of a positional index
+
+    The file is memory mapped. Document ids and the lexicon are read when the
+    index is opened, occurrences are decoded only for the terms and the
+    documents that are looked for.
+    """
+
+    def __init__(self, path: str):
+        """!
+        \brief open positional index at path
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            nb_docs,
+            nb_terms,
+            doc_table_offset,
+            lexicon_offset,
+            postings_offset,
+        ) = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC:
+            raise ValueError("not a positional index: " + path)
+        if version != VERSION:
+            raise ValueError("unsupported positional index version: " + str(version))
+        self.postings_offset = postings_offset
+
+        ## interned document ids, position is the document index
+        self.doc_ids: List[str] = []
+        pos = doc_table_offset
+        for _ in range(nb_docs):
+            (size,) = U32.unpack_from(self.buf, pos)
+            pos += U32.size
+            self.doc_ids.append(self.buf[pos : pos + size].decode("utf-8"))
+            pos += size
+
+        ## term to (document frequency, postings offset, postings length)
+        self.lexicon: Dict[str, Tuple[int, int, int]] = {}
+        pos = lexicon_offset
+        for _ in range(nb_terms):
+            (size,) = U32.unpack_from(self.buf, pos)
+            pos += U32.size
+            term = self.buf[pos : pos + size].decode("utf-8")
+            pos += size
+            self.lexicon[term] = LEXICON_ENTRY.unpack_from(self.buf, pos)
+            pos += LEXICON_ENTRY.size
+
+    def close(self) -> None:
+        self.buf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.lexicon)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.lexicon)
+
+    def __contains__(self, term) -> bool:
+        return term in self.lexicon
+
+    def entries(self, term: str) -> Iterator[Tuple[str, int, int]]:
+        """!
+        \brief iterate over documents of term with the location of their
+        occurrences
+
+        \return (doc id, start, end) triples, occurrences are between start
+        and end in the mapped file
+        """
+        entry = self.lexicon.get(term, None)
+        if entry is None:
+            return
+        df, offset, _ = entry
+        pos = self.postings_offset + offset
+        doc_index = 0
+        for _ in range(df):
+            gap, pos = decode_varint(self.buf, pos)
+            size, pos = decode_varint(self.buf, pos)
+            doc_index += gap
+            yield self.doc_ids[doc_index], pos, pos + size
+            pos += size
+
+    def docs(self, term: str) -> Set[str]:
+        """!
+        \brief documents containing term, without decoding occurrences
+        """
+        return set(doc_id for doc_id, _, _ in self.entries(term))
+
+    def positions(
+        self, term: str, doc_ids: Optional[Set[str]] = None
+    ) -> Dict[str, List[Occurrence]]:
+        """!
+        \brief decode occurrences of term
+
+        \param doc_ids if given, only occurrences in these documents are
+        decoded
+        """
+        return {
+            doc_id: decode_occurrences(self.buf, start, end)
+            for doc_id, start, end in self.entries(term)
+            if doc_ids is None or doc_id in doc_ids
+        }
+
+    def encoded(self, term: str) -> Dict[str, bytes]:
+        """!
+        \brief obtain encoded occurrences of term per document
+        """
+        return {
+            doc_id: bytes(self.buf[start:end])
+            for doc_id, start, end in self.entries(term)
+        }
+
+
+def update_positions_file(path: str, added: Positions, removed: Set[str]) -> None:
+    """!
+    \brief add and remove documents of the positional index at path
+
+    \param added occurrences of new and changed documents
+    \param removed changed and deleted documents
+
+    Occurrences of documents that are kept are copied without decoding
+    them. The index is created if it does not exist.
+    """
+    postings: Dict[str, Dict[str, bytes]] = {}
+    if os.path.isfile(path):
+        with PositionalIndex(path) as index:
+            for term in index:
+                encoded = {
+                    doc_id: occurrences
+                    for doc_id, occurrences in index.encoded(term).items()
+                    if doc_id not in removed
+                }
+                if encoded:
+                    postings[term] = encoded
+    for term, docs in added.items():
+        encoded = postings.setdefault(term, {})
+        for doc_id, occurrences in docs.items():
+            encoded[doc_id] = encode_occurrences(occurrences)
+    write_positional_index(path, postings)
+
+
+def phrase_spans(occurrences: List[List[Occurrence]]) -> List[Span]:
+    """!
+    \brief find consecutive occurrences of the terms of a phrase
+
+    \param occurrences sorted occurrences of each term of the phrase in one
+    document
+
+    Occurrences of the i-th term are shifted back by i tokens, so that the
+    phrase matches where every shifted list has the same occurrence. Sorted
+    lists are intersected pairwise by merging.
+    """
+    if not occurrences:
+        return []
+    starts = occurrences[0]
+    for i in range(1, len(occurrences)):
+        shifted = [(chunk, offset - i) for chunk, offset in occurrences[i]]
+        common: List[Occurrence] = []
+        a = 0
+        b = 0
+        while a < len(starts) and b < len(shifted):
+            if starts[a] == shifted[b]:
+                common.append(starts[a])
+                a += 1
+                b += 1
+            elif starts[a] < shifted[b]:
+                a += 1
+            else:
+                b += 1
+        starts = common
+        if not starts:
+            return []
+    last = len(occurrences) - 1
+    return [(chunk, offset, offset + last) for chunk, offset in starts]
+
+
+def near_spans(left: List[Span], right: List[Span], distance: int) -> List[Span]:
+    """!
+    \brief find spans of left and right that are close in the same chunk
+
+    \param distance largest number of tokens from the end of one span to the
+    start of the other, adjacent spans are at distance 1. Order does not
+    matter.
+
+    \return sorted spans covering both matched spans
+    """
+    if not left or not right:
+        return []
+    right_keys = [(chunk, start) for chunk, start, _ in right]
+    longest = max(end - start for _, start, end in right)
+    spans: Set[Span] = set()
+    for chunk, start, end in left:
+        # right spans that end at least at start - distance
+        i = bisect.bisect_left(right_keys, (chunk, start - distance - longest))
+        while i < len(right):
+            r_chunk, r_start, r_end = right[i]
+            if r_chunk != chunk or r_start > end + distance:
+                break
+            i += 1
+            if r_end < start - distance:
+                continue
+            if r_start == start and r_end == end:
+                continue
+            spans.add((chunk, min(start, r_start), max(end, r_end)))
+    return sorted(spans)
@@ -0,0 +1,150 @@
+"""!
+\file postings.py
+
+Compact in memory representation of term info database
+"""
+# interned document ids and array backed postings
+
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+## (document numbers, term counts) of a term as uint32 arrays
+PostingArrays = Tuple[np.ndarray, np.ndarray]
+
+
+def empty_arrays() -> PostingArrays:
+    return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.uint32)
+
+
+def merge_arrays(arrays: List[PostingArrays]) -> PostingArrays:
+    """!
+    \brief sum counts of several postings per document
+
+    \return postings sorted by document number
+    """
+    if not arrays:
+        return empty_arrays()
+    if len(arrays) == 1:
+        return arrays[0]
+    docs = np.concatenate([d for d, _ in arrays])
+    counts = np.concatenate([c for _, c in arrays])
+    merged, inverse = np.unique(docs, return_inverse=True)
+    sums = np.bincount(inverse, weights=counts, minlength=merged.shape[0])
+    return merged.astype(np.uint32), sums.astype(np.uint32)
+
+
+def merge_weighted_arrays(
+    arrays: List[PostingArrays], weights: List[float]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """!
+    \brief sum counts of several postings per document, each multiplied
+    by its weight
+
+    \return document numbers in increasing order and float64 sums
+    """
+    if not arrays:
+        return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.float64)
+    if len(arrays) == 1:
+        docs, counts = arrays[0]
+        return docs, weights[0] * counts.astype(np.float64)
+    docs = np.concatenate([d for d, _ in arrays])
+    values = np.concatenate(
+        [w * c.astype(np.float64) for (_, c), w in zip(arrays, weights)]
+    )
+    merged, inverse = np.unique(docs, return_inverse=True)
+    sums = np.bincount(inverse, weights=values, minlength=merged.shape[0])
+    return merged.astype(np.uint32), sums
+
+
+class CompactIndex(Mapping):
+    """!
+    \brief read only term info database with interned document ids
+
+    Document ids are replaced by their position in a sorted table, and the
+    postings of every term are stored one after the other in two flat
+    unsigned 32 bit arrays, document numbers in increasing order and term
+    counts. A posting takes 8 bytes instead of a dictionary entry holding a
+    document id string, and the postings of a term can be read as numpy
+    arrays without copying them.
+
+    The object behaves like the term to {doc_id: count} dictionary of the
+    json database, see BinaryIndex for the same interface over a file.
+    """
+
+    def __init__(self, term_db: Mapping):
+        """!
+        \brief build compact index from term info database
+
+        \param term_db term to {doc_id: count} mapping
+        """
+        ## interned document ids, position is the document number
+        self.doc_ids: List[str] = sorted(
+            set(d for counts in term_db.values() for d in counts)
+        )
+
+        ## document id to document number
+        self.doc_numbers: Dict[str, int] = {d: i for i, d in enumerate(self.doc_ids)}
+
+        ## term to its position in offsets
+        self.terms: Dict[str, int] = {}
+
+        ## postings of term i are between offsets[i] and offsets[i + 1]
+        self.offsets = array("Q", [0])
+
+        ## document numbers of every term
+        self.docs = array("I")
+
+        ## term counts aligned with docs
+        self.counts = array("I")
+        for term, dcounts in term_db.items():
+            pairs = sorted((self.doc_numbers[d], c) for d, c in dcounts.items())
+            self.terms[term] = len(self.terms)
+            self.docs.extend(d for d, _ in pairs)
+            self.counts.extend(c for _, c in pairs)
+            self.offsets.append(len(self.docs))
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.terms)
+
+    def __contains__(self, term) -> bool:
+        return term in self.terms
+
+    def doc_freq(self, term: str) -> int:
+        """!
+        \brief number of documents containing term
+        """
+        slot = self.terms.get(term, None)
+        if slot is None:
+            return 0
+        return self.offsets[slot + 1] - self.offsets[slot]
+
+    def arrays(self, term: str) -> PostingArrays:
+        """!
+        \brief obtain document numbers and counts of term
+
+        The arrays are views on the index and must not be modified.
+        """
+        slot = self.terms[term]
+        start = self.offsets[slot]
+        end = self.offsets[slot + 1]
+        if start == end:
+            return empty_arrays()
+        docs = np.frombuffer(self.docs, dtype=np.uint32)[start:end]
+        counts = np.frombuffer(self.counts, dtype=np.uint32)[start:end]
+        return docs, counts
+
+    def __getitem__(self, term: str) -> Dict[str, int]:
+        slot = self.terms[term]
+        start = self.offsets[slot]
+        end = self.offsets[slot + 1]
+        return {self.doc_ids[self.docs[i]]: self.counts[i] for i in range(start, end)}
+
+    def nbytes(self) -> int:
+        "Size of posting arrays in bytes"
+        return sum(a.itemsize * len(a) for a in [self.offsets, self.docs, self.counts])
@@ -1,12 +1,35 @@
 """!
 preprocessing text
 """
+from functools import lru_cache
+from typing import Dict, Iterator, Optional
 import re
 
 
 from agsearch.utils import DATA_DIR
 from agsearch.utils import PUNCTUATIONS
 from agsearch.interfaces import AbstractPreprocessor
+from agsearch.profiling import PROFILER
+
+
+@lru_cache(maxsize=None)
+def punk_table() -> Dict[int, str]:
+    """!
+    \brief translation table replacing punctuations with spaces
+
+    Built once on first use.
+    """
+    return str.maketrans({punk: " " for punk in PUNCTUATIONS})
+
+
+## terms are separated by white space
+WORD_PATTERN = re.compile(r"\S+")
+
+## last white space of a string
+LAST_SPACE_PATTERN = re.compile(r"\s\S*\Z")
+
+## number of characters read at once when streaming a file
+BLOCK_SIZE = 1 << 16
 
 
 class Preprocessing(AbstractPreprocessor):
@@ -18,6 +41,7 @@ class Preprocessing(AbstractPreprocessor):
         self.raw_txt = txt
 
     @classmethod
+    @PROFILER.timed("preprocess.read")
     def read(self, path) -> str:
         ""
         txt = None
@@ -25,6 +49,41 @@ class Preprocessing(AbstractPreprocessor):
             txt = f.read()
         return txt
 
+    @classmethod
+    def read_chunks(
+        cls, path: str, sep: Optional[str] = None, block_size: int = BLOCK_SIZE
+    ) -> Iterator[str]:
+        """!
+        \brief read file incrementally and yield its chunks
+
+        \param path path to the text
+        \param sep chunk separator. If None, the text has no chunks and we
+        yield pieces that end at a white space, so that no term is cut.
+        \param block_size number of characters read at once
+
+        Memory use is bounded by block size plus the longest chunk, and does
+        not depend on the size of the document.
+        """
+        buf = ""
+        with open(path, "r", encoding="utf-8") as f:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    break
+                buf += block
+                if sep is None:
+                    match = LAST_SPACE_PATTERN.search(buf)
+                    if match is not None:
+                        yield buf[: match.start()]
+                        buf = buf[match.start() + 1 :]
+                else:
+                    chunks = buf.split(sep)
+                    buf = chunks.pop()
+                    for chunk in chunks:
+                        yield chunk
+        if buf:
+            yield buf
+
     def read_text(self, path):
         ""
         return Preprocessing.read(path)
@@ -41,10 +100,7 @@ class Preprocessing(AbstractPreprocessor):
         """!
         \brief replace punctuations with spaces
         """
-        text = txt
-        for punk in PUNCTUATIONS:
-            text = text.replace(punk, " ")
-        return text
+        return txt.translate(punk_table())
 
     def remove_multiple_space(self, txt: str):
         """!
@@ -65,6 +121,7 @@ class Preprocessing(AbstractPreprocessor):
         """
         return self.remove_multiple_space(txt)
 
+    @PROFILER.timed("preprocess.clean_text")
     def clean_text(self, txt: str) -> str:
         ""
         ltext = self.to_lower(txt)
@@ -72,6 +129,31 @@ class Preprocessing(AbstractPreprocessor):
         ltext = self.remove_multiple_space(ltext)
         return ltext
 
+    def split_terms(self, txt: str, sep: str = " ") -> Iterator[str]:
+        """!
+        \brief yield non empty terms of cleaned text separated by sep
+
+        A space separator stands for any white space.
+        """
+        if sep == " ":
+            for match in WORD_PATTERN.finditer(txt):
+                yield match.group(0)
+        else:
+            for term in txt.split(sep):
+                term = term.strip()
+                if term:
+                    yield term
+
+    def tokenize(self, txt: str, sep: str = " ") -> Iterator[str]:
+        """!
+        \brief clean text chunk and yield its terms one by one
+
+        \param txt raw text chunk
+        \param sep separator of terms inside chunk
+        """
+        txt = self.to_lower(txt).translate(punk_table())
+        return self.split_terms(txt, sep)
+
 
 def clean_preprocessing_text(txt: str):
     ""
@@ -0,0 +1,271 @@
+"""!
+\file profiling.py
+
+Timers and counters of ingestion and search stages
+"""
+# lightweight instrumentation, enabled by --profile or AGSEARCH_PROFILE
+
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+from agsearch.safeio import atomic_open
+
+## environment variable enabling profiling when set to a non empty value
+## other than 0
+PROFILE_ENV = "AGSEARCH_PROFILE"
+
+## environment variable giving the path where metrics are written at exit,
+## also enables profiling
+PROFILE_OUTPUT_ENV = "AGSEARCH_PROFILE_OUTPUT"
+
+## prefix of prometheus metric names
+METRIC_PREFIX = "agsearch"
+
+
+def escape_label(value: str) -> str:
+    "Escape a prometheus label value"
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Profiler:
+    """!
+    \brief accumulate wall time of named stages and named counters
+
+    Stages are timed with timer() or the timed() decorator, counters are
+    incremented with count(). Names are dotted, the first part being the
+    component, such as "db.read.terminfo.json" or "corpus.index_texts".
+
+    When profiling is disabled, timer() returns a shared context manager
+    that does nothing and timed functions only check a flag, so
+    instrumented code runs at nearly the same speed. Recording is
+    serialized by a lock, so a profiler can be shared by server threads.
+
+    Stages run in worker processes, such as tokenizing with several
+    workers, are not recorded, only the enclosing stage of the main process
+    is.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+
+        ## stage name to [number of calls, total seconds, longest call]
+        self.timers: Dict[str, List[float]] = {}
+
+        ## counter name to value
+        self.counters: Dict[str, float] = {}
+
+        ## path where metrics are written at exit
+        self.output: Optional[str] = None
+        self.reporting = False
+
+    def enable(self, output: Optional[str] = None) -> None:
+        """!
+        \brief start recording and report metrics when the process exits
+
+        \param output path of the metrics dump, see dump(). Only the summary
+        is printed if it is not given.
+        """
+        self.enabled = True
+        if output is not None:
+            self.output = output
+        if not self.reporting:
+            self.reporting = True
+            atexit.register(self.report)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.timers = {}
+            self.counters = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        """!
+        \brief add a call of seconds to stage name
+        """
+        with self.lock:
+            stats = self.timers.get(name, None)
+            if stats is None:
+                self.timers[name] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                if seconds > stats[2]:
+                    stats[2] = seconds
+
+    def count(self, name: str, value: float = 1) -> None:
+        """!
+        \brief increment counter name by value
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def _timer(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timer(self, name: str):
+        """!
+        \brief context manager timing the stage name
+
+        \code
+
+        >>> with PROFILER.timer("corpus.index_texts"):
+        ...     index_texts()
+
+        \endcode
+        """
+        if not self.enabled:
+            return NULL_TIMER
+        return self._timer(name)
+
+    def timed(self, name: str) -> Callable:
+        """!
+        \brief decorator timing every call of a function as stage name
+        """
+
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    def snapshot(self) -> dict:
+        """!
+        \brief obtain recorded metrics as a json serializable dictionary
+        """
+        with self.lock:
+            timers = {
+                name: {
+                    "count": int(count),
+                    "total_s": total,
+                    "mean_s": total / count,
+                    "max_s": longest,
+                }
+                for name, (count, total, longest) in sorted(self.timers.items())
+            }
+            counters = dict(sorted(self.counters.items()))
+        return {"timers": timers, "counters": counters}
+
+    def summary(self) -> str:
+        """!
+        \brief obtain a table of stages by decreasing total time, then
+        counters
+        """
+        metrics = self.snapshot()
+        stages = sorted(metrics["timers"].items(), key=lambda x: -x[1]["total_s"])
+        lines = ["stage\tcalls\ttotal ms\tmean ms\tmax ms"]
+        for name, stats in stages:
+            lines.append(
+                "{0}\t{1}\t{2:.3f}\t{3:.3f}\t{4:.3f}".format(
+                    name,
+                    stats["count"],
+                    stats["total_s"] * 1000.0,
+                    stats["mean_s"] * 1000.0,
+                    stats["max_s"] * 1000.0,
+                )
+            )
+        for name, value in metrics["counters"].items():
+            lines.append("{0}\t{1:g}".format(name, value))
+        return "\n".join(lines)
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """!
+        \brief obtain metrics in prometheus text exposition format
+
+        Stages are a summary without quantiles, labelled by stage name, with
+        their longest call as a gauge. Counters are labelled by name.
+        """
+        metrics = self.snapshot()
+        seconds = METRIC_PREFIX + "_stage_seconds"
+        longest = METRIC_PREFIX + "_stage_max_seconds"
+        events = METRIC_PREFIX + "_events_total"
+        lines = [
+            "# HELP " + seconds + " wall time spent in a stage",
+            "# TYPE " + seconds + " summary",
+        ]
+        for name, stats in metrics["timers"].items():
+            label = '{stage="' + escape_label(name) + '"}'
+            lines.append(seconds + "_sum" + label + " " + repr(stats["total_s"]))
+            lines.append(seconds + "_count" + label + " " + str(stats["count"]))
+        lines.append("# HELP " + longest + " longest call of a stage")
+        lines.append("# TYPE " + longest + " gauge")
+        for name, stats in metrics["timers"].items():
+            label = '{stage="' + escape_label(name) + '"}'
+            lines.append(longest + label + " " + repr(stats["max_s"]))
+        lines.append("# HELP " + events + " number of events")
+        lines.append("# TYPE " + events + " counter")
+        for name, value in metrics["counters"].items():
+            label = '{counter="' + escape_label(name) + '"}'
+            lines.append(events + label + " " + repr(float(value)))
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str) -> None:
+        """!
+        \brief write metrics to path
+
+        Paths ending with .prom or .txt are written in prometheus text
+        format, so that a node exporter textfile collector can read metrics
+        of batch jobs. Other paths are written in json.
+        """
+        if path.endswith((".prom", ".txt")):
+            content = self.to_prometheus()
+        else:
+            content = self.to_json() + "\n"
+        with atomic_open(path, "w") as f:
+            f.write(content)
+
+    def report(self) -> None:
+        """!
+        \brief print summary to standard error and dump metrics to output
+        """
+        if not self.enabled:
+            return
+        print(self.summary(), file=sys.stderr)
+        if self.output is not None:
+            self.dump(self.output)
+
+
+class NullTimer:
+    "Context manager that does nothing, used when profiling is disabled"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+## profiler of the process
+PROFILER = Profiler()
+
+if os.environ.get(PROFILE_ENV, "") not in ["", "0"] or os.environ.get(
+    PROFILE_OUTPUT_ENV, ""
+):
+    PROFILER.enable(os.environ.get(PROFILE_OUTPUT_ENV, None))
@@ -0,0 +1,167 @@
+"""!
+\file resultcache.py
+
+Cache of search results
+"""
+# lru cache of search results keyed by query and index generation
+
+from collections import OrderedDict
+from typing import List, Optional
+import hashlib
+import json
+import os
+import re
+import threading
+
+## name of an entry file of the on disk tier, generation and key digest
+ENTRY_NAME_PATTERN = re.compile(r"^(\d+)-[0-9a-f]{40}\.json$")
+
+
+class ResultCache:
+    """!
+    \brief size bounded cache of search results
+
+    Entries are keyed by the query and the generation of the index they
+    were computed on. CorpusManager increments the generation when it adds
+    documents, so results computed on an older index are never returned.
+    When a new generation is seen, older entries are dropped.
+
+    The least recently used entry is evicted when the cache is full. If a
+    cache directory is given, entries are also written there, one json file
+    per entry, so they survive restarts.
+    """
+
+    def __init__(self, max_size: int = 256, cache_dir: Optional[str] = None):
+        """!
+        \brief constructor for result cache
+
+        \param max_size maximum number of entries kept in memory
+        \param cache_dir directory of the on disk tier, None to disable it
+        """
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+
+        ## key to entry, from least to most recently used
+        self.entries: OrderedDict = OrderedDict()
+
+        ## index generation of cached entries
+        self.generation: Optional[int] = None
+
+        ## number of lookups answered from cache and not
+        self.hits = 0
+        self.misses = 0
+
+        ## serializes access between threads
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        choice: int,
+        match: str,
+        top_k: Optional[int],
+        terms: List[str],
+        preproc_choice: int = 2,
+    ) -> str:
+        """!
+        \brief obtain cache key of a query
+
+        \param choice searcher choice
+        \param match term matching mode
+        \param top_k number of requested results, None for all
+        \param terms normalized search terms
+        \param preproc_choice preprocessor of search terms, phrase queries
+        are tokenized with it
+        """
+        return json.dumps(
+            [choice, preproc_choice, match, top_k, terms], ensure_ascii=False
+        )
+
+    def entry_path(self, key: str, generation: int) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, str(generation) + "-" + digest + ".json")
+
+    def set_generation(self, generation: int) -> None:
+        """!
+        \brief drop entries of other index generations
+
+        Only entry files of the cache, see ENTRY_NAME_PATTERN, are removed
+        from the cache directory, other files there are left alone.
+        """
+        if generation == self.generation:
+            return
+        self.entries.clear()
+        self.generation = generation
+        if self.cache_dir is None or not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            match = ENTRY_NAME_PATTERN.match(name)
+            if match is not None and int(match.group(1)) != generation:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    pass
+
+    def read_entry(self, key: str, generation: int) -> Optional[dict]:
+        "Read entry from on disk tier"
+        try:
+            with open(self.entry_path(key, generation), "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if stored.get("key", None) != key:
+            return None
+        return stored["entry"]
+
+    def write_entry(self, key: str, generation: int, entry: dict) -> None:
+        "Write entry to on disk tier"
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.entry_path(key, generation)
+        tmp_path = path + ".tmp" + str(threading.get_ident())
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "entry": entry}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def get(self, key: str, generation: int) -> Optional[dict]:
+        """!
+        \brief obtain cached entry of key computed on the given generation
+
+        \return entry or None if it is not cached
+        """
+        with self.lock:
+            self.set_generation(generation)
+            entry = self.entries.get(key, None)
+            if entry is None and self.cache_dir is not None:
+                entry = self.read_entry(key, generation)
+                if entry is not None:
+                    self.store(key, entry)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def store(self, key: str, entry: dict) -> None:
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def put(self, key: str, generation: int, entry: dict) -> None:
+        """!
+        \brief cache entry of key computed on the given generation
+        """
+        with self.lock:
+            self.set_generation(generation)
+            self.store(key, entry)
+            if self.cache_dir is not None:
+                self.write_entry(key, generation, entry)
+
+    def clear(self) -> None:
+        "Drop entries kept in memory"
+        with self.lock:
+            self.entries.clear()
+
+
+## process wide result cache used by search managers
+RESULT_CACHE = ResultCache()
@@ -0,0 +1,256 @@
+"""!
+\file resultlog.py
+
+Append only log of search results
+"""
+# json lines results database with an offset index
+
+from array import array
+from typing import Any, Iterator, List, Optional
+import argparse
+import json
+import os
+import threading
+
+from agsearch.profiling import PROFILER
+from agsearch.safeio import FileLock
+from agsearch.safeio import atomic_open
+
+## extension of the offset index file next to the log
+INDEX_SUFFIX = ".idx"
+
+
+class ResultLog:
+    """!
+    \brief append only json lines database of search results
+
+    Each result is written as a single json line at the end of the log, so
+    saving a result does not depend on the number of results saved before.
+    A binary index next to the log holds the end offset of each line as an
+    unsigned 64 bit integer, so the result with a given id, its position in
+    the log, is read with two seeks.
+
+    If the log is missing but a list shaped json database exists at
+    legacy_path, the log is created from it on first use. The legacy file is
+    kept as it is.
+    """
+
+    def __init__(self, path: str, legacy_path: Optional[str] = None):
+        """!
+        \brief constructor for result log
+
+        \param path path of the json lines log
+        \param legacy_path path of the list shaped json database it replaces
+        """
+        self.path = path
+
+        ## name of the log in profiling metrics
+        self.name = os.path.basename(path)
+        self.index_path = path + INDEX_SUFFIX
+        self.legacy_path = legacy_path
+
+        ## serializes appends between threads
+        self.lock = threading.RLock()
+
+        ## serializes appends between processes
+        self.file_lock = FileLock(path)
+
+    @staticmethod
+    def encode(entry: Any) -> bytes:
+        return json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n"
+
+    def ensure(self) -> None:
+        """!
+        \brief create log, migrating legacy database if there is one, and
+        check that its index covers every line
+        """
+        with self.lock, self.file_lock:
+            if not os.path.exists(self.path):
+                if self.legacy_path is not None and os.path.exists(self.legacy_path):
+                    self.migrate(self.legacy_path)
+                else:
+                    self.rewrite([])
+                return
+            if self.index_end() != os.path.getsize(self.path):
+                self.rebuild_index()
+
+    def index_end(self) -> int:
+        "End offset of the last indexed line"
+        try:
+            with open(self.index_path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                if size % 8 != 0:
+                    return -1
+                if size == 0:
+                    return 0
+                f.seek(size - 8)
+                ends = array("Q")
+                ends.frombytes(f.read(8))
+                return ends[0]
+        except FileNotFoundError:
+            return -1
+
+    def rebuild_index(self) -> None:
+        """!
+        \brief rebuild offset index by scanning the log
+
+        A last line that is not terminated, left by an interrupted write, is
+        dropped from the log.
+        """
+        with self.lock, self.file_lock:
+            ends = array("Q")
+            offset = 0
+            with open(self.path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    offset += len(line)
+                    ends.append(offset)
+            if offset != os.path.getsize(self.path):
+                with open(self.path, "r+b") as f:
+                    f.truncate(offset)
+            with atomic_open(self.index_path, "wb") as f:
+                ends.tofile(f)
+
+    def append(self, entries: List[Any]) -> List[int]:
+        """!
+        \brief append entries to the log
+
+        \return ids of the appended entries
+        """
+        PROFILER.count("results.appended", len(entries))
+        with self.lock, self.file_lock, PROFILER.timer("db.append." + self.name):
+            self.ensure()
+            lines = [self.encode(entry) for entry in entries]
+            first_id = len(self)
+            with open(self.path, "ab") as f:
+                offset = f.tell()
+                f.write(b"".join(lines))
+            ends = array("Q")
+            for line in lines:
+                offset += len(line)
+                ends.append(offset)
+            with open(self.index_path, "ab") as f:
+                ends.tofile(f)
+            return list(range(first_id, first_id + len(lines)))
+
+    def __len__(self) -> int:
+        self.ensure()
+        return os.path.getsize(self.index_path) // 8
+
+    def read_ends(self, result_id: int) -> array:
+        "Read end offsets of entries result_id - 1 and result_id"
+        ends = array("Q")
+        with open(self.index_path, "rb") as f:
+            if result_id == 0:
+                ends.append(0)
+                ends.frombytes(f.read(8))
+            else:
+                f.seek((result_id - 1) * 8)
+                ends.frombytes(f.read(16))
+        return ends
+
+    def get(self, result_id: int) -> Any:
+        """!
+        \brief obtain entry with the given id
+
+        \throws IndexError if there is no such entry
+        """
+        if result_id < 0 or result_id >= len(self):
+            raise IndexError("no result with id: " + str(result_id))
+        start, end = self.read_ends(result_id)
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            return json.loads(f.read(end - start).decode("utf-8"))
+
+    def __iter__(self) -> Iterator[Any]:
+        """!
+        \brief stream entries from the oldest to the newest
+        """
+        nb_entries = len(self)
+        with open(self.path, "rb") as f:
+            for _ in range(nb_entries):
+                yield json.loads(f.readline().decode("utf-8"))
+
+    def rewrite(self, entries: List[Any]) -> None:
+        """!
+        \brief replace content of the log with entries
+        """
+        with self.lock, self.file_lock:
+            ends = array("Q")
+            offset = 0
+            with atomic_open(self.path, "wb") as f:
+                for entry in entries:
+                    line = self.encode(entry)
+                    f.write(line)
+                    offset += len(line)
+                    ends.append(offset)
+            with atomic_open(self.index_path, "wb") as f:
+                ends.tofile(f)
+
+    def migrate(self, legacy_path: str) -> int:
+        """!
+        \brief replace log with entries of a list shaped json database
+
+        \return number of migrated entries
+        """
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        if not isinstance(entries, list):
+            raise ValueError("it should be a list: " + legacy_path)
+        self.rewrite(entries)
+        return len(entries)
+
+    def compact(self, keep_last: Optional[int] = None) -> int:
+        """!
+        \brief drop duplicate entries, keeping the latest of each
+
+        \param keep_last if given, keep only this many of the latest entries
+        \return number of entries left. Ids of entries change.
+        """
+        with self.lock, self.file_lock:
+            seen = set()
+            kept: List[Any] = []
+            with open(self.path, "rb") as f:
+                lines = f.readlines()[: len(self)]
+            for line in reversed(lines):
+                if keep_last is not None and len(kept) >= keep_last:
+                    break
+                if line in seen:
+                    continue
+                seen.add(line)
+                kept.append(json.loads(line.decode("utf-8")))
+            kept.reverse()
+            self.rewrite(kept)
+            return len(kept)
+
+
+if __name__ == "__main__":
+    from agsearch.utils import RESULT_LOGS
+
+    parser = argparse.ArgumentParser(description="Maintain search results logs")
+    parser.add_argument(
+        "command",
+        choices=["migrate", "compact", "reindex"],
+        help="migrate: rebuild logs from list shaped json databases,"
+        + " compact: drop duplicate results,"
+        + " reindex: rebuild offset indexes",
+    )
+    parser.add_argument(
+        "--keep-last", help="keep only this many results when compacting", type=int
+    )
+    args = parser.parse_args()
+    for log in RESULT_LOGS:
+        if args.command == "migrate":
+            if log.legacy_path is None or not os.path.exists(log.legacy_path):
+                continue
+            nb_entries = log.migrate(log.legacy_path)
+        elif args.command == "compact":
+            log.ensure()
+            nb_entries = log.compact(keep_last=args.keep_last)
+        else:
+            log.ensure()
+            log.rebuild_index()
+            nb_entries = len(log)
+        print(log.path, nb_entries, sep="\t")
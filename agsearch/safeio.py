@@ -0,0 +1,140 @@
+"""!
+\file safeio.py
+
+Crash safe file writes and inter process file locks
+"""
+# atomic replacement of files and advisory locks
+
+from contextlib import contextmanager
+from typing import IO, Iterator
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # windows
+    fcntl = None
+    import msvcrt
+
+
+def fsync_dir(path: str) -> None:
+    "Make a rename inside directory of path durable"
+    if fcntl is None:
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_open(path: str, mode: str = "w", encoding: str = "utf-8") -> Iterator[IO]:
+    """!
+    \brief open a temporary file that replaces path when it is closed
+
+    The content is written next to path, flushed to disk and renamed over
+    path, so readers and a crash either see the old file or the new one,
+    never a half written file. If the block raises, path is left untouched.
+
+    \code
+
+    >>> with atomic_open("terminfo.json") as f:
+    ...     json.dump(term_db, f)
+
+    \endcode
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix="." + os.path.basename(path) + ".", suffix=".tmp"
+    )
+    try:
+        if "b" in mode:
+            f = os.fdopen(fd, mode)
+        else:
+            f = os.fdopen(fd, mode, encoding=encoding)
+        with f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    fsync_dir(path)
+
+
+class FileLock:
+    """!
+    \brief exclusive lock shared by processes and threads
+
+    The lock is taken on a separate lock file next to the protected file,
+    so that the protected file can be replaced while the lock is held. It is
+    reentrant for the thread that holds it. A process should use a single
+    FileLock object per file, since two lock objects on the same file block
+    each other.
+
+    \code
+
+    >>> with FileLock("terminfo.json"):
+    ...     update database
+
+    \endcode
+    """
+
+    def __init__(self, path: str):
+        """!
+        \brief constructor for file lock
+
+        \param path protected file, the lock file is path.lock
+        """
+        self.path = path + ".lock"
+
+        ## serializes threads of this process
+        self.thread_lock = threading.RLock()
+
+        ## nesting depth of the holding thread
+        self.depth = 0
+
+        ## lock file descriptor while the lock is held
+        self.fd = -1
+
+    def acquire(self) -> None:
+        self.thread_lock.acquire()
+        if self.depth == 0:
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            except BaseException:
+                self.thread_lock.release()
+                raise
+            self.fd = fd
+        self.depth += 1
+
+    def release(self) -> None:
+        self.depth -= 1
+        if self.depth == 0:
+            fd = self.fd
+            self.fd = -1
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(fd)
+        self.thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
@@ -4,16 +4,15 @@
 Score info data base member
 """
 # manager for score info db
-from typing import List, Dict, Optional
-import os
+from typing import List, Dict, Optional, Tuple
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 from agsearch.utils import get_text_info_db
 from agsearch.utils import add_to_score_info_db
-from agsearch.utils import DATA_DIR
-from agsearch.greekprocessing import clean_greek_text
+from agsearch.utils import add_many_to_score_info_db
+from agsearch.utils import TFIDF_MODEL_PATH
+from agsearch.tfidfmodel import TfIdfModel
+from agsearch.tfidfmodel import load_tfidf_model
 from agsearch.textinfo import TextInfo
 from agsearch.terminfo import TermInfo
 from agsearch.searcher import Searcher
@@ -24,26 +23,29 @@ class ScoreInfo(Searcher):
     \brief represents a member of score info database.
     """
 
-    def __init__(self, termfile: str):
+    def __init__(self, termfile: Optional[str], text: Optional[str] = None):
         """!
         \brief Constructor for a score info database member
 
-        self.tf_matrix term frequency inverse document frequency matrix.
+        self.model persisted tf-idf model of the corpus.
+
+        \param termfile path to the term file
+        \param text search terms, if given the term file is not read
         """
         ## path path to the term file
-        self.path: str = termfile
+        self.path: Optional[str] = termfile
+
+        ## search terms given directly
+        self.text: Optional[str] = text
 
         ## infos text info database
         self.infos: TextInfo = get_text_info_db()
 
-        ## term frequency inverse document frequency vector.
-        self.tfidfvec: np.ndarray = None
-
         ## score info dict representation.
         self.score_infos: Dict[str, float] = {}
 
-        ## term frequency inverse document frequency matrix
-        self.tf_matrix: Optional[np.ndarray] = None
+        ## tf-idf model of the corpus, see tfidfmodel.py
+        self.model: Optional[TfIdfModel] = None
         self.search_results: np.ndarray = None
 
     @property
@@ -51,49 +53,97 @@ class ScoreInfo(Searcher):
         """!
         \brief Obtain search terms from given path
 
-        We assume that search terms are inside the file pointed by the path.
+        We assume that search terms are inside the file pointed by the path,
+        unless they are given directly.
         """
+        if self.text is not None:
+            return self.text
         with open(self.path, "r", encoding="utf-8") as f:
             return f.read()
 
     def scores(self) -> np.ndarray:
         """!
-        \brief compute cosine similarity in tf-idf matrix
+        \brief compute cosine similarity of search terms with corpus documents
 
         \return np.ndarray
         """
-        sim_scores = cosine_similarity(self.tf_matrix[0], self.tf_matrix)
-        sim_scores = sim_scores.reshape((-1))
-        sim_scores = sim_scores[1:]
-        return sim_scores
+        return self.model.scores(self.search_terms)
 
-    def save_results(self) -> None:
+    def result_info(self) -> dict:
         """!
-        \brief save result to score info database
+        \brief score info dict of the search
 
         For each text id from text infos we obtain the score of the given text
-        then save it to score info dict which is then added to score info
-        database.
-
+        then save it to score info dict.
         """
         score_id = []
         for text_id in self.infos.keys():
-            index = self.score_infos.pop(text_id)
-            score = self.search_results[index]
+            index = self.score_infos[text_id]
+            score = float(self.search_results[index])
             score_id.append((text_id, score))
         score_id.sort(key=lambda x: x[1])
         score_id = {s[0]: s[1] for s in score_id}
-        score_info = {"terms": self.search_terms, "docs": score_id}
-        add_to_score_info_db(score_info)
+        return {"terms": self.search_terms, "docs": score_id}
+
+    def save_results(self) -> None:
+        """!
+        \brief save result to score info database
+        """
+        add_to_score_info_db(self.result_info())
+
+    @classmethod
+    def save_many_results(cls, infos: List[dict]) -> None:
+        ""
+        add_many_to_score_info_db(infos)
+
+    @classmethod
+    def search_many(cls, termfiles: List[str]) -> List["ScoreInfo"]:
+        """!
+        \brief compute cosine scores of many term files at once
+
+        The model is loaded once, queries are stacked into one sparse matrix
+        and scored against the corpus with a single matrix product.
+
+        \return a searched ScoreInfo per term file, in the same order
+        """
+        infos = get_text_info_db()
+        model = load_tfidf_model(TFIDF_MODEL_PATH, infos)
+        searchers = [ScoreInfo(termfile) for termfile in termfiles]
+        sim_scores = model.scores_many([s.search_terms for s in searchers])
+        score_infos = {text_id: i for i, text_id in enumerate(model.doc_ids)}
+        for j, searcher in enumerate(searchers):
+            searcher.model = model
+            searcher.score_infos = score_infos
+            searcher.search_results = sim_scores[:, j]
+        return searchers
+
+    def top_k(self, k: int) -> List[Tuple[str, float]]:
+        """!
+        \brief obtain k documents most similar to search terms
+
+        Only the k best scores are selected and sorted instead of the whole
+        corpus. Documents sharing no term with the search terms, whose score
+        is 0, are not ranked.
+        """
+        if self.search_results is None:
+            self.search()
+        sim_scores = self.search_results
+        nonzero = np.nonzero(sim_scores > 0)[0]
+        k = min(k, nonzero.shape[0])
+        if k <= 0:
+            return []
+        best = nonzero[np.argpartition(-sim_scores[nonzero], k - 1)[:k]]
+        best = best[np.argsort(-sim_scores[best], kind="stable")]
+        return [(self.model.doc_ids[i], float(sim_scores[i])) for i in best]
 
     def search(self) -> None:
         """!
         \brief  compute cosine scores of search terms
 
-        First we create the vectorizer, then from text infos we obtain local
-        paths to the texts. From text identifiers we create a place for all the
-        texts inside score info database. Then we add search terms and 
-        create tf-idf matrix. We then proceed to compute scores for each term.
+        We load the persisted tf-idf model of the corpus. Texts of text info
+        database that are not yet in the model are added to it, the rest of
+        the corpus is not processed again. Only the search terms are
+        transformed and scored against the document matrix.
 
         \code
 
@@ -103,22 +153,6 @@ class ScoreInfo(Searcher):
 
         \endcode 
         """
-        self.tfidfvec = TfidfVectorizer(
-            input="filename",
-            preprocessor=clean_greek_text,
-            use_idf=True,
-            smooth_idf=True,
-        )
-        self.score_infos = {}
-        filenames = []
-        index = 0
-        for text_id, info in self.infos.items():
-            local_path = info["local_path"]
-            self.score_infos[text_id] = index
-            text_path = os.path.join(DATA_DIR, local_path)
-            filenames.append(text_path)
-            index += 1
-
-        filenames.insert(0, self.path)
-        self.tf_matrix = self.tfidfvec.fit_transform(filenames)
+        self.model = load_tfidf_model(TFIDF_MODEL_PATH, self.infos)
+        self.score_infos = {text_id: i for i, text_id in enumerate(self.model.doc_ids)}
         self.search_results = self.scores()
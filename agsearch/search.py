@@ -5,7 +5,11 @@ New text procedure
 """
 import argparse
 from agsearch.smanager import SearchManager
+from agsearch.smanager import read_query_paths
 from agsearch.corpusmanager import CorpusManager
+from agsearch.resultcache import RESULT_CACHE
+from agsearch.profiling import PROFILER
+from agsearch.fuzzy import FUZZY_DISTANCE
 import sys
 
 
@@ -25,8 +29,10 @@ if __name__ == "__main__":
     )
     parser.add_argument(
         "--searcher",
-        help="Choose your searcher: 1->Similarity, 2->TfIdf search",
-        choices=[1, 2],
+        help="Choose your searcher: 1->Similarity, 2->TfIdf search, 3->BM25 search,"
+        + " 4->Phrase search, each line is a phrase, phrases can be joined with"
+        + " NEAR/k to find them at most k words apart on the same line",
+        choices=[1, 2, 3, 4],
         type=int,
         default=2,
     )
@@ -42,14 +48,121 @@ Choose your preprocessor:
         type=int,
         default=2,
     )
+    parser.add_argument(
+        "--match",
+        help="""
+Term matching for tf-idf and bm25 search:
+- exact: only the given term
+- prefix: terms starting with the given term
+- substring: terms containing the given term, useful for fragmentary texts
+- wildcard: lines are raw fragments, lacunae in square brackets such as
+  [...], [ca. 5], [- - -] or metrical signs [⏑–] match terms with the
+  missing letters, ? and * can also be typed
+- fuzzy: orthographic variants of the given term within --max-distance,
+  such as itacistic spellings, ranked below the term itself
+""",
+        choices=["exact", "prefix", "substring", "wildcard", "fuzzy"],
+        default="exact",
+    )
+    parser.add_argument(
+        "--max-distance",
+        help="largest weighted edit distance of fuzzy matches, a letter edit costs"
+        + " 1 and a common variant such as ι/η or ο/ω costs less",
+        type=float,
+        default=FUZZY_DISTANCE,
+    )
+    parser.add_argument(
+        "--binary-index",
+        help="also write term info in binary memory mapped format during update",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--workers",
+        help="number of processes used for tokenizing new texts during update",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--stream",
+        help="read texts incrementally during update, for very large texts",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--merge",
+        help="merge incremental term info segments into a single file during update",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--positions",
+        help="build the positional index used by phrase search during update, once"
+        + " built it is kept up to date",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--rebuild",
+        help="drop term info database and document registry and index every text"
+        + " again during update",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--top-k",
+        help="print the k best documents in rank order instead of saving all scores",
+        type=int,
+    )
+    parser.add_argument(
+        "--batch",
+        help="directory of query files or manifest file listing one query file per"
+        + " line, all queries are searched against a single loaded index",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="directory where search results are cached between runs",
+    )
+    parser.add_argument(
+        "--profile",
+        help="time update and search stages and print a summary on standard error,"
+        + " also enabled by the AGSEARCH_PROFILE environment variable",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--profile-output",
+        help="write stage timings and counters to this file, in prometheus text"
+        + " format if it ends with .prom or .txt, in json otherwise",
+    )
     args = parser.parse_args()
-    if args.update == 1:
-        cmanager = CorpusManager()
-    elif args.update == 2:
-        cmanager = CorpusManager()
-        sys.exit(0)
+    if args.profile or args.profile_output is not None:
+        PROFILER.enable(args.profile_output)
+    RESULT_CACHE.cache_dir = args.cache_dir
+    if args.update in [1, 2]:
+        cmanager = CorpusManager(
+            write_binary=args.binary_index,
+            workers=args.workers,
+            preproc_choice=args.preprocessor,
+            stream=args.stream,
+            merge=args.merge,
+            positions=args.positions,
+            rebuild=args.rebuild,
+        )
+        if args.update == 2:
+            sys.exit(0)
     manager = SearchManager(
-        args.filepath, choice=args.searcher, preproc_choice=args.preprocessor
+        args.filepath,
+        choice=args.searcher,
+        preproc_choice=args.preprocessor,
+        match=args.match,
+        top_k=args.top_k,
+        max_distance=args.max_distance,
     )
-    manager.search()
+    if args.batch is not None:
+        query_paths = read_query_paths(args.batch)
+        batch_results = manager.search_batch(query_paths)
+        if batch_results is not None:
+            for query_path, results in zip(query_paths, batch_results):
+                for rank, (doc_id, score) in enumerate(results, start=1):
+                    print(query_path, rank, doc_id, score, sep="\t")
+    else:
+        results = manager.search()
+        if results is not None:
+            for rank, (doc_id, score) in enumerate(results, start=1):
+                print(rank, doc_id, score, sep="\t")
     print("Done!")
@@ -1,9 +1,32 @@
 # abstract class for unifying tfidf search and cosine similarity
 
 from abc import ABC, abstractmethod
+from typing import List, Tuple
+
+from agsearch.profiling import PROFILER
+
+## methods of searchers timed when profiling
+TIMED_METHODS = ["search", "top_k", "result_info", "save_results", "save_many_results"]
 
 
 class Searcher(ABC):
+    def __init_subclass__(cls, **kwargs):
+        """!
+        \brief time search and save methods of every searcher
+
+        Stages are named after the class, such as "searcher.TfIdfInfo.search".
+        """
+        super().__init_subclass__(**kwargs)
+        for name in TIMED_METHODS:
+            method = cls.__dict__.get(name, None)
+            if method is None:
+                continue
+            stage = "searcher." + cls.__name__ + "." + name
+            if isinstance(method, classmethod):
+                setattr(cls, name, classmethod(PROFILER.timed(stage)(method.__func__)))
+            else:
+                setattr(cls, name, PROFILER.timed(stage)(method))
+
     @abstractmethod
     def search(self):
         raise NotImplementedError
@@ -11,3 +34,19 @@ class Searcher(ABC):
     @abstractmethod
     def save_results(self):
         raise NotImplementedError
+
+    @abstractmethod
+    def result_info(self) -> dict:
+        "Return search results as they are saved to the results database"
+        raise NotImplementedError
+
+    @classmethod
+    @abstractmethod
+    def save_many_results(cls, infos: List[dict]) -> None:
+        "Save results of many searches in a single write"
+        raise NotImplementedError
+
+    @abstractmethod
+    def top_k(self, k: int) -> List[Tuple[str, float]]:
+        "Return k best (doc id, score) pairs in decreasing order of score"
+        raise NotImplementedError
@@ -0,0 +1,137 @@
+"""!
+\file segments.py
+
+Delta segments of term info database
+"""
+# incremental changes of term info database kept in small files
+
+from typing import Dict, List
+import json
+import os
+
+from agsearch.safeio import atomic_open
+
+## term to {doc_id: count} mapping
+Postings = Dict[str, Dict[str, int]]
+
+
+def apply_segment(term_db: Postings, segment: dict) -> Postings:
+    """!
+    \brief apply changes of a segment to term info database in place
+
+    \param term_db term info database
+    \param segment dictionary with "removed", doc id to the terms of the
+    document before the change, and "postings", term counts of added or
+    changed documents.
+
+    Applying a segment twice gives the same database, so a segment that has
+    already been merged into the database can be applied again safely.
+    """
+    for doc_id, terms in segment["removed"].items():
+        for term in terms:
+            doc_counts = term_db.get(term, None)
+            if doc_counts is None:
+                continue
+            doc_counts.pop(doc_id, None)
+            if not doc_counts:
+                del term_db[term]
+    for term, doc_counts in segment["postings"].items():
+        if term in term_db:
+            term_db[term].update(doc_counts)
+        else:
+            term_db[term] = dict(doc_counts)
+    return term_db
+
+
+class SegmentLog:
+    """!
+    \brief ordered list of delta segments of a database
+
+    Each segment is a json file holding the changes of one update. A
+    manifest lists the segments in the order they should be applied. The
+    full database is read by applying every segment to the base file, and
+    merging consists in writing the result as the new base file and
+    clearing the segments.
+    """
+
+    def __init__(self, manifest_path: str):
+        """!
+        \brief constructor for segment log
+
+        \param manifest_path path of the manifest, segments are written next
+        to it
+        """
+        self.manifest_path = manifest_path
+        self.directory = os.path.dirname(manifest_path)
+        base = os.path.basename(manifest_path)
+        ## prefix of segment file names
+        self.prefix = base[: -len(".json")] if base.endswith(".json") else base
+
+    def read_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"next": 0, "segments": []}
+
+    def write_manifest(self, manifest: dict) -> None:
+        with atomic_open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+
+    def names(self) -> List[str]:
+        "Obtain segment file names in order"
+        return list(self.read_manifest()["segments"])
+
+    def __len__(self) -> int:
+        return len(self.names())
+
+    def read(self, name: str) -> dict:
+        with open(os.path.join(self.directory, name), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def add(self, removed: Dict[str, List[str]], postings: Postings) -> str:
+        """!
+        \brief write a new segment and register it in the manifest
+
+        \param removed doc id to the terms it had before the change, for
+        changed and deleted documents
+        \param postings term counts of added and changed documents
+        \return name of the segment file
+        """
+        manifest = self.read_manifest()
+        name = self.prefix + "." + str(manifest["next"]) + ".json"
+        path = os.path.join(self.directory, name)
+        with atomic_open(path, "w", encoding="utf-8") as f:
+            json.dump({"removed": removed, "postings": postings}, f, ensure_ascii=False)
+        manifest["next"] += 1
+        manifest["segments"].append(name)
+        self.write_manifest(manifest)
+        return name
+
+    def apply_all(self, term_db: Postings) -> Postings:
+        """!
+        \brief apply every segment to term info database in place
+        """
+        for name in self.names():
+            apply_segment(term_db, self.read(name))
+        return term_db
+
+    def remove(self, names: List[str]) -> None:
+        """!
+        \brief drop merged segments from manifest and delete their files
+        """
+        if not names:
+            return
+        manifest = self.read_manifest()
+        merged = set(names)
+        manifest["segments"] = [n for n in manifest["segments"] if n not in merged]
+        self.write_manifest(manifest)
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def clear(self) -> None:
+        "Drop every segment"
+        self.remove(self.names())
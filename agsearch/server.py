@@ -0,0 +1,244 @@
+"""!
+\file server.py
+
+Resident query server
+"""
+# answers search queries over http with databases kept in memory
+
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from socketserver import ThreadingMixIn
+from socketserver import UnixStreamServer
+from typing import Optional
+import argparse
+import json
+import os
+import signal
+import threading
+
+from agsearch.smanager import search_query
+from agsearch.resultcache import RESULT_CACHE
+from agsearch.profiling import PROFILER
+from agsearch.bm25info import DocLengths
+from agsearch.greekprocessing import get_normalizer
+from agsearch.tfidfmodel import load_tfidf_model
+from agsearch.utils import DOCINFO_STORE
+from agsearch.utils import TFIDF_MODEL_PATH
+from agsearch.utils import POSITIONS_PATH
+from agsearch.utils import get_positional_index
+from agsearch.utils import get_term_index
+from agsearch.utils import get_text_info_db
+
+
+def warm_up() -> None:
+    """!
+    \brief load databases, term index, normalizer, tf-idf model and
+    positional index
+
+    Everything is cached by the stores, so queries only pay for scoring.
+    Stores check the modification time of their files on each access, so
+    updates made by CorpusManager in another process are picked up by the
+    next query.
+    """
+    infos = get_text_info_db()
+    get_term_index()
+    get_normalizer()
+    DOCINFO_STORE.derive("doc_lengths", DocLengths)
+    if os.path.exists(TFIDF_MODEL_PATH):
+        load_tfidf_model(TFIDF_MODEL_PATH, infos)
+    if os.path.exists(POSITIONS_PATH):
+        get_positional_index()
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """!
+    \brief handler for search requests
+
+    GET /health reports the number of indexed texts.
+
+    GET /metrics reports stage timings and counters in prometheus text
+    format, GET /metrics.json in json, if the server is profiled.
+
+    POST /search takes a json query as described in search_query(). The
+    response has the same content as SearchManager.search: ranked (doc id,
+    score) pairs if top_k is given, the result info of the search otherwise.
+    """
+
+    server_version = "agsearch"
+
+    def address_string(self) -> str:
+        if isinstance(self.client_address, tuple):
+            return str(self.client_address[0])
+        return str(self.server.server_address)
+
+    def log_message(self, format, *args) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def send_json(self, status: int, body) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_query(self) -> dict:
+        "Read json body of request"
+        length = int(self.headers.get("Content-Length", 0))
+        query = json.loads(self.rfile.read(length).decode("utf-8"))
+        if not isinstance(query, dict):
+            raise ValueError("query should be a json object")
+        return query
+
+    def send_text(self, status: int, text: str) -> None:
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path in ["/metrics", "/metrics.json"]:
+            if not PROFILER.enabled:
+                self.send_json(404, {"error": "profiling is disabled, see --profile"})
+            elif self.path == "/metrics":
+                self.send_text(200, PROFILER.to_prometheus())
+            else:
+                self.send_json(200, PROFILER.snapshot())
+            return
+        if self.path != "/health":
+            self.send_json(404, {"error": "unknown path: " + self.path})
+            return
+        self.send_json(200, {"status": "ok", "texts": len(get_text_info_db())})
+
+    def do_POST(self) -> None:
+        if self.path != "/search":
+            self.send_json(404, {"error": "unknown path: " + self.path})
+            return
+        try:
+            query = self.read_query()
+            results = self.server.search(query)
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self.send_json(500, {"error": str(e)})
+            return
+        self.send_json(200, {"results": results})
+
+
+class QueryServerMixin:
+    """!
+    \brief search state shared by the request handlers of a server
+    """
+
+    daemon_threads = True
+
+    def setup_search(self, preproc_choice: int = 2, quiet: bool = False) -> None:
+        ## preprocessor choice applied to search terms
+        self.preproc_choice = preproc_choice
+
+        ## whether to skip request logging
+        self.quiet = quiet
+
+        ## serializes appends to results databases
+        self.save_lock = threading.Lock()
+
+    def search(self, query: dict):
+        """!
+        \brief run a search described by a json query, see search_query()
+        """
+        if query.get("save", False):
+            with self.save_lock:
+                return search_query(query, self.preproc_choice)
+        return search_query(query, self.preproc_choice)
+
+
+class QueryServer(QueryServerMixin, ThreadingHTTPServer):
+    "Query server listening on a tcp address"
+
+
+class UnixQueryServer(QueryServerMixin, ThreadingMixIn, UnixStreamServer):
+    "Query server listening on a unix socket"
+
+
+def stop_on_signal(signum, frame) -> None:
+    "Stop serving on termination signal as on keyboard interrupt"
+    raise KeyboardInterrupt
+
+
+def make_server(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    socket_path: Optional[str] = None,
+    preproc_choice: int = 2,
+    quiet: bool = False,
+):
+    """!
+    \brief create query server on a tcp address or on a unix socket
+
+    \param socket_path if given, listen on this unix socket instead of
+    host and port
+    """
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixQueryServer(socket_path, QueryHandler)
+    else:
+        server = QueryServer((host, port), QueryHandler)
+    server.setup_search(preproc_choice=preproc_choice, quiet=quiet)
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ancient Greek Search Server")
+    parser.add_argument("--host", help="address to listen on", default="127.0.0.1")
+    parser.add_argument("--port", help="port to listen on", type=int, default=8765)
+    parser.add_argument(
+        "--socket", help="listen on a unix socket at this path instead of a port"
+    )
+    parser.add_argument(
+        "--preprocessor",
+        help="preprocessor of search terms: 1->Simple text, 2->Greek text",
+        choices=[1, 2],
+        type=int,
+        default=2,
+    )
+    parser.add_argument("--quiet", help="do not log requests", action="store_true")
+    parser.add_argument("--cache-dir", help="directory where search results are cached")
+    parser.add_argument(
+        "--profile",
+        help="time search stages and serve them on /metrics, also enabled by the"
+        + " AGSEARCH_PROFILE environment variable",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--profile-output",
+        help="write stage timings and counters to this file on shutdown",
+    )
+    args = parser.parse_args()
+    if args.profile or args.profile_output is not None:
+        PROFILER.enable(args.profile_output)
+    RESULT_CACHE.cache_dir = args.cache_dir
+    warm_up()
+    server = make_server(
+        host=args.host,
+        port=args.port,
+        socket_path=args.socket,
+        preproc_choice=args.preprocessor,
+        quiet=args.quiet,
+    )
+    print("Serving on", server.server_address)
+    # shut down cleanly when stopped by a service manager, so that metrics
+    # are written
+    signal.signal(signal.SIGTERM, stop_on_signal)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket is not None and os.path.exists(args.socket):
+            os.remove(args.socket)
@@ -1,40 +1,337 @@
 # search manager with query etc
 # import pdb
+from typing import Dict, List, Optional, Tuple, Type
+import importlib
+import os
 
-from agsearch.scoreinfo import ScoreInfo
-from agsearch.tfidfinfo import TfIdfInfo
 from agsearch.greekprocessing import GreekProcessing
 from agsearch.preprocessing import Preprocessing
+from agsearch.searcher import Searcher
+from agsearch.profiling import PROFILER
+from agsearch.termindex import MATCH_MODES
+from agsearch.fragments import fragment_terms
+from agsearch.fuzzy import FUZZY_DISTANCE
+from agsearch.resultcache import ResultCache
+from agsearch.resultcache import RESULT_CACHE
+from agsearch.utils import get_index_generation
+
+## searcher choices: 1 similarity, 2 tf-idf, 3 bm25, 4 phrase and proximity
+SEARCHERS = [1, 2, 3, 4]
+
+## module and class name of searcher per choice. Searchers are imported on
+## first use, so that numpy, scipy and scikit-learn are only loaded by the
+## searches that need them.
+SEARCHER_CLASSES = {
+    1: ("agsearch.scoreinfo", "ScoreInfo"),
+    2: ("agsearch.tfidfinfo", "TfIdfInfo"),
+    3: ("agsearch.bm25info", "BM25Info"),
+    4: ("agsearch.phraseinfo", "PhraseInfo"),
+}
+
+
+def searcher_class(choice: int) -> Type[Searcher]:
+    """!
+    \brief obtain searcher class of a choice, importing its module
+    """
+    if choice not in SEARCHER_CLASSES:
+        raise ValueError("Unknown searcher")
+    module_name, class_name = SEARCHER_CLASSES[choice]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def read_query_paths(path: str) -> List[str]:
+    """!
+    \brief obtain query files of a batch
+
+    \param path either a directory, every file of which is a query, or a
+    manifest file with one query path per line. Relative paths in the
+    manifest are taken relative to the manifest's directory, empty lines and
+    lines starting with # are skipped.
+    """
+    if os.path.isdir(path):
+        names = sorted(os.listdir(path))
+        paths = [os.path.join(path, name) for name in names]
+        return [p for p in paths if os.path.isfile(p)]
+    manifest_dir = os.path.dirname(path)
+    paths = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            paths.append(os.path.join(manifest_dir, line))
+    return paths
 
 
 class SearchManager:
-    def __init__(self, term_path: str, choice: int, preproc_choice: int = 2):
+    def __init__(
+        self,
+        term_path: str,
+        choice: int,
+        preproc_choice: int = 2,
+        match: str = "exact",
+        top_k: Optional[int] = None,
+        cache: Optional[ResultCache] = RESULT_CACHE,
+        max_distance: float = FUZZY_DISTANCE,
+    ):
         self.term_path = term_path
         self.searcher_choice = choice
         self.preproc_choice = preproc_choice
+        self.match = match
+        self.max_distance = max_distance
+        self.top_k = top_k
+        self.cache = cache
 
-    def read_terms(self):
-        ""
+    def preprocessor(self):
+        "Preprocessor of search terms"
         if self.preproc_choice == 2:
-            tprocess = GreekProcessing("")
-        else:
-            tprocess = Preprocessing("")
-        with open(self.term_path, "r", encoding="utf-8") as f:
-            terms = f.readlines()
-            terms = [t.strip("\n") for t in terms]
-            terms = [tprocess.to_lower(t) for t in terms]
-            terms = [tprocess.remove_accent(t) for t in terms]
-        #
+            return GreekProcessing("")
+        return Preprocessing("")
+
+    def clean_letters(self, txt: str) -> str:
+        "Clean letters of a fragment as the terms of indexed texts"
+        tprocess = self.preprocessor()
+        txt = tprocess.to_lower(txt)
+        if self.preproc_choice == 2:
+            txt = tprocess.remove_non_greek(tprocess.remove_accent(txt))
+        return txt
+
+    @PROFILER.timed("preprocess.search_terms")
+    def terms_from_text(self, text: str) -> List[str]:
+        """!
+        \brief normalize search terms separated by newline characters
+
+        Blank lines are skipped. With wildcard matching, lines are raw
+        fragments and each word is a term whose lacunae are wildcards, see
+        fragment_terms().
+        """
+        if self.match == "wildcard":
+            return [
+                term
+                for line in text.split("\n")
+                for term in fragment_terms(line, self.clean_letters)
+            ]
+        tprocess = self.preprocessor()
+        terms = [t for t in text.split("\n") if t.strip()]
+        terms = [tprocess.to_lower(t) for t in terms]
+        terms = [tprocess.remove_accent(t) for t in terms]
         return terms
 
-    def search(self):
+    def read_terms(self, term_path: Optional[str] = None):
+        ""
+        if term_path is None:
+            term_path = self.term_path
+        with open(term_path, "r", encoding="utf-8") as f:
+            text = f.read()
+        #
+        return self.terms_from_text(text)
+
+    def make_searcher(self, term_path: str) -> Searcher:
+        """!
+        \brief create selected searcher for the given term file
+        """
+        if self.searcher_choice == 1:
+            return searcher_class(1)(term_path)
+        with open(term_path, "r", encoding="utf-8") as f:
+            return self.make_searcher_from_text(f.read())
+
+    @PROFILER.timed("search.make_searcher")
+    def make_searcher_from_text(self, text: str) -> Searcher:
+        """!
+        \brief create selected searcher for search terms given as text
+        """
+        cls = searcher_class(self.searcher_choice)
         if self.searcher_choice == 1:
-            searcher = ScoreInfo(self.term_path)
-        elif self.searcher_choice == 2:
-            terms = self.read_terms()
-            searcher = TfIdfInfo(terms=terms)
+            searcher = cls(None, text=text)
+        elif self.searcher_choice == 4:
+            # each line is a phrase query, cleaned like indexed texts
+            queries = [line for line in text.split("\n") if line.strip()]
+            tokenize = self.preprocessor().tokenize
+            searcher = cls(queries=queries, tokenize=tokenize)
         else:
-            raise ValueError("Unknown searcher")
+            terms = self.terms_from_text(text)
+            searcher = cls(
+                terms=terms, match=self.match, max_distance=self.max_distance
+            )
+        return searcher
+
+    def cache_key(self, text: str) -> str:
+        "Obtain result cache key of search terms given as text"
+        match = self.match
+        if match == "fuzzy":
+            match += ":" + repr(self.max_distance)
+        return ResultCache.make_key(
+            self.searcher_choice,
+            match,
+            self.top_k,
+            self.terms_from_text(text),
+            self.preproc_choice,
+        )
 
+    def results_of(self, searcher: Searcher):
+        "Obtain top k pairs or result info of a searcher"
+        if self.top_k is not None:
+            return searcher.top_k(self.top_k)
         searcher.search()
-        searcher.save_results()
+        return searcher.result_info()
+
+    def cached_results(self, entry: dict):
+        "Obtain results of a cache entry"
+        results = entry["results"]
+        if self.top_k is not None:
+            # pairs read from the on disk tier are lists
+            results = [(doc_id, score) for doc_id, score in results]
+        return results
+
+    def search_text(self, text: str, save: bool = False):
+        """!
+        \brief run the selected searcher for search terms given as text
+
+        If top_k is set, return the k best (doc id, score) pairs, otherwise
+        return the result info of the search. Results are saved to the
+        results database only if save is set.
+
+        Results are looked up in the result cache first. A cached result
+        that has already been saved is not appended to the results database
+        again.
+        """
+        if self.cache is None:
+            searcher = self.make_searcher_from_text(text)
+            results = self.results_of(searcher)
+            if save and self.top_k is None:
+                searcher.save_results()
+            return results
+        key = self.cache_key(text)
+        generation = get_index_generation()
+        entry = self.cache.get(key, generation)
+        PROFILER.count("cache.miss" if entry is None else "cache.hit")
+        if entry is None:
+            searcher = self.make_searcher_from_text(text)
+            entry = {"results": self.results_of(searcher), "saved": False}
+        elif not save or self.top_k is not None or entry["saved"]:
+            return self.cached_results(entry)
+        if save and self.top_k is None:
+            searcher_class(self.searcher_choice).save_many_results([entry["results"]])
+            entry = {"results": entry["results"], "saved": True}
+        self.cache.put(key, generation, entry)
+        return self.cached_results(entry)
+
+    def search_batch(
+        self, term_paths: List[str]
+    ) -> Optional[List[List[Tuple[str, float]]]]:
+        """!
+        \brief run the selected searcher for many term files
+
+        Databases are loaded once for the whole batch. For similarity search
+        all queries are scored with a single matrix product. Results of all
+        queries are saved with a single write. Queries found in the result
+        cache are not searched again, and results that were already saved
+        are not saved again.
+
+        If top_k is set, return k best (doc id, score) pairs per term file
+        without saving them.
+        """
+        texts = []
+        for term_path in term_paths:
+            with open(term_path, "r", encoding="utf-8") as f:
+                texts.append(f.read())
+        generation = get_index_generation()
+        # same queries of the batch share a single entry
+        entries: Dict[str, Optional[dict]] = {}
+        key_paths: Dict[str, str] = {}
+        keys: List[str] = []
+        for term_path, text in zip(term_paths, texts):
+            key = self.cache_key(text)
+            keys.append(key)
+            if key in entries:
+                continue
+            key_paths[key] = term_path
+            entries[key] = (
+                None if self.cache is None else self.cache.get(key, generation)
+            )
+        missing = [key for key, entry in entries.items() if entry is None]
+        if self.cache is not None:
+            PROFILER.count("cache.miss", len(missing))
+            PROFILER.count("cache.hit", len(entries) - len(missing))
+        if self.searcher_choice == 1:
+            searchers = searcher_class(1).search_many(
+                [key_paths[key] for key in missing]
+            )
+        else:
+            searchers = [self.make_searcher(key_paths[key]) for key in missing]
+        for key, searcher in zip(missing, searchers):
+            if self.searcher_choice == 1 and self.top_k is None:
+                results = searcher.result_info()
+            else:
+                results = self.results_of(searcher)
+            entries[key] = {"results": results, "saved": False}
+        unsaved = [key for key, entry in entries.items() if not entry["saved"]]
+        if self.top_k is None and unsaved:
+            searcher_class(self.searcher_choice).save_many_results(
+                [entries[key]["results"] for key in unsaved]
+            )
+            for key in unsaved:
+                entries[key] = {"results": entries[key]["results"], "saved": True}
+        if self.cache is not None:
+            for key in set(missing).union(unsaved):
+                self.cache.put(key, generation, entries[key])
+        if self.top_k is not None:
+            return [self.cached_results(entries[key]) for key in keys]
+        return None
+
+    def search(self) -> Optional[List[Tuple[str, float]]]:
+        """!
+        \brief run the selected searcher
+
+        If top_k is set, return the k best (doc id, score) pairs without
+        saving them to the results database, otherwise save all results.
+        """
+        with open(self.term_path, "r", encoding="utf-8") as f:
+            text = f.read()
+        results = self.search_text(text, save=self.top_k is None)
+        if self.top_k is not None:
+            return results
+        return None
+
+
+def search_query(query: dict, preproc_choice: int = 2):
+    """!
+    \brief run a search described by a json like query
+
+    \param query dictionary with either "text", search terms separated by
+    newline characters as in a term file, or "terms", a list of search terms.
+    Optional keys are "searcher" (1 to 4), "match", "max_distance", "top_k"
+    and "save".
+    \param preproc_choice preprocessor applied to search terms
+
+    Module level function so that it can be sent to worker processes.
+
+    \return see SearchManager.search_text()
+    """
+    if "text" in query:
+        text = query["text"]
+    else:
+        text = "\n".join(query["terms"])
+    if not isinstance(text, str):
+        raise ValueError("search terms should be text")
+    choice = query.get("searcher", 2)
+    if choice not in SEARCHERS:
+        raise ValueError("Unknown searcher: " + str(choice))
+    match = query.get("match", "exact")
+    if match not in MATCH_MODES:
+        raise ValueError("Unknown match mode: " + str(match))
+    max_distance = query.get("max_distance", FUZZY_DISTANCE)
+    if isinstance(max_distance, bool) or not isinstance(max_distance, (int, float)):
+        raise ValueError("max_distance should be a number")
+    top_k = query.get("top_k", None)
+    if top_k is not None and not isinstance(top_k, int):
+        raise ValueError("top_k should be an integer")
+    manager = SearchManager(
+        None,
+        choice=choice,
+        preproc_choice=preproc_choice,
+        match=match,
+        top_k=top_k,
+        max_distance=float(max_distance),
+    )
+    return manager.search_text(text, save=query.get("save", False))
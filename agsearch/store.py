@@ -0,0 +1,241 @@
+"""!
+\file store.py
+
+In memory store for json databases
+"""
+# process lifetime cache of json databases
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import copy
+import os
+import threading
+
+from agsearch.journal import Journal
+from agsearch.profiling import PROFILER
+from agsearch.safeio import FileLock
+
+
+class JsonStore:
+    """!
+    \brief keeps a json database in memory for the lifetime of the process
+
+    The database is read once and kept in memory. Each access checks the
+    modification time and size of the file, and reloads it if another process
+    has changed it. Writes are kept in memory until flush() is called, so many
+    updates can be batched into a single write.
+
+    Access is serialized by a lock, so a store can be shared by threads.
+    Writes take a file lock, so several processes can update the same
+    database. Changes made through apply() are recorded in a journal before
+    they are made, so they survive a crash and are not lost when another
+    process writes the database in the meantime.
+
+    \warning objects returned by load() are shared between callers. Modify
+    them only through functions that call set() or mark_dirty() afterwards.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        reader: Callable[[str], Any],
+        writer: Callable[[str, Any], None],
+        default: Any = None,
+        depends: Optional[List[str]] = None,
+        journal: Optional[Journal] = None,
+    ):
+        """!
+        \brief constructor for json store
+
+        \param path path to the json database
+        \param reader function that reads database from path
+        \param writer function that writes database to path
+        \param default database used when the file does not exist yet. If
+        None, a missing file is an error.
+        \param depends other files read by reader, the database is read again
+        if one of them changes
+        \param journal write ahead journal of operations, see apply()
+        """
+        self.path = path
+
+        ## name of the database in profiling metrics
+        self.name = os.path.basename(path)
+        self.reader = reader
+        self.writer = writer
+        self.default = default
+        self.depends = depends if depends is not None else []
+        self.journal = journal
+        if journal is not None:
+            self.depends = self.depends + [journal.path]
+
+        ## in memory database
+        self.data: Any = None
+
+        ## (modification time, size) of the file and its dependencies when it
+        ## was last read/written
+        self.stamp: Optional[Tuple] = None
+
+        ## whether there are changes that are not written to disk
+        self.dirty = False
+
+        ## incremented each time the in memory database changes
+        self.generation = 0
+
+        ## values derived from database, keyed by name
+        self.derived: Dict[str, Tuple[int, Any]] = {}
+
+        ## whether the database has been replaced by set() since it was read
+        self.replaced = False
+
+        ## serializes loads, writes and derivations between threads
+        self.lock = threading.RLock()
+
+        ## serializes writes between processes
+        self.file_lock = FileLock(path)
+
+    def file_stamp(self, path: Optional[str] = None) -> Optional[Tuple[int, int]]:
+        """!
+        \brief obtain modification time and size of the database file
+
+        \param path other file to check instead of the database file
+        """
+        try:
+            st = os.stat(self.path if path is None else path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def current_stamp(self) -> Optional[Tuple]:
+        """!
+        \brief obtain stamps of the database file and its dependencies
+        """
+        if not self.depends:
+            return self.file_stamp()
+        return (self.file_stamp(),) + tuple(self.file_stamp(p) for p in self.depends)
+
+    def is_stale(self) -> bool:
+        """!
+        \brief check if file on disk differs from the one in memory
+        """
+        return self.data is None or self.current_stamp() != self.stamp
+
+    def read(self) -> Any:
+        """!
+        \brief read database from disk, replaying journaled operations
+        """
+        with PROFILER.timer("db.read." + self.name):
+            if self.file_stamp() is None and self.default is not None:
+                data = copy.deepcopy(self.default)
+            else:
+                data = self.reader(self.path)
+            if self.journal is not None:
+                self.journal.replay(data)
+        return data
+
+    def load(self) -> Any:
+        """!
+        \brief obtain database, reading it from disk only if it has changed
+
+        Pending writes take precedence over changes on disk.
+        """
+        with self.lock:
+            if self.dirty:
+                return self.data
+            if self.is_stale():
+                stamp = self.current_stamp()
+                self.data = self.read()
+                self.stamp = stamp
+                self.generation += 1
+            return self.data
+
+    def set(self, data: Any) -> None:
+        """!
+        \brief replace in memory database, the change is written on flush
+
+        The whole database is written, so changes made on disk by other
+        processes since it was read are lost. Use apply() for updates, or
+        hold file_lock from reading the database until flush.
+        """
+        with self.lock:
+            self.data = data
+            self.replaced = True
+            self.mark_dirty()
+
+    def apply(self, op: str, payload: Any, flush: bool = True) -> None:
+        """!
+        \brief change database with a journaled operation
+
+        \param op name of the operation, see Journal
+        \param payload argument of the operation, json serializable
+        \param flush write database to disk
+        """
+        with self.lock, self.file_lock:
+            if self.is_stale() and not self.replaced:
+                # our pending operations are either in the file or in the
+                # journal
+                self.data = self.read()
+                self.generation += 1
+            self.journal.append(op, payload)
+            self.journal.apply(self.data, op, payload)
+            self.stamp = self.current_stamp()
+            self.mark_dirty()
+            if flush:
+                self.flush()
+
+    def mark_dirty(self) -> None:
+        """!
+        \brief register that in memory database has been modified in place
+        """
+        with self.lock:
+            self.dirty = True
+            self.generation += 1
+
+    def flush(self) -> None:
+        """!
+        \brief write pending changes to disk
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+            with self.file_lock:
+                if self.journal is not None and not self.replaced:
+                    if self.current_stamp() != self.stamp:
+                        self.data = self.read()
+                        self.generation += 1
+                with PROFILER.timer("db.write." + self.name):
+                    self.writer(self.path, self.data)
+                if self.journal is not None:
+                    self.journal.clear()
+                self.stamp = self.current_stamp()
+            self.dirty = False
+            self.replaced = False
+
+    def refresh(self, data: Any) -> None:
+        """!
+        \brief replace in memory database with one that is already on disk
+
+        Used when the files have been changed directly, so that they are
+        not read again.
+        """
+        with self.lock:
+            self.data = data
+            self.stamp = self.current_stamp()
+            self.generation += 1
+
+    def derive(self, name: str, builder: Callable[[Any], Any]) -> Any:
+        """!
+        \brief obtain a value computed from database
+
+        The value is recomputed only when the database changes.
+
+        \param name name of the derived value
+        \param builder function that computes the value from the database
+        """
+        with self.lock:
+            data = self.load()
+            cached = self.derived.get(name, None)
+            if cached is not None and cached[0] == self.generation:
+                return cached[1]
+            with PROFILER.timer("db.derive." + name):
+                value = builder(data)
+            self.derived[name] = (self.generation, value)
+            return value
@@ -0,0 +1,1400 @@
+"""!
+\file tables.py
+
+Character tables for cleaning texts
+"""
+# generated by python -m agsearch.maketables, do not edit
+
+## characters of unicode punctuation blocks, see
+## utils.generate_punctuation()
+PUNCTUATIONS = [
+    "\u2000",
+    "\u2001",
+    "\u2002",
+    "\u2003",
+    "\u2004",
+    "\u2005",
+    "\u2006",
+    "\u2007",
+    "\u2008",
+    "\u2009",
+    "\u200a",
+    "\u200b",
+    "\u200c",
+    "\u200d",
+    "\u200e",
+    "\u200f",
+    "\u2010",
+    "\u2011",
+    "\u2012",
+    "\u2013",
+    "\u2014",
+    "\u2015",
+    "\u2016",
+    "\u2017",
+    "\u2018",
+    "\u2019",
+    "\u201a",
+    "\u201b",
+    "\u201c",
+    "\u201d",
+    "\u201e",
+    "\u201f",
+    "\u2020",
+    "\u2021",
+    "\u2022",
+    "\u2023",
+    "\u2024",
+    "\u2025",
+    "\u2026",
+    "\u2027",
+    "\u2028",
+    "\u2029",
+    "\u202a",
+    "\u202b",
+    "\u202c",
+    "\u202d",
+    "\u202e",
+    "\u202f",
+    "\u2030",
+    "\u2031",
+    "\u2032",
+    "\u2033",
+    "\u2034",
+    "\u2035",
+    "\u2036",
+    "\u2037",
+    "\u2038",
+    "\u2039",
+    "\u203a",
+    "\u203b",
+    "\u203c",
+    "\u203d",
+    "\u203e",
+    "\u203f",
+    "\u2040",
+    "\u2041",
+    "\u2042",
+    "\u2043",
+    "\u2044",
+    "\u2045",
+    "\u2046",
+    "\u2047",
+    "\u2048",
+    "\u2049",
+    "\u204a",
+    "\u204b",
+    "\u204c",
+    "\u204d",
+    "\u204e",
+    "\u204f",
+    "\u2050",
+    "\u2051",
+    "\u2052",
+    "\u2053",
+    "\u2054",
+    "\u2055",
+    "\u2056",
+    "\u2057",
+    "\u2058",
+    "\u2059",
+    "\u205a",
+    "\u205b",
+    "\u205c",
+    "\u205d",
+    "\u205e",
+    "\u205f",
+    "\u2060",
+    "\u2061",
+    "\u2062",
+    "\u2063",
+    "\u2064",
+    "\u2065",
+    "\u2066",
+    "\u2067",
+    "\u2068",
+    "\u2069",
+    "\u206a",
+    "\u206b",
+    "\u206c",
+    "\u206d",
+    "\u206e",
+    "\u206f",
+    "\u2e00",
+    "\u2e01",
+    "\u2e02",
+    "\u2e03",
+    "\u2e04",
+    "\u2e05",
+    "\u2e06",
+    "\u2e07",
+    "\u2e08",
+    "\u2e09",
+    "\u2e0a",
+    "\u2e0b",
+    "\u2e0c",
+    "\u2e0d",
+    "\u2e0e",
+    "\u2e0f",
+    "\u2e10",
+    "\u2e11",
+    "\u2e12",
+    "\u2e13",
+    "\u2e14",
+    "\u2e15",
+    "\u2e16",
+    "\u2e17",
+    "\u2e18",
+    "\u2e19",
+    "\u2e1a",
+    "\u2e1b",
+    "\u2e1c",
+    "\u2e1d",
+    "\u2e1e",
+    "\u2e1f",
+    "\u2e20",
+    "\u2e21",
+    "\u2e22",
+    "\u2e23",
+    "\u2e24",
+    "\u2e25",
+    "\u2e26",
+    "\u2e27",
+    "\u2e28",
+    "\u2e29",
+    "\u2e2a",
+    "\u2e2b",
+    "\u2e2c",
+    "\u2e2d",
+    "\u2e2e",
+    "\u2e2f",
+    "\u2e30",
+    "\u2e31",
+    "\u2e32",
+    "\u2e33",
+    "\u2e34",
+    "\u2e35",
+    "\u2e36",
+    "\u2e37",
+    "\u2e38",
+    "\u2e39",
+    "\u2e3a",
+    "\u2e3b",
+    "\u2e3c",
+    "\u2e3d",
+    "\u2e3e",
+    "\u2e3f",
+    "\u2e40",
+    "\u2e41",
+    "\u2e42",
+    "\u2e43",
+    "\u2e44",
+    "\u2e45",
+    "\u2e46",
+    "\u2e47",
+    "\u2e48",
+    "\u2e49",
+    "\u2e4a",
+    "\u2e4b",
+    "\u2e4c",
+    "\u2e4d",
+    "\u2e4e",
+    "\u2e4f",
+    "\u2e50",
+    "\u2e51",
+    "\u2e52",
+    "\u2e53",
+    "\u2e54",
+    "\u2e55",
+    "\u2e56",
+    "\u2e57",
+    "\u2e58",
+    "\u2e59",
+    "\u2e5a",
+    "\u2e5b",
+    "\u2e5c",
+    "\u2e5d",
+    "\u2e5e",
+    "\u2e5f",
+    "\u2e60",
+    "\u2e61",
+    "\u2e62",
+    "\u2e63",
+    "\u2e64",
+    "\u2e65",
+    "\u2e66",
+    "\u2e67",
+    "\u2e68",
+    "\u2e69",
+    "\u2e6a",
+    "\u2e6b",
+    "\u2e6c",
+    "\u2e6d",
+    "\u2e6e",
+    "\u2e6f",
+    "\u2e70",
+    "\u2e71",
+    "\u2e72",
+    "\u2e73",
+    "\u2e74",
+    "\u2e75",
+    "\u2e76",
+    "\u2e77",
+    "\u2e78",
+    "\u2e79",
+    "\u2e7a",
+    "\u2e7b",
+    "\u2e7c",
+    "\u2e7d",
+    "\u2e7e",
+    "\u2e7f",
+    "\u3000",
+    "\U00016fe0",
+    "\U00016fe1",
+    "\U00016fe2",
+    "\U00016fe3",
+    "\U00016fe4",
+    "\U00016fe5",
+    "\U00016fe6",
+    "\U00016fe7",
+    "\U00016fe8",
+    "\U00016fe9",
+    "\U00016fea",
+    "\U00016feb",
+    "\U00016fec",
+    "\U00016fed",
+    "\U00016fee",
+    "\U00016fef",
+    "\U00016ff0",
+    "\U00016ff1",
+    "\U00016ff2",
+    "\U00016ff3",
+    "\U00016ff4",
+    "\U00016ff5",
+    "\U00016ff6",
+    "\U00016ff7",
+    "\U00016ff8",
+    "\U00016ff9",
+    "\U00016ffa",
+    "\U00016ffb",
+    "\U00016ffc",
+    "\U00016ffd",
+    "\U00016ffe",
+    "\U00016fff",
+]
+
+## code point of accented characters to their base character
+ACCENT_TABLE = {
+    0x00C0: "A",
+    0x00C1: "A",
+    0x00C2: "A",
+    0x00C3: "A",
+    0x00C4: "A",
+    0x00C5: "A",
+    0x00C7: "C",
+    0x00C8: "E",
+    0x00C9: "E",
+    0x00CA: "E",
+    0x00CB: "E",
+    0x00CC: "I",
+    0x00CD: "I",
+    0x00CE: "I",
+    0x00CF: "I",
+    0x00D1: "N",
+    0x00D2: "O",
+    0x00D3: "O",
+    0x00D4: "O",
+    0x00D5: "O",
+    0x00D6: "O",
+    0x00D9: "U",
+    0x00DA: "U",
+    0x00DB: "U",
+    0x00DC: "U",
+    0x00DD: "Y",
+    0x00E0: "a",
+    0x00E1: "a",
+    0x00E2: "a",
+    0x00E3: "a",
+    0x00E4: "a",
+    0x00E5: "a",
+    0x00E7: "c",
+    0x00E8: "e",
+    0x00E9: "e",
+    0x00EA: "e",
+    0x00EB: "e",
+    0x00EC: "i",
+    0x00ED: "i",
+    0x00EE: "i",
+    0x00EF: "i",
+    0x00F1: "n",
+    0x00F2: "o",
+    0x00F3: "o",
+    0x00F4: "o",
+    0x00F5: "o",
+    0x00F6: "o",
+    0x00F9: "u",
+    0x00FA: "u",
+    0x00FB: "u",
+    0x00FC: "u",
+    0x00FD: "y",
+    0x00FF: "y",
+    0x0100: "A",
+    0x0101: "a",
+    0x0102: "A",
+    0x0103: "a",
+    0x0104: "A",
+    0x0105: "a",
+    0x0106: "C",
+    0x0107: "c",
+    0x0108: "C",
+    0x0109: "c",
+    0x010A: "C",
+    0x010B: "c",
+    0x010C: "C",
+    0x010D: "c",
+    0x010E: "D",
+    0x010F: "d",
+    0x0112: "E",
+    0x0113: "e",
+    0x0114: "E",
+    0x0115: "e",
+    0x0116: "E",
+    0x0117: "e",
+    0x0118: "E",
+    0x0119: "e",
+    0x011A: "E",
+    0x011B: "e",
+    0x011C: "G",
+    0x011D: "g",
+    0x011E: "G",
+    0x011F: "g",
+    0x0120: "G",
+    0x0121: "g",
+    0x0122: "G",
+    0x0123: "g",
+    0x0124: "H",
+    0x0125: "h",
+    0x0128: "I",
+    0x0129: "i",
+    0x012A: "I",
+    0x012B: "i",
+    0x012C: "I",
+    0x012D: "i",
+    0x012E: "I",
+    0x012F: "i",
+    0x0130: "I",
+    0x0134: "J",
+    0x0135: "j",
+    0x0136: "K",
+    0x0137: "k",
+    0x0139: "L",
+    0x013A: "l",
+    0x013B: "L",
+    0x013C: "l",
+    0x013D: "L",
+    0x013E: "l",
+    0x0143: "N",
+    0x0144: "n",
+    0x0145: "N",
+    0x0146: "n",
+    0x0147: "N",
+    0x0148: "n",
+    0x014C: "O",
+    0x014D: "o",
+    0x014E: "O",
+    0x014F: "o",
+    0x0150: "O",
+    0x0151: "o",
+    0x0154: "R",
+    0x0155: "r",
+    0x0156: "R",
+    0x0157: "r",
+    0x0158: "R",
+    0x0159: "r",
+    0x015A: "S",
+    0x015B: "s",
+    0x015C: "S",
+    0x015D: "s",
+    0x015E: "S",
+    0x015F: "s",
+    0x0160: "S",
+    0x0161: "s",
+    0x0162: "T",
+    0x0163: "t",
+    0x0164: "T",
+    0x0165: "t",
+    0x0168: "U",
+    0x0169: "u",
+    0x016A: "U",
+    0x016B: "u",
+    0x016C: "U",
+    0x016D: "u",
+    0x016E: "U",
+    0x016F: "u",
+    0x0170: "U",
+    0x0171: "u",
+    0x0172: "U",
+    0x0173: "u",
+    0x0174: "W",
+    0x0175: "w",
+    0x0176: "Y",
+    0x0177: "y",
+    0x0178: "Y",
+    0x0179: "Z",
+    0x017A: "z",
+    0x017B: "Z",
+    0x017C: "z",
+    0x017D: "Z",
+    0x017E: "z",
+    0x01A0: "O",
+    0x01A1: "o",
+    0x01AF: "U",
+    0x01B0: "u",
+    0x01CD: "A",
+    0x01CE: "a",
+    0x01CF: "I",
+    0x01D0: "i",
+    0x01D1: "O",
+    0x01D2: "o",
+    0x01D3: "U",
+    0x01D4: "u",
+    0x01D5: "U",
+    0x01D6: "u",
+    0x01D7: "U",
+    0x01D8: "u",
+    0x01D9: "U",
+    0x01DA: "u",
+    0x01DB: "U",
+    0x01DC: "u",
+    0x01DE: "A",
+    0x01DF: "a",
+    0x01E0: "A",
+    0x01E1: "a",
+    0x01E2: "\xc6",
+    0x01E3: "\xe6",
+    0x01E6: "G",
+    0x01E7: "g",
+    0x01E8: "K",
+    0x01E9: "k",
+    0x01EA: "O",
+    0x01EB: "o",
+    0x01EC: "O",
+    0x01ED: "o",
+    0x01EE: "\u01b7",
+    0x01EF: "\u0292",
+    0x01F0: "j",
+    0x01F4: "G",
+    0x01F5: "g",
+    0x01F8: "N",
+    0x01F9: "n",
+    0x01FA: "A",
+    0x01FB: "a",
+    0x01FC: "\xc6",
+    0x01FD: "\xe6",
+    0x01FE: "\xd8",
+    0x01FF: "\xf8",
+    0x0200: "A",
+    0x0201: "a",
+    0x0202: "A",
+    0x0203: "a",
+    0x0204: "E",
+    0x0205: "e",
+    0x0206: "E",
+    0x0207: "e",
+    0x0208: "I",
+    0x0209: "i",
+    0x020A: "I",
+    0x020B: "i",
+    0x020C: "O",
+    0x020D: "o",
+    0x020E: "O",
+    0x020F: "o",
+    0x0210: "R",
+    0x0211: "r",
+    0x0212: "R",
+    0x0213: "r",
+    0x0214: "U",
+    0x0215: "u",
+    0x0216: "U",
+    0x0217: "u",
+    0x0218: "S",
+    0x0219: "s",
+    0x021A: "T",
+    0x021B: "t",
+    0x021E: "H",
+    0x021F: "h",
+    0x0226: "A",
+    0x0227: "a",
+    0x0228: "E",
+    0x0229: "e",
+    0x022A: "O",
+    0x022B: "o",
+    0x022C: "O",
+    0x022D: "o",
+    0x022E: "O",
+    0x022F: "o",
+    0x0230: "O",
+    0x0231: "o",
+    0x0232: "Y",
+    0x0233: "y",
+    0x0340: "\u0300",
+    0x0341: "\u0301",
+    0x0343: "\u0313",
+    0x0344: "\u0308",
+    0x0374: "\u02b9",
+    0x037E: ";",
+    0x0385: "\xa8",
+    0x0386: "\u0391",
+    0x0387: "\xb7",
+    0x0388: "\u0395",
+    0x0389: "\u0397",
+    0x038A: "\u0399",
+    0x038C: "\u039f",
+    0x038E: "\u03a5",
+    0x038F: "\u03a9",
+    0x0390: "\u03b9",
+    0x03AA: "\u0399",
+    0x03AB: "\u03a5",
+    0x03AC: "\u03b1",
+    0x03AD: "\u03b5",
+    0x03AE: "\u03b7",
+    0x03AF: "\u03b9",
+    0x03B0: "\u03c5",
+    0x03CA: "\u03b9",
+    0x03CB: "\u03c5",
+    0x03CC: "\u03bf",
+    0x03CD: "\u03c5",
+    0x03CE: "\u03c9",
+    0x03D3: "\u03d2",
+    0x03D4: "\u03d2",
+    0x0400: "\u0415",
+    0x0401: "\u0415",
+    0x0403: "\u0413",
+    0x0407: "\u0406",
+    0x040C: "\u041a",
+    0x040D: "\u0418",
+    0x040E: "\u0423",
+    0x0419: "\u0418",
+    0x0439: "\u0438",
+    0x0450: "\u0435",
+    0x0451: "\u0435",
+    0x0453: "\u0433",
+    0x0457: "\u0456",
+    0x045C: "\u043a",
+    0x045D: "\u0438",
+    0x045E: "\u0443",
+    0x0476: "\u0474",
+    0x0477: "\u0475",
+    0x04C1: "\u0416",
+    0x04C2: "\u0436",
+    0x04D0: "\u0410",
+    0x04D1: "\u0430",
+    0x04D2: "\u0410",
+    0x04D3: "\u0430",
+    0x04D6: "\u0415",
+    0x04D7: "\u0435",
+    0x04DA: "\u04d8",
+    0x04DB: "\u04d9",
+    0x04DC: "\u0416",
+    0x04DD: "\u0436",
+    0x04DE: "\u0417",
+    0x04DF: "\u0437",
+    0x04E2: "\u0418",
+    0x04E3: "\u0438",
+    0x04E4: "\u0418",
+    0x04E5: "\u0438",
+    0x04E6: "\u041e",
+    0x04E7: "\u043e",
+    0x04EA: "\u04e8",
+    0x04EB: "\u04e9",
+    0x04EC: "\u042d",
+    0x04ED: "\u044d",
+    0x04EE: "\u0423",
+    0x04EF: "\u0443",
+    0x04F0: "\u0423",
+    0x04F1: "\u0443",
+    0x04F2: "\u0423",
+    0x04F3: "\u0443",
+    0x04F4: "\u0427",
+    0x04F5: "\u0447",
+    0x04F8: "\u042b",
+    0x04F9: "\u044b",
+    0x0622: "\u0627",
+    0x0623: "\u0627",
+    0x0624: "\u0648",
+    0x0625: "\u0627",
+    0x0626: "\u064a",
+    0x06C0: "\u06d5",
+    0x06C2: "\u06c1",
+    0x06D3: "\u06d2",
+    0x0929: "\u0928",
+    0x0931: "\u0930",
+    0x0934: "\u0933",
+    0x0958: "\u0915",
+    0x0959: "\u0916",
+    0x095A: "\u0917",
+    0x095B: "\u091c",
+    0x095C: "\u0921",
+    0x095D: "\u0922",
+    0x095E: "\u092b",
+    0x095F: "\u092f",
+    0x09CB: "\u09c7",
+    0x09CC: "\u09c7",
+    0x09DC: "\u09a1",
+    0x09DD: "\u09a2",
+    0x09DF: "\u09af",
+    0x0A33: "\u0a32",
+    0x0A36: "\u0a38",
+    0x0A59: "\u0a16",
+    0x0A5A: "\u0a17",
+    0x0A5B: "\u0a1c",
+    0x0A5E: "\u0a2b",
+    0x0B48: "\u0b47",
+    0x0B4B: "\u0b47",
+    0x0B4C: "\u0b47",
+    0x0B5C: "\u0b21",
+    0x0B5D: "\u0b22",
+    0x0B94: "\u0b92",
+    0x0BCA: "\u0bc6",
+    0x0BCB: "\u0bc7",
+    0x0BCC: "\u0bc6",
+    0x0C48: "\u0c46",
+    0x0CC0: "\u0cbf",
+    0x0CC7: "\u0cc6",
+    0x0CC8: "\u0cc6",
+    0x0CCA: "\u0cc6",
+    0x0CCB: "\u0cc6",
+    0x0D4A: "\u0d46",
+    0x0D4B: "\u0d47",
+    0x0D4C: "\u0d46",
+    0x0DDA: "\u0dd9",
+    0x0DDC: "\u0dd9",
+    0x0DDD: "\u0dd9",
+    0x0DDE: "\u0dd9",
+    0x0F43: "\u0f42",
+    0x0F4D: "\u0f4c",
+    0x0F52: "\u0f51",
+    0x0F57: "\u0f56",
+    0x0F5C: "\u0f5b",
+    0x0F69: "\u0f40",
+    0x0F73: "\u0f71",
+    0x0F75: "\u0f71",
+    0x0F76: "\u0fb2",
+    0x0F78: "\u0fb3",
+    0x0F81: "\u0f71",
+    0x0F93: "\u0f92",
+    0x0F9D: "\u0f9c",
+    0x0FA2: "\u0fa1",
+    0x0FA7: "\u0fa6",
+    0x0FAC: "\u0fab",
+    0x0FB9: "\u0f90",
+    0x1026: "\u1025",
+    0x1B06: "\u1b05",
+    0x1B08: "\u1b07",
+    0x1B0A: "\u1b09",
+    0x1B0C: "\u1b0b",
+    0x1B0E: "\u1b0d",
+    0x1B12: "\u1b11",
+    0x1B3B: "\u1b3a",
+    0x1B3D: "\u1b3c",
+    0x1B40: "\u1b3e",
+    0x1B41: "\u1b3f",
+    0x1B43: "\u1b42",
+    0x1E00: "A",
+    0x1E01: "a",
+    0x1E02: "B",
+    0x1E03: "b",
+    0x1E04: "B",
+    0x1E05: "b",
+    0x1E06: "B",
+    0x1E07: "b",
+    0x1E08: "C",
+    0x1E09: "c",
+    0x1E0A: "D",
+    0x1E0B: "d",
+    0x1E0C: "D",
+    0x1E0D: "d",
+    0x1E0E: "D",
+    0x1E0F: "d",
+    0x1E10: "D",
+    0x1E11: "d",
+    0x1E12: "D",
+    0x1E13: "d",
+    0x1E14: "E",
+    0x1E15: "e",
+    0x1E16: "E",
+    0x1E17: "e",
+    0x1E18: "E",
+    0x1E19: "e",
+    0x1E1A: "E",
+    0x1E1B: "e",
+    0x1E1C: "E",
+    0x1E1D: "e",
+    0x1E1E: "F",
+    0x1E1F: "f",
+    0x1E20: "G",
+    0x1E21: "g",
+    0x1E22: "H",
+    0x1E23: "h",
+    0x1E24: "H",
+    0x1E25: "h",
+    0x1E26: "H",
+    0x1E27: "h",
+    0x1E28: "H",
+    0x1E29: "h",
+    0x1E2A: "H",
+    0x1E2B: "h",
+    0x1E2C: "I",
+    0x1E2D: "i",
+    0x1E2E: "I",
+    0x1E2F: "i",
+    0x1E30: "K",
+    0x1E31: "k",
+    0x1E32: "K",
+    0x1E33: "k",
+    0x1E34: "K",
+    0x1E35: "k",
+    0x1E36: "L",
+    0x1E37: "l",
+    0x1E38: "L",
+    0x1E39: "l",
+    0x1E3A: "L",
+    0x1E3B: "l",
+    0x1E3C: "L",
+    0x1E3D: "l",
+    0x1E3E: "M",
+    0x1E3F: "m",
+    0x1E40: "M",
+    0x1E41: "m",
+    0x1E42: "M",
+    0x1E43: "m",
+    0x1E44: "N",
+    0x1E45: "n",
+    0x1E46: "N",
+    0x1E47: "n",
+    0x1E48: "N",
+    0x1E49: "n",
+    0x1E4A: "N",
+    0x1E4B: "n",
+    0x1E4C: "O",
+    0x1E4D: "o",
+    0x1E4E: "O",
+    0x1E4F: "o",
+    0x1E50: "O",
+    0x1E51: "o",
+    0x1E52: "O",
+    0x1E53: "o",
+    0x1E54: "P",
+    0x1E55: "p",
+    0x1E56: "P",
+    0x1E57: "p",
+    0x1E58: "R",
+    0x1E59: "r",
+    0x1E5A: "R",
+    0x1E5B: "r",
+    0x1E5C: "R",
+    0x1E5D: "r",
+    0x1E5E: "R",
+    0x1E5F: "r",
+    0x1E60: "S",
+    0x1E61: "s",
+    0x1E62: "S",
+    0x1E63: "s",
+    0x1E64: "S",
+    0x1E65: "s",
+    0x1E66: "S",
+    0x1E67: "s",
+    0x1E68: "S",
+    0x1E69: "s",
+    0x1E6A: "T",
+    0x1E6B: "t",
+    0x1E6C: "T",
+    0x1E6D: "t",
+    0x1E6E: "T",
+    0x1E6F: "t",
+    0x1E70: "T",
+    0x1E71: "t",
+    0x1E72: "U",
+    0x1E73: "u",
+    0x1E74: "U",
+    0x1E75: "u",
+    0x1E76: "U",
+    0x1E77: "u",
+    0x1E78: "U",
+    0x1E79: "u",
+    0x1E7A: "U",
+    0x1E7B: "u",
+    0x1E7C: "V",
+    0x1E7D: "v",
+    0x1E7E: "V",
+    0x1E7F: "v",
+    0x1E80: "W",
+    0x1E81: "w",
+    0x1E82: "W",
+    0x1E83: "w",
+    0x1E84: "W",
+    0x1E85: "w",
+    0x1E86: "W",
+    0x1E87: "w",
+    0x1E88: "W",
+    0x1E89: "w",
+    0x1E8A: "X",
+    0x1E8B: "x",
+    0x1E8C: "X",
+    0x1E8D: "x",
+    0x1E8E: "Y",
+    0x1E8F: "y",
+    0x1E90: "Z",
+    0x1E91: "z",
+    0x1E92: "Z",
+    0x1E93: "z",
+    0x1E94: "Z",
+    0x1E95: "z",
+    0x1E96: "h",
+    0x1E97: "t",
+    0x1E98: "w",
+    0x1E99: "y",
+    0x1E9B: "\u017f",
+    0x1EA0: "A",
+    0x1EA1: "a",
+    0x1EA2: "A",
+    0x1EA3: "a",
+    0x1EA4: "A",
+    0x1EA5: "a",
+    0x1EA6: "A",
+    0x1EA7: "a",
+    0x1EA8: "A",
+    0x1EA9: "a",
+    0x1EAA: "A",
+    0x1EAB: "a",
+    0x1EAC: "A",
+    0x1EAD: "a",
+    0x1EAE: "A",
+    0x1EAF: "a",
+    0x1EB0: "A",
+    0x1EB1: "a",
+    0x1EB2: "A",
+    0x1EB3: "a",
+    0x1EB4: "A",
+    0x1EB5: "a",
+    0x1EB6: "A",
+    0x1EB7: "a",
+    0x1EB8: "E",
+    0x1EB9: "e",
+    0x1EBA: "E",
+    0x1EBB: "e",
+    0x1EBC: "E",
+    0x1EBD: "e",
+    0x1EBE: "E",
+    0x1EBF: "e",
+    0x1EC0: "E",
+    0x1EC1: "e",
+    0x1EC2: "E",
+    0x1EC3: "e",
+    0x1EC4: "E",
+    0x1EC5: "e",
+    0x1EC6: "E",
+    0x1EC7: "e",
+    0x1EC8: "I",
+    0x1EC9: "i",
+    0x1ECA: "I",
+    0x1ECB: "i",
+    0x1ECC: "O",
+    0x1ECD: "o",
+    0x1ECE: "O",
+    0x1ECF: "o",
+    0x1ED0: "O",
+    0x1ED1: "o",
+    0x1ED2: "O",
+    0x1ED3: "o",
+    0x1ED4: "O",
+    0x1ED5: "o",
+    0x1ED6: "O",
+    0x1ED7: "o",
+    0x1ED8: "O",
+    0x1ED9: "o",
+    0x1EDA: "O",
+    0x1EDB: "o",
+    0x1EDC: "O",
+    0x1EDD: "o",
+    0x1EDE: "O",
+    0x1EDF: "o",
+    0x1EE0: "O",
+    0x1EE1: "o",
+    0x1EE2: "O",
+    0x1EE3: "o",
+    0x1EE4: "U",
+    0x1EE5: "u",
+    0x1EE6: "U",
+    0x1EE7: "u",
+    0x1EE8: "U",
+    0x1EE9: "u",
+    0x1EEA: "U",
+    0x1EEB: "u",
+    0x1EEC: "U",
+    0x1EED: "u",
+    0x1EEE: "U",
+    0x1EEF: "u",
+    0x1EF0: "U",
+    0x1EF1: "u",
+    0x1EF2: "Y",
+    0x1EF3: "y",
+    0x1EF4: "Y",
+    0x1EF5: "y",
+    0x1EF6: "Y",
+    0x1EF7: "y",
+    0x1EF8: "Y",
+    0x1EF9: "y",
+    0x1F00: "\u03b1",
+    0x1F01: "\u03b1",
+    0x1F02: "\u03b1",
+    0x1F03: "\u03b1",
+    0x1F04: "\u03b1",
+    0x1F05: "\u03b1",
+    0x1F06: "\u03b1",
+    0x1F07: "\u03b1",
+    0x1F08: "\u0391",
+    0x1F09: "\u0391",
+    0x1F0A: "\u0391",
+    0x1F0B: "\u0391",
+    0x1F0C: "\u0391",
+    0x1F0D: "\u0391",
+    0x1F0E: "\u0391",
+    0x1F0F: "\u0391",
+    0x1F10: "\u03b5",
+    0x1F11: "\u03b5",
+    0x1F12: "\u03b5",
+    0x1F13: "\u03b5",
+    0x1F14: "\u03b5",
+    0x1F15: "\u03b5",
+    0x1F18: "\u0395",
+    0x1F19: "\u0395",
+    0x1F1A: "\u0395",
+    0x1F1B: "\u0395",
+    0x1F1C: "\u0395",
+    0x1F1D: "\u0395",
+    0x1F20: "\u03b7",
+    0x1F21: "\u03b7",
+    0x1F22: "\u03b7",
+    0x1F23: "\u03b7",
+    0x1F24: "\u03b7",
+    0x1F25: "\u03b7",
+    0x1F26: "\u03b7",
+    0x1F27: "\u03b7",
+    0x1F28: "\u0397",
+    0x1F29: "\u0397",
+    0x1F2A: "\u0397",
+    0x1F2B: "\u0397",
+    0x1F2C: "\u0397",
+    0x1F2D: "\u0397",
+    0x1F2E: "\u0397",
+    0x1F2F: "\u0397",
+    0x1F30: "\u03b9",
+    0x1F31: "\u03b9",
+    0x1F32: "\u03b9",
+    0x1F33: "\u03b9",
+    0x1F34: "\u03b9",
+    0x1F35: "\u03b9",
+    0x1F36: "\u03b9",
+    0x1F37: "\u03b9",
+    0x1F38: "\u0399",
+    0x1F39: "\u0399",
+    0x1F3A: "\u0399",
+    0x1F3B: "\u0399",
+    0x1F3C: "\u0399",
+    0x1F3D: "\u0399",
+    0x1F3E: "\u0399",
+    0x1F3F: "\u0399",
+    0x1F40: "\u03bf",
+    0x1F41: "\u03bf",
+    0x1F42: "\u03bf",
+    0x1F43: "\u03bf",
+    0x1F44: "\u03bf",
+    0x1F45: "\u03bf",
+    0x1F48: "\u039f",
+    0x1F49: "\u039f",
+    0x1F4A: "\u039f",
+    0x1F4B: "\u039f",
+    0x1F4C: "\u039f",
+    0x1F4D: "\u039f",
+    0x1F50: "\u03c5",
+    0x1F51: "\u03c5",
+    0x1F52: "\u03c5",
+    0x1F53: "\u03c5",
+    0x1F54: "\u03c5",
+    0x1F55: "\u03c5",
+    0x1F56: "\u03c5",
+    0x1F57: "\u03c5",
+    0x1F59: "\u03a5",
+    0x1F5B: "\u03a5",
+    0x1F5D: "\u03a5",
+    0x1F5F: "\u03a5",
+    0x1F60: "\u03c9",
+    0x1F61: "\u03c9",
+    0x1F62: "\u03c9",
+    0x1F63: "\u03c9",
+    0x1F64: "\u03c9",
+    0x1F65: "\u03c9",
+    0x1F66: "\u03c9",
+    0x1F67: "\u03c9",
+    0x1F68: "\u03a9",
+    0x1F69: "\u03a9",
+    0x1F6A: "\u03a9",
+    0x1F6B: "\u03a9",
+    0x1F6C: "\u03a9",
+    0x1F6D: "\u03a9",
+    0x1F6E: "\u03a9",
+    0x1F6F: "\u03a9",
+    0x1F70: "\u03b1",
+    0x1F71: "\u03b1",
+    0x1F72: "\u03b5",
+    0x1F73: "\u03b5",
+    0x1F74: "\u03b7",
+    0x1F75: "\u03b7",
+    0x1F76: "\u03b9",
+    0x1F77: "\u03b9",
+    0x1F78: "\u03bf",
+    0x1F79: "\u03bf",
+    0x1F7A: "\u03c5",
+    0x1F7B: "\u03c5",
+    0x1F7C: "\u03c9",
+    0x1F7D: "\u03c9",
+    0x1F80: "\u03b1",
+    0x1F81: "\u03b1",
+    0x1F82: "\u03b1",
+    0x1F83: "\u03b1",
+    0x1F84: "\u03b1",
+    0x1F85: "\u03b1",
+    0x1F86: "\u03b1",
+    0x1F87: "\u03b1",
+    0x1F88: "\u0391",
+    0x1F89: "\u0391",
+    0x1F8A: "\u0391",
+    0x1F8B: "\u0391",
+    0x1F8C: "\u0391",
+    0x1F8D: "\u0391",
+    0x1F8E: "\u0391",
+    0x1F8F: "\u0391",
+    0x1F90: "\u03b7",
+    0x1F91: "\u03b7",
+    0x1F92: "\u03b7",
+    0x1F93: "\u03b7",
+    0x1F94: "\u03b7",
+    0x1F95: "\u03b7",
+    0x1F96: "\u03b7",
+    0x1F97: "\u03b7",
+    0x1F98: "\u0397",
+    0x1F99: "\u0397",
+    0x1F9A: "\u0397",
+    0x1F9B: "\u0397",
+    0x1F9C: "\u0397",
+    0x1F9D: "\u0397",
+    0x1F9E: "\u0397",
+    0x1F9F: "\u0397",
+    0x1FA0: "\u03c9",
+    0x1FA1: "\u03c9",
+    0x1FA2: "\u03c9",
+    0x1FA3: "\u03c9",
+    0x1FA4: "\u03c9",
+    0x1FA5: "\u03c9",
+    0x1FA6: "\u03c9",
+    0x1FA7: "\u03c9",
+    0x1FA8: "\u03a9",
+    0x1FA9: "\u03a9",
+    0x1FAA: "\u03a9",
+    0x1FAB: "\u03a9",
+    0x1FAC: "\u03a9",
+    0x1FAD: "\u03a9",
+    0x1FAE: "\u03a9",
+    0x1FAF: "\u03a9",
+    0x1FB0: "\u03b1",
+    0x1FB1: "\u03b1",
+    0x1FB2: "\u03b1",
+    0x1FB3: "\u03b1",
+    0x1FB4: "\u03b1",
+    0x1FB6: "\u03b1",
+    0x1FB7: "\u03b1",
+    0x1FB8: "\u0391",
+    0x1FB9: "\u0391",
+    0x1FBA: "\u0391",
+    0x1FBB: "\u0391",
+    0x1FBC: "\u0391",
+    0x1FBE: "\u03b9",
+    0x1FC1: "\xa8",
+    0x1FC2: "\u03b7",
+    0x1FC3: "\u03b7",
+    0x1FC4: "\u03b7",
+    0x1FC6: "\u03b7",
+    0x1FC7: "\u03b7",
+    0x1FC8: "\u0395",
+    0x1FC9: "\u0395",
+    0x1FCA: "\u0397",
+    0x1FCB: "\u0397",
+    0x1FCC: "\u0397",
+    0x1FCD: "\u1fbf",
+    0x1FCE: "\u1fbf",
+    0x1FCF: "\u1fbf",
+    0x1FD0: "\u03b9",
+    0x1FD1: "\u03b9",
+    0x1FD2: "\u03b9",
+    0x1FD3: "\u03b9",
+    0x1FD6: "\u03b9",
+    0x1FD7: "\u03b9",
+    0x1FD8: "\u0399",
+    0x1FD9: "\u0399",
+    0x1FDA: "\u0399",
+    0x1FDB: "\u0399",
+    0x1FDD: "\u1ffe",
+    0x1FDE: "\u1ffe",
+    0x1FDF: "\u1ffe",
+    0x1FE0: "\u03c5",
+    0x1FE1: "\u03c5",
+    0x1FE2: "\u03c5",
+    0x1FE3: "\u03c5",
+    0x1FE4: "\u03c1",
+    0x1FE5: "\u03c1",
+    0x1FE6: "\u03c5",
+    0x1FE7: "\u03c5",
+    0x1FE8: "\u03a5",
+    0x1FE9: "\u03a5",
+    0x1FEA: "\u03a5",
+    0x1FEB: "\u03a5",
+    0x1FEC: "\u03a1",
+    0x1FED: "\xa8",
+    0x1FEE: "\xa8",
+    0x1FEF: "`",
+    0x1FF2: "\u03c9",
+    0x1FF3: "\u03c9",
+    0x1FF4: "\u03c9",
+    0x1FF6: "\u03c9",
+    0x1FF7: "\u03c9",
+    0x1FF8: "\u039f",
+    0x1FF9: "\u039f",
+    0x1FFA: "\u03a9",
+    0x1FFB: "\u03a9",
+    0x1FFC: "\u03a9",
+    0x1FFD: "\xb4",
+    0x2000: "\u2002",
+    0x2001: "\u2003",
+    0x2126: "\u03a9",
+    0x212A: "K",
+    0x212B: "A",
+    0x219A: "\u2190",
+    0x219B: "\u2192",
+    0x21AE: "\u2194",
+    0x21CD: "\u21d0",
+    0x21CE: "\u21d4",
+    0x21CF: "\u21d2",
+    0x2204: "\u2203",
+    0x2209: "\u2208",
+    0x220C: "\u220b",
+    0x2224: "\u2223",
+    0x2226: "\u2225",
+    0x2241: "\u223c",
+    0x2244: "\u2243",
+    0x2247: "\u2245",
+    0x2249: "\u2248",
+    0x2260: "=",
+    0x2262: "\u2261",
+    0x226D: "\u224d",
+    0x226E: "<",
+    0x226F: ">",
+    0x2270: "\u2264",
+    0x2271: "\u2265",
+    0x2274: "\u2272",
+    0x2275: "\u2273",
+    0x2278: "\u2276",
+    0x2279: "\u2277",
+    0x2280: "\u227a",
+    0x2281: "\u227b",
+    0x2284: "\u2282",
+    0x2285: "\u2283",
+    0x2288: "\u2286",
+    0x2289: "\u2287",
+    0x22AC: "\u22a2",
+    0x22AD: "\u22a8",
+    0x22AE: "\u22a9",
+    0x22AF: "\u22ab",
+    0x22E0: "\u227c",
+    0x22E1: "\u227d",
+    0x22E2: "\u2291",
+    0x22E3: "\u2292",
+    0x22EA: "\u22b2",
+    0x22EB: "\u22b3",
+    0x22EC: "\u22b4",
+    0x22ED: "\u22b5",
+    0x2329: "\u3008",
+    0x232A: "\u3009",
+}
+
+## greek characters kept by cltk's filter_non_greek
+GREEK_CHARS = (
+    "\u0370\u0371\u0372\u0373\u0374\u0375\u0376\u0377"
+    "\u0384\u0385\u0386\u0387\u0388\u0389\u038a\u038c"
+    "\u038e\u038f\u0390\u0391\u0392\u0393\u0394\u0395"
+    "\u0396\u0397\u0398\u0399\u039a\u039b\u039c\u039d"
+    "\u039e\u039f\u03a0\u03a1\u03a3\u03a4\u03a5\u03a6"
+    "\u03a7\u03a8\u03a9\u03aa\u03ab\u03ac\u03ad\u03ae"
+    "\u03af\u03b0\u03b1\u03b2\u03b3\u03b4\u03b5\u03b6"
+    "\u03b7\u03b8\u03b9\u03ba\u03bb\u03bc\u03bd\u03be"
+    "\u03bf\u03c0\u03c1\u03c2\u03c3\u03c4\u03c5\u03c6"
+    "\u03c7\u03c8\u03c9\u03ca\u03cb\u03cc\u03cd\u03ce"
+    "\u03d8\u03d9\u03da\u03db\u03dc\u03dd\u03de\u03df"
+    "\u03e0\u03e1\u03f6\u03f7\u03f8\u03fb\u1f00\u1f01"
+    "\u1f02\u1f03\u1f04\u1f05\u1f06\u1f07\u1f08\u1f09"
+    "\u1f0a\u1f0b\u1f0c\u1f0d\u1f0e\u1f0f\u1f10\u1f11"
+    "\u1f12\u1f13\u1f14\u1f15\u1f18\u1f19\u1f1a\u1f1b"
+    "\u1f1c\u1f1d\u1f20\u1f21\u1f22\u1f23\u1f24\u1f25"
+    "\u1f26\u1f27\u1f28\u1f29\u1f2a\u1f2b\u1f2c\u1f2d"
+    "\u1f2e\u1f2f\u1f30\u1f31\u1f32\u1f33\u1f34\u1f35"
+    "\u1f36\u1f37\u1f38\u1f39\u1f3a\u1f3b\u1f3c\u1f3d"
+    "\u1f3e\u1f3f\u1f40\u1f41\u1f42\u1f43\u1f44\u1f45"
+    "\u1f48\u1f49\u1f4a\u1f4b\u1f4d\u1f50\u1f51\u1f52"
+    "\u1f53\u1f54\u1f55\u1f56\u1f57\u1f59\u1f5b\u1f5d"
+    "\u1f5f\u1f60\u1f61\u1f62\u1f63\u1f64\u1f65\u1f66"
+    "\u1f67\u1f68\u1f69\u1f6a\u1f6b\u1f6c\u1f6d\u1f6e"
+    "\u1f6f\u1f70\u1f72\u1f74\u1f76\u1f78\u1f7a\u1f7c"
+    "\u1f80\u1f81\u1f82\u1f83\u1f84\u1f85\u1f86\u1f87"
+    "\u1f88\u1f89\u1f8a\u1f8b\u1f8c\u1f8d\u1f8e\u1f8f"
+    "\u1f90\u1f91\u1f92\u1f93\u1f94\u1f95\u1f96\u1f97"
+    "\u1f98\u1f99\u1f9a\u1f9b\u1f9c\u1f9d\u1f9e\u1f9f"
+    "\u1fa0\u1fa1\u1fa2\u1fa3\u1fa4\u1fa5\u1fa6\u1fa7"
+    "\u1fa8\u1fa9\u1faa\u1fab\u1fac\u1fad\u1fae\u1faf"
+    "\u1fb0\u1fb1\u1fb2\u1fb3\u1fb4\u1fb6\u1fb7\u1fb8"
+    "\u1fb9\u1fba\u1fbc\u1fbd\u1fbe\u1fbf\u1fc0\u1fc1"
+    "\u1fc2\u1fc3\u1fc4\u1fc6\u1fc7\u1fc8\u1fca\u1fcc"
+    "\u1fcd\u1fce\u1fcf\u1fd0\u1fd1\u1fd6\u1fd8\u1fd9"
+    "\u1fda\u1fdd\u1fde\u1fdf\u1fe0\u1fe1\u1fe4\u1fe5"
+    "\u1fe6\u1fe8\u1fe9\u1fea\u1fec\u1fed\u1fee\u1fef"
+    "\u1ff2\u1ff3\u1ff4\u1ff6\u1ff7\u1ff8\u1ffa\u1ffc"
+    "\u1ffd\u1ffe"
+)
+
+## greek stop words of cltk
+STOP_WORDS = [
+    "\u03b1\u1f50\u03c4\u1f78\u03c2",
+    "\u03b1\u1f50\u03c4\u1f79\u03c2",
+    "\u03b3\u03b5",
+    "\u03b3\u1f70\u03c1",
+    "\u03b3\u1f71\u03c1",
+    "\u03b4'",
+    "\u03b4\u03b1\u1f76",
+    "\u03b4\u03b1\u1f76\u03c2",
+    "\u03b4\u03b1\u1f77",
+    "\u03b4\u03b1\u1f77\u03c2",
+    "\u03b4\u03b9\u1f70",
+    "\u03b4\u03b9\u1f71",
+    "\u03b4\u1f72",
+    "\u03b4\u1f73",
+    "\u03b4\u1f74",
+    "\u03b4\u1f75",
+    "\u03b5\u1f30",
+    "\u03b5\u1f30\u03bc\u1f76",
+    "\u03b5\u1f30\u03bc\u1f77",
+    "\u03b5\u1f30\u03c2",
+    "\u03b5\u1f34\u03bc\u03b9",
+    "\u03ba\u03b1\u03c4\u1f70",
+    "\u03ba\u03b1\u03c4\u1f71",
+    "\u03ba\u03b1\u1f76",
+    "\u03ba\u03b1\u1f77",
+    "\u03bc\u03b5\u03c4\u1f70",
+    "\u03bc\u03b5\u03c4\u1f71",
+    "\u03bc\u1f72\u03bd",
+    "\u03bc\u1f73\u03bd",
+    "\u03bc\u1f74",
+    "\u03bc\u1f75",
+    "\u03be\u03cd\u03bd",
+    "\u03be\u1f7a\u03bd",
+    "\u03bf\u1f31",
+    "\u03bf\u1f50",
+    "\u03bf\u1f50\u03b4\u03b5\u1f76\u03c2",
+    "\u03bf\u1f50\u03b4\u03b5\u1f77\u03c2",
+    "\u03bf\u1f50\u03b4\u1f72",
+    "\u03bf\u1f50\u03b4\u1f73",
+    "\u03bf\u1f50\u03ba",
+    "\u03bf\u1f54\u03c4\u03b5",
+    "\u03bf\u1f55\u03c4\u03c9\u03c2",
+    "\u03bf\u1f56\u03bd",
+    "\u03bf\u1f57\u03c4\u03bf\u03c2",
+    "\u03c0\u03b1\u03c1\u1f70",
+    "\u03c0\u03b1\u03c1\u1f71",
+    "\u03c0\u03b5\u03c1\u1f76",
+    "\u03c0\u03b5\u03c1\u1f77",
+    "\u03c0\u03c1\u1f78\u03c2",
+    "\u03c0\u03c1\u1f79\u03c2",
+    "\u03c3\u03cd\u03bd",
+    "\u03c3\u1f78\u03c2",
+    "\u03c3\u1f79\u03c2",
+    "\u03c3\u1f7a",
+    "\u03c3\u1f7a\u03bd",
+    "\u03c3\u1f7b",
+    "\u03c3\u1f7b\u03bd",
+    "\u03c4\u03b5",
+    "\u03c4\u03b9",
+    "\u03c4\u03b9\u03c2",
+    "\u03c4\u03bf\u03b9\u03bf\u1fe6\u03c4\u03bf\u03c2",
+    "\u03c4\u03bf\u1f76",
+    "\u03c4\u03bf\u1f77",
+    "\u03c4\u03bf\u1f7a\u03c2",
+    "\u03c4\u03bf\u1f7b\u03c2",
+    "\u03c4\u03bf\u1fd6\u03c2",
+    "\u03c4\u03bf\u1fe6",
+    "\u03c4\u1f70",
+    "\u03c4\u1f71",
+    "\u03c4\u1f74\u03bd",
+    "\u03c4\u1f75\u03bd",
+    "\u03c4\u1f76",
+    "\u03c4\u1f76\u03c2",
+    "\u03c4\u1f77",
+    "\u03c4\u1f77\u03c2",
+    "\u03c4\u1f78",
+    "\u03c4\u1f78\u03bd",
+    "\u03c4\u1f79",
+    "\u03c4\u1f79\u03bd",
+    "\u03c4\u1fb6\u03c2",
+    "\u03c4\u1fc6\u03c2",
+    "\u03c4\u1fc7",
+    "\u03c4\u1ff6\u03bd",
+    "\u03c4\u1ff7",
+    "\u1f00\u03bb\u03bb'",
+    "\u1f00\u03bb\u03bb\u1f70",
+    "\u1f00\u03bb\u03bb\u1f71",
+    "\u1f00\u03c0\u1f78",
+    "\u1f00\u03c0\u1f79",
+    "\u1f02\u03bd",
+    "\u1f04\u03bb\u03bb\u03bf\u03c2",
+    "\u1f04\u03bd",
+    "\u1f04\u03c1\u03b1",
+    "\u1f10\u03b3\u1f7c",
+    "\u1f10\u03b3\u1f7d",
+    "\u1f10\u03ba",
+    "\u1f10\u03bc\u1f78\u03c2",
+    "\u1f10\u03bc\u1f79\u03c2",
+    "\u1f10\u03bd",
+    "\u1f10\u03be",
+    "\u1f10\u03c0\u1f76",
+    "\u1f10\u03c0\u1f77",
+    "\u1f10\u1f70\u03bd",
+    "\u1f10\u1f71\u03bd",
+    "\u1f11\u03b1\u03c5\u03c4\u03bf\u1fe6",
+    "\u1f14\u03c4\u03b9",
+    "\u1f21",
+    "\u1f22",
+    "\u1f24",
+    "\u1f41",
+    "\u1f43\u03b4\u03b5",
+    "\u1f43\u03c2",
+    "\u1f45\u03b4\u03b5",
+    "\u1f45\u03c2",
+    "\u1f45\u03c3\u03c4\u03b9\u03c2",
+    "\u1f45\u03c4\u03b9",
+    "\u1f51\u03bc\u1f78\u03c2",
+    "\u1f51\u03bc\u1f79\u03c2",
+    "\u1f51\u03c0\u1f72\u03c1",
+    "\u1f51\u03c0\u1f73\u03c1",
+    "\u1f51\u03c0\u1f78",
+    "\u1f51\u03c0\u1f79",
+    "\u1f61\u03c2",
+    "\u1f65\u03c3\u03c4\u03b5",
+    "\u1f66",
+]
@@ -0,0 +1,341 @@
+"""!
+\file termindex.py
+
+Term dictionary over the term info database
+"""
+# term dictionary with exact, prefix, substring, wildcard and fuzzy lookups
+
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+import bisect
+
+from agsearch.fragments import Segment
+from agsearch.fragments import length_range
+from agsearch.fragments import parse_wildcard
+from agsearch.fragments import wildcard_regex
+from agsearch.fuzzy import FUZZY_DISTANCE
+from agsearch.fuzzy import FUZZY_DOWN_WEIGHT
+from agsearch.fuzzy import FuzzyIndex
+from agsearch.fuzzy import variant_weight
+
+# numpy is only imported when postings are read as arrays, so that tools
+# that do not search start fast
+if TYPE_CHECKING:
+    import numpy as np
+
+    from agsearch.postings import PostingArrays
+
+MATCH_MODES = ["exact", "prefix", "substring", "wildcard", "fuzzy"]
+
+
+class TermIndex:
+    """!
+    \brief term dictionary built from term info database
+
+    Exact lookups go through the hash index of the underlying dictionary.
+    Prefix lookups use a sorted list of terms, and substring lookups use a
+    character n-gram index which is built on first use. Wildcard lookups
+    use both to find candidate terms, see wildcard_terms(). Fuzzy lookups
+    find orthographic variants with a symmetric delete index, also built on
+    first use, see fuzzy.py.
+    """
+
+    def __init__(self, term_db: dict, ngram_size: int = 3):
+        """!
+        \brief constructor for term index
+
+        \param term_db compact or binary index, term to {doc_id: count}
+        mapping that also gives postings as arrays, see CompactIndex
+        \param ngram_size size of the character n-grams for substring search
+        """
+        ## term to doc id count mapping
+        self.postings = term_db
+
+        ## terms of the database in lexicographic order
+        self.sorted_terms: List[str] = sorted(term_db.keys())
+
+        ## size of character n-grams
+        self.ngram_size = ngram_size
+
+        ## n-gram to terms mapping, built lazily
+        self.ngrams: Optional[Dict[str, Set[str]]] = None
+
+        ## terms that are shorter than n-gram size
+        self.short_terms: List[str] = []
+
+        ## orthographic variant index, built lazily
+        self.fuzzy: Optional[FuzzyIndex] = None
+
+        ## last aligned document id list and position per document number,
+        ## see align()
+        self.alignment: Optional[Tuple[List[str], "np.ndarray"]] = None
+
+    def __len__(self) -> int:
+        return len(self.postings)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self.postings
+
+    def get(self, term: str) -> Optional[dict]:
+        """!
+        \brief exact lookup of a term
+
+        \return doc id count dictionary or None if term is not found
+        """
+        return self.postings.get(term, None)
+
+    def term_ngrams(self, term: str) -> Set[str]:
+        """!
+        \brief obtain character n-grams of term
+        """
+        n = self.ngram_size
+        return set(term[i : i + n] for i in range(len(term) - n + 1))
+
+    def build_ngrams(self) -> None:
+        """!
+        \brief build character n-gram index over terms
+        """
+        ngrams: Dict[str, Set[str]] = {}
+        short_terms: List[str] = []
+        for term in self.sorted_terms:
+            if len(term) < self.ngram_size:
+                short_terms.append(term)
+                continue
+            for gram in self.term_ngrams(term):
+                if gram in ngrams:
+                    ngrams[gram].add(term)
+                else:
+                    ngrams[gram] = set([term])
+        self.ngrams = ngrams
+        self.short_terms = short_terms
+
+    def prefix_terms(self, prefix: str) -> List[str]:
+        """!
+        \brief obtain terms starting with prefix
+
+        We use binary search on sorted terms, so the cost depends on the
+        number of matching terms and not on vocabulary size. An empty prefix
+        matches nothing.
+        """
+        terms: List[str] = []
+        if not prefix:
+            return terms
+        start = bisect.bisect_left(self.sorted_terms, prefix)
+        for i in range(start, len(self.sorted_terms)):
+            term = self.sorted_terms[i]
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def substring_terms(self, fragment: str) -> List[str]:
+        """!
+        \brief obtain terms containing fragment
+
+        For fragments at least as long as n-gram size we intersect the term
+        sets of each n-gram of the fragment and verify candidates. Shorter
+        fragments are matched against n-gram keys instead of terms. An empty
+        fragment matches nothing.
+        """
+        if not fragment:
+            return []
+        if self.ngrams is None:
+            self.build_ngrams()
+        candidates: Set[str] = set()
+        if len(fragment) < self.ngram_size:
+            for gram, gram_terms in self.ngrams.items():
+                if fragment in gram:
+                    candidates.update(gram_terms)
+            candidates.update(t for t in self.short_terms if fragment in t)
+        else:
+            grams = sorted(
+                self.term_ngrams(fragment), key=lambda g: len(self.ngrams.get(g, ()))
+            )
+            for i, gram in enumerate(grams):
+                gram_terms = self.ngrams.get(gram, None)
+                if gram_terms is None:
+                    return []
+                if i == 0:
+                    candidates = set(gram_terms)
+                else:
+                    candidates.intersection_update(gram_terms)
+                if not candidates:
+                    return []
+        return sorted(t for t in candidates if fragment in t)
+
+    def segment_candidates(self, segments: List[Segment]) -> Optional[Set[str]]:
+        """!
+        \brief obtain terms that may match wildcard segments
+
+        Letters of at least n-gram size are looked up in the n-gram index,
+        starting with the rarest n-gram. Otherwise leading letters are
+        looked up as a prefix, and other letters as a substring.
+
+        \return None if segments have no letters
+        """
+        literals = [s for s in segments if isinstance(s, str)]
+        grams: Set[str] = set()
+        for literal in literals:
+            if len(literal) >= self.ngram_size:
+                grams.update(self.term_ngrams(literal))
+        if grams:
+            if self.ngrams is None:
+                self.build_ngrams()
+            candidates: Set[str] = set()
+            for i, gram in enumerate(
+                sorted(grams, key=lambda g: len(self.ngrams.get(g, ())))
+            ):
+                gram_terms = self.ngrams.get(gram, None)
+                if gram_terms is None:
+                    return set()
+                if i == 0:
+                    candidates = set(gram_terms)
+                else:
+                    candidates.intersection_update(gram_terms)
+                if not candidates:
+                    break
+            return candidates
+        if isinstance(segments[0], str):
+            return set(self.prefix_terms(segments[0]))
+        if literals:
+            return set(self.substring_terms(max(literals, key=len)))
+        return None
+
+    def wildcard_terms(self, pattern: str) -> List[str]:
+        """!
+        \brief obtain terms matching a wildcard pattern
+
+        \param pattern letters with ? for one letter, ?{m,n} for m to n
+        letters and * for any number of letters, see fragments.py
+
+        Candidate terms come from the prefix or n-gram indexes, and only
+        they are checked against the pattern, so the whole vocabulary is
+        scanned only for patterns without letters.
+        """
+        segments = parse_wildcard(pattern)
+        if not segments:
+            return []
+        if len(segments) == 1 and isinstance(segments[0], str):
+            return [pattern] if pattern in self.postings else []
+        candidates = self.segment_candidates(segments)
+        if candidates is None:
+            candidates = set(self.sorted_terms)
+        least, most = length_range(segments)
+        regex = wildcard_regex(segments)
+        return sorted(
+            t
+            for t in candidates
+            if least <= len(t)
+            and (most is None or len(t) <= most)
+            and regex.fullmatch(t) is not None
+        )
+
+    def fuzzy_terms(
+        self, term: str, max_distance: float = FUZZY_DISTANCE
+    ) -> List[Tuple[str, float]]:
+        """!
+        \brief obtain orthographic variants of term with their distance
+
+        \param max_distance largest weighted edit distance of variants, see
+        fuzzy.weighted_distance()
+        """
+        if self.fuzzy is None:
+            self.fuzzy = FuzzyIndex(self.sorted_terms)
+        return self.fuzzy.lookup(term, max_distance)
+
+    def expand(
+        self, term: str, mode: str = "exact", max_distance: float = FUZZY_DISTANCE
+    ) -> List[Tuple[str, float]]:
+        """!
+        \brief obtain terms matching the given term with their distance
+
+        Distance is zero except for fuzzy matching.
+        """
+        if mode == "fuzzy":
+            return self.fuzzy_terms(term, max_distance)
+        return [(t, 0.0) for t in self.match(term, mode)]
+
+    def match(
+        self, term: str, mode: str = "exact", max_distance: float = FUZZY_DISTANCE
+    ) -> List[str]:
+        """!
+        \brief obtain terms matching the given term with respect to mode
+
+        \param term query term
+        \param mode one of exact, prefix, substring, wildcard, fuzzy
+        \param max_distance largest distance of fuzzy matches
+        """
+        if mode == "exact":
+            return [term] if term in self.postings else []
+        elif mode == "prefix":
+            return self.prefix_terms(term)
+        elif mode == "substring":
+            return self.substring_terms(term)
+        elif mode == "wildcard":
+            return self.wildcard_terms(term)
+        elif mode == "fuzzy":
+            return [t for t, _ in self.fuzzy_terms(term, max_distance)]
+        else:
+            raise ValueError("Unknown match mode: " + str(mode))
+
+    @property
+    def doc_ids(self) -> List[str]:
+        "Interned document ids, position is the document number"
+        return self.postings.doc_ids
+
+    def arrays(
+        self, term: str, mode: str = "exact", max_distance: float = FUZZY_DISTANCE
+    ) -> "PostingArrays":
+        """!
+        \brief obtain document numbers and counts of terms matching term
+
+        Counts of every matching term are summed per document.
+        """
+        from agsearch.postings import merge_arrays
+
+        matches = self.match(term, mode, max_distance)
+        return merge_arrays([self.postings.arrays(t) for t in matches])
+
+    def weighted_arrays(
+        self,
+        term: str,
+        mode: str = "exact",
+        max_distance: float = FUZZY_DISTANCE,
+        down_weight: float = FUZZY_DOWN_WEIGHT,
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """!
+        \brief obtain document numbers and weighted counts of terms matching
+        term
+
+        Counts of fuzzy matches are multiplied by the weight of their
+        distance, see fuzzy.variant_weight(), before being summed per
+        document. Other matches have weight 1.
+
+        \return document numbers and float64 counts
+        """
+        from agsearch.postings import merge_weighted_arrays
+
+        matches = self.expand(term, mode, max_distance)
+        return merge_weighted_arrays(
+            [self.postings.arrays(t) for t, _ in matches],
+            [variant_weight(d, down_weight) for _, d in matches],
+        )
+
+    def align(self, doc_ids: List[str]) -> "np.ndarray":
+        """!
+        \brief map document numbers of the index to positions in doc_ids
+
+        Documents that are not in doc_ids are mapped to -1. The mapping is
+        kept as long as the same list is passed.
+        """
+        import numpy as np
+
+        if self.alignment is not None and self.alignment[0] is doc_ids:
+            return self.alignment[1]
+        positions = {d: i for i, d in enumerate(doc_ids)}
+        aligned = np.fromiter(
+            (positions.get(d, -1) for d in self.doc_ids),
+            dtype=np.int64,
+            count=len(self.doc_ids),
+        )
+        self.alignment = (doc_ids, aligned)
+        return aligned
@@ -1,21 +1,27 @@
 """!
-\file terminfo.py 
+\file terminfo.py
 
 Term info database member
 """
 # term info object
 
-from typing import Dict, Tuple
+from typing import Dict, Tuple, Optional
 
 from agsearch.utils import update_term_info_db
 from agsearch.utils import get_term_info
+from agsearch.termindex import TermIndex
 
 
 class TermInfo:
     """!
     \brief term info object
+
+    Many term infos are created per query when matching prefixes or
+    substrings, so attributes are kept in slots instead of a dictionary.
     """
 
+    __slots__ = ("term", "dcounts")
+
     def __init__(self, term: str, doc_id_counts: Dict[str, int]):
         """!
         \brief term info constructor
@@ -28,35 +34,44 @@ class TermInfo:
         self.term = term
         self.dcounts = doc_id_counts
 
-    def save(self):
+    def save(self, flush: bool = True):
         """!
         \brief save term info to term info db
 
         Updates term info database saving the current TermInfo object members
         inside
+
+        \param flush write database to disk. If false the change stays in
+        memory until utils.flush_dbs() is called.
         """
         info = {self.term: self.dcounts}
-        update_term_info_db(info=info)
+        update_term_info_db(info=info, flush=flush)
 
     @classmethod
-    def load(cls, term: str):
+    def load(cls, term: str, index: Optional[TermIndex] = None):
         """!
         \brief load term info using term as an identifier.
 
+        \param term exact term to look up
+        \param index term dictionary to use, if not given it is obtained from
+        term info database.
+
         \warning homonymic words are counted as same in this representation
         """
-        info = get_term_info(term)
+        info = get_term_info(term, index=index)
         if info is None:
-            raise KeyError("term " + term + "not found in term info database")
+            raise KeyError("term " + term + " not found in term info database")
         tinfo = TermInfo(term=term, doc_id_counts=info)
         return tinfo
 
-    def update_term_info(self, doc_id: str, term_count: int):
+    def update_term_info(self, doc_id: str, term_count: int, flush: bool = True):
         """!
         \brief update database with given information
 
         \param doc_id document identifier
         \param term_count count of this term inside document
+        \param flush write database to disk, pass false when adding many
+        postings and call utils.flush_dbs() afterwards.
         """
         self.dcounts[doc_id] = term_count
-        self.save()
+        self.save(flush=flush)
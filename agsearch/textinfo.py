@@ -14,6 +14,8 @@ class TextInfo:
     Text info database member specified by several parameters.
     """
 
+    __slots__ = ("text_id", "has_chunks", "local_path", "chunk_separator", "url")
+
     def __init__(
         self,
         text_id: str,
@@ -42,19 +44,21 @@ class TextInfo:
         """
         return "text info: id {0}, path {1}".format(self.text_id, self.local_path)
 
-    def save(self):
+    def save(self, flush: bool = True):
         """!
         \brief save text info to text info db
 
         We create a dictionary representation of the current text info member.
         Then save it to text id.
+
+        \param flush write database to disk, see utils.flush_dbs()
         """
         info = {self.text_id: {}}
         info[self.text_id]["has_chunks"] = self.has_chunks
         info[self.text_id]["local_path"] = self.local_path
         info[self.text_id]["chunk_separator"] = self.chunk_separator
         info[self.text_id]["url"] = self.url
-        update_text_info_db(info=info)
+        update_text_info_db(info=info, flush=flush)
 
     @classmethod
     def from_text_id(cls, text_id: str):
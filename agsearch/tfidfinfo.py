@@ -1,75 +1,148 @@
 # tf idf info db element
 
-from typing import List, Union, Dict
+from typing import List, Dict, Optional, Tuple
 import math
-import pdb
 
-from agsearch.terminfo import TermInfo
+import numpy as np
+
+from agsearch.fuzzy import FUZZY_DISTANCE
+from agsearch.fuzzy import FUZZY_DOWN_WEIGHT
 from agsearch.searcher import Searcher
+from agsearch.topk import max_score_top_k
 from agsearch.utils import get_text_info_db
+from agsearch.utils import get_term_index
 from agsearch.utils import add_to_tfidf_info_db
+from agsearch.utils import add_many_to_tfidf_info_db
 
 
 class TfIdfInfo(Searcher):
-    def __init__(self, terms: List[str]):
+    def __init__(
+        self,
+        terms: List[str],
+        match: str = "exact",
+        max_distance: float = FUZZY_DISTANCE,
+        down_weight: float = FUZZY_DOWN_WEIGHT,
+    ):
+        """!
+        \brief constructor for tf-idf searcher
+
+        \param match term matching mode, see TermIndex.match()
+        \param max_distance largest weighted edit distance of fuzzy matches
+        \param down_weight weight of a fuzzy match at distance 1, counts of
+        variants are multiplied by down_weight ** distance
+        """
         self.terms = terms
+        self.match = match
+        self.max_distance = max_distance
+        self.down_weight = down_weight
         self.infos = get_text_info_db()
+        self.index = get_term_index()
         self.search_results = None
 
-    def tf_idf_for_term(self, term: str) -> Union[Dict[str, float], None]:
-        try:
-            tinfo = TermInfo.load(term)
-        except KeyError:
+    def term_arrays(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """!
+        \brief obtain document numbers and tf-idf values of term
+
+        \return None if no term of the index matches term
+        """
+        doc_numbers, counts = self.matching_arrays(term)
+        if doc_numbers.shape[0] == 0:
             return None
-        #
-        term_doc_counts = len(list(tinfo.dcounts.keys()))
         total_doc_count = len(self.infos)
-        invdocFreq = math.log(total_doc_count / term_doc_counts)
-        term_tf_idf_doc: Dict[str, float] = {}
-        for text_id, term_freq in tinfo.dcounts.items():
-            term_tf_idf_doc[text_id] = invdocFreq * term_freq
-        return term_tf_idf_doc
+        invdocFreq = math.log(total_doc_count / doc_numbers.shape[0])
+        return doc_numbers, invdocFreq * counts
 
-    def get_average_score_per_term(self, tfinfos: dict) -> dict:
-        ""
-        nb_docs = len(self.infos)
-        average_score: Dict[str, float] = {}
-        for term, doc_scores in tfinfos.items():
-            average_score[term] = sum(doc_scores.values()) / nb_docs
-        return average_score
+    def matching_arrays(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """!
+        \brief obtain document numbers and counts of terms matching term
 
-    def get_average_score_per_doc(self, tfinfos: dict) -> dict:
-        ""
-        doc_scores: Dict[str, float] = {}
-        nb_terms = len(tfinfos)
-        for term, doc_score in tfinfos.items():
-            for doc_id, score in doc_score.items():
-                if doc_id in doc_scores:
-                    doc_scores[doc_id] += score / nb_terms
-                else:
-                    doc_scores[doc_id] = 0.0
-        return doc_scores
-
-    def average_infos(self, tidf_infos: dict) -> Dict[str, Dict[str, float]]:
-        per_term = self.get_average_score_per_term(tidf_infos)
-        per_doc = self.get_average_score_per_doc(tidf_infos)
-        tidf_infos["average_score_per_term"] = per_term
-        tidf_infos["average_score_per_document"] = per_doc
-        return tidf_infos
+        Counts of fuzzy matches are down weighted by their distance to term,
+        see TermIndex.weighted_arrays().
+        """
+        return self.index.weighted_arrays(
+            term,
+            mode=self.match,
+            max_distance=self.max_distance,
+            down_weight=self.down_weight,
+        )
+
+    def to_doc_dict(self, doc_numbers: np.ndarray, values: np.ndarray) -> dict:
+        "Map document numbers of the index back to document ids"
+        doc_ids = self.index.doc_ids
+        return {doc_ids[n]: v for n, v in zip(doc_numbers.tolist(), values.tolist())}
 
     def search(self):
-        ""
-        # pdb.set_trace()
+        """!
+        \brief compute tf-idf values of every query term and their averages
+
+        Postings of each term are read as arrays, and the average score per
+        document is accumulated over integer document numbers with a single
+        bincount, so the cost depends on the total length of postings rather
+        than on the number of query terms.
+        """
         tf_idf_infos: Dict[str, Dict[str, float]] = {}
-        for term in self.terms:
-            tf_idf_vals = self.tf_idf_for_term(term)
-            if tf_idf_vals is None:
+        per_term: Dict[str, float] = {}
+        found: List[Tuple[np.ndarray, np.ndarray]] = []
+        nb_docs = len(self.infos)
+        for term in dict.fromkeys(self.terms):
+            arrays = self.term_arrays(term)
+            if arrays is None:
                 continue
-            tf_idf_infos[term] = tf_idf_vals
+            tf_idf_infos[term] = self.to_doc_dict(*arrays)
+            per_term[term] = float(arrays[1].sum()) / nb_docs
+            found.append(arrays)
         #
-        tf_idf_infos = self.average_infos(tf_idf_infos)
+        per_doc: Dict[str, float] = {}
+        if found:
+            nb_terms = len(found)
+            doc_numbers = np.concatenate([d for d, _ in found])
+            values = np.concatenate([v for _, v in found]) / nb_terms
+            sums = np.bincount(
+                doc_numbers, weights=values, minlength=len(self.index.doc_ids)
+            )
+            present = np.unique(doc_numbers)
+            per_doc = self.to_doc_dict(present, sums[present])
+        tf_idf_infos["average_score_per_term"] = per_term
+        tf_idf_infos["average_score_per_document"] = per_doc
         self.search_results = tf_idf_infos
 
+    def top_k(self, k: int) -> List[Tuple[str, float]]:
+        """!
+        \brief obtain k documents with the highest average tf-idf score
+
+        The score of a document is the sum of tf-idf values of query terms
+        divided by the number of query terms found in the index. Each term
+        contributes at most idf * max term frequency, which lets MaxScore
+        skip documents that cannot enter the top k.
+        """
+        term_arrays: List[Tuple[np.ndarray, np.ndarray]] = []
+        for term in dict.fromkeys(self.terms):
+            doc_numbers, counts = self.matching_arrays(term)
+            if doc_numbers.shape[0] > 0:
+                term_arrays.append((doc_numbers, counts))
+        #
+        nb_terms = len(term_arrays)
+        total_doc_count = len(self.infos)
+        postings: List[List[Tuple[int, float]]] = []
+        upper_bounds: List[float] = []
+        for doc_numbers, counts in term_arrays:
+            invdocFreq = math.log(total_doc_count / doc_numbers.shape[0])
+            weight = invdocFreq / nb_terms
+            weights = weight * counts
+            postings.append(list(zip(doc_numbers.tolist(), weights.tolist())))
+            upper_bounds.append(weight * float(counts.max()))
+        doc_ids = self.index.doc_ids
+        return [(doc_ids[n], s) for n, s in max_score_top_k(postings, upper_bounds, k)]
+
+    def result_info(self) -> dict:
+        ""
+        return self.search_results
+
     def save_results(self):
         # pdb.set_trace()
-        add_to_tfidf_info_db(self.search_results)
+        add_to_tfidf_info_db(self.result_info())
+
+    @classmethod
+    def save_many_results(cls, infos: List[dict]) -> None:
+        ""
+        add_many_to_tfidf_info_db(infos)
@@ -0,0 +1,338 @@
+"""!
+\file tfidfmodel.py
+
+Persisted tf-idf model for similarity search
+"""
+# fitted vocabulary, idf vector and sparse document matrix
+
+from typing import Dict, List, Optional, Set
+import os
+import re
+
+import numpy as np
+from scipy import sparse
+
+from agsearch.utils import DATA_DIR
+from agsearch.store import JsonStore
+from agsearch.safeio import atomic_open
+from agsearch.greekprocessing import clean_greek_text
+from agsearch.profiling import PROFILER
+
+## same token pattern as scikit-learn vectorizers
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+
+class TfIdfModel:
+    """!
+    \brief tf-idf model of the corpus that can be saved and updated
+
+    We keep raw term counts of documents in a sparse matrix together with
+    document frequencies. Idf weights follow scikit-learn's smoothed idf and
+    document vectors are l2 normalized, so scores are the same cosine
+    similarities TfidfVectorizer would give for a fixed vocabulary. Since raw
+    counts are kept, adding documents only requires processing new texts.
+    """
+
+    def __init__(
+        self,
+        vocabulary: Dict[str, int],
+        doc_ids: List[str],
+        counts: sparse.csr_matrix,
+    ):
+        """!
+        \brief constructor for tf-idf model
+
+        \param vocabulary term to column index mapping
+        \param doc_ids document identifiers in row order
+        \param counts document term count matrix
+        """
+        ## term to column index
+        self.vocabulary = vocabulary
+
+        ## document identifier per row
+        self.doc_ids = doc_ids
+
+        ## document identifier to row
+        self.doc_positions: Dict[str, int] = {d: i for i, d in enumerate(doc_ids)}
+
+        ## raw term counts, documents x terms
+        self.counts = counts.tocsr()
+
+        ## number of documents containing each term
+        self.doc_freqs: np.ndarray = np.zeros(0)
+
+        ## smoothed inverse document frequencies
+        self.idf: np.ndarray = np.zeros(0)
+
+        ## l2 norms of tf-idf weighted document vectors
+        self.norms: np.ndarray = np.zeros(0)
+        self.compute_weights()
+
+    @staticmethod
+    def analyze(text: str) -> List[str]:
+        """!
+        \brief clean text and split it into tokens
+        """
+        return TOKEN_PATTERN.findall(clean_greek_text(text))
+
+    @staticmethod
+    def read_text_info(info: dict) -> str:
+        """!
+        \brief read text pointed by text info dictionary
+        """
+        path = os.path.join(DATA_DIR, info["local_path"])
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def compute_weights(self) -> None:
+        """!
+        \brief compute document frequencies, idf and document norms from counts
+        """
+        nb_docs = self.counts.shape[0]
+        self.doc_freqs = np.bincount(
+            self.counts.indices, minlength=self.counts.shape[1]
+        ).astype(np.float64)
+        self.idf = np.log((1.0 + nb_docs) / (1.0 + self.doc_freqs)) + 1.0
+        squares = self.counts.multiply(self.counts)
+        self.norms = np.sqrt(squares @ (self.idf**2))
+
+    def count_rows(self, texts: List[str]) -> sparse.csr_matrix:
+        """!
+        \brief obtain term count rows of texts, extending vocabulary
+        """
+        indptr = [0]
+        indices: List[int] = []
+        data: List[int] = []
+        for text in texts:
+            row: Dict[int, int] = {}
+            for token in self.analyze(text):
+                col = self.vocabulary.get(token, None)
+                if col is None:
+                    col = len(self.vocabulary)
+                    self.vocabulary[token] = col
+                row[col] = row.get(col, 0) + 1
+            indices.extend(row.keys())
+            data.extend(row.values())
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (data, indices, indptr),
+            shape=(len(texts), len(self.vocabulary)),
+            dtype=np.float64,
+        )
+
+    @PROFILER.timed("tfidf_model.fit")
+    def add_documents(self, texts: Dict[str, str]) -> None:
+        """!
+        \brief add new documents to the model
+
+        \param texts document identifier to text mapping. Documents that are
+        already in the model are ignored.
+        """
+        new_ids = [d for d in texts.keys() if d not in self.doc_positions]
+        if not new_ids:
+            return
+        rows = self.count_rows([texts[d] for d in new_ids])
+        counts = self.counts
+        counts.resize((counts.shape[0], len(self.vocabulary)))
+        self.counts = sparse.vstack([counts, rows], format="csr")
+        for doc_id in new_ids:
+            self.doc_positions[doc_id] = len(self.doc_ids)
+            self.doc_ids.append(doc_id)
+        self.compute_weights()
+
+    @PROFILER.timed("tfidf_model.remove")
+    def remove_documents(self, doc_ids: Set[str]) -> bool:
+        """!
+        \brief remove documents from the model
+
+        Terms that no longer appear in any document stay in vocabulary.
+
+        \return whether the model has changed
+        """
+        keep = [i for i, d in enumerate(self.doc_ids) if d not in doc_ids]
+        if len(keep) == len(self.doc_ids):
+            return False
+        self.counts = self.counts[keep]
+        self.doc_ids = [self.doc_ids[i] for i in keep]
+        self.doc_positions = {d: i for i, d in enumerate(self.doc_ids)}
+        self.compute_weights()
+        return True
+
+    def copy(self):
+        """!
+        \brief obtain a copy of the model that can be updated independently
+        """
+        return TfIdfModel(
+            vocabulary=dict(self.vocabulary),
+            doc_ids=list(self.doc_ids),
+            counts=self.counts.copy(),
+        )
+
+    @PROFILER.timed("tfidf_model.transform")
+    def transform(self, text: str) -> np.ndarray:
+        """!
+        \brief obtain l2 normalized tf-idf vector of text
+
+        Terms that are not in vocabulary are ignored.
+        """
+        vec = np.zeros(len(self.vocabulary), dtype=np.float64)
+        for token in self.analyze(text):
+            col = self.vocabulary.get(token, None)
+            if col is not None:
+                vec[col] += 1.0
+        vec *= self.idf
+        norm = np.linalg.norm(vec)
+        if norm > 0:
+            vec /= norm
+        return vec
+
+    @PROFILER.timed("tfidf_model.transform")
+    def transform_many(self, texts: List[str]) -> sparse.csr_matrix:
+        """!
+        \brief obtain l2 normalized tf-idf vectors of texts as sparse rows
+        """
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        for text in texts:
+            row: Dict[int, float] = {}
+            for token in self.analyze(text):
+                col = self.vocabulary.get(token, None)
+                if col is not None:
+                    row[col] = row.get(col, 0.0) + 1.0
+            cols = np.fromiter(row.keys(), dtype=np.int64, count=len(row))
+            weights = np.fromiter(row.values(), dtype=np.float64, count=len(row))
+            weights *= self.idf[cols]
+            norm = np.linalg.norm(weights)
+            if norm > 0:
+                weights /= norm
+            indices.extend(cols.tolist())
+            data.extend(weights.tolist())
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (data, indices, indptr),
+            shape=(len(texts), len(self.vocabulary)),
+            dtype=np.float64,
+        )
+
+    @PROFILER.timed("tfidf_model.score")
+    def scores_many(self, texts: List[str]) -> np.ndarray:
+        """!
+        \brief cosine similarity of many texts with every document
+
+        Queries are stacked into one sparse matrix and multiplied with the
+        document matrix at once.
+
+        \return documents x texts array
+        """
+        queries = self.transform_many(texts).multiply(self.idf).tocsr()
+        dots = (self.counts @ queries.T).toarray()
+        norms = np.where(self.norms > 0, self.norms, 1.0)
+        return dots / norms[:, np.newaxis]
+
+    @PROFILER.timed("tfidf_model.score")
+    def scores(self, text: str) -> np.ndarray:
+        """!
+        \brief cosine similarity of text with every document in row order
+
+        A single sparse matrix vector product over raw counts, normalized by
+        precomputed document norms.
+        """
+        query = self.transform(text) * self.idf
+        dots = self.counts @ query
+        norms = np.where(self.norms > 0, self.norms, 1.0)
+        return dots / norms
+
+    def save(self, path: str) -> None:
+        """!
+        \brief save model to a numpy archive
+        """
+        terms = [""] * len(self.vocabulary)
+        for term, col in self.vocabulary.items():
+            terms[col] = term
+        with atomic_open(path, "wb") as f:
+            np.savez(
+                f,
+                terms=np.array(terms, dtype=str),
+                doc_ids=np.array(self.doc_ids, dtype=str),
+                data=self.counts.data,
+                indices=self.counts.indices,
+                indptr=self.counts.indptr,
+                shape=np.array(self.counts.shape),
+                idf=self.idf,
+                norms=self.norms,
+            )
+
+    @classmethod
+    def load(cls, path: str):
+        """!
+        \brief load model from a numpy archive
+        """
+        with np.load(path, allow_pickle=False) as arch:
+            vocabulary = {str(t): i for i, t in enumerate(arch["terms"])}
+            doc_ids = [str(d) for d in arch["doc_ids"]]
+            counts = sparse.csr_matrix(
+                (arch["data"], arch["indices"], arch["indptr"]),
+                shape=tuple(arch["shape"]),
+            )
+        return TfIdfModel(vocabulary=vocabulary, doc_ids=doc_ids, counts=counts)
+
+    @classmethod
+    def from_texts(cls, texts: Dict[str, str]):
+        """!
+        \brief fit model on document identifier to text mapping
+        """
+        model = TfIdfModel(vocabulary={}, doc_ids=[], counts=sparse.csr_matrix((0, 0)))
+        model.add_documents(texts)
+        return model
+
+    def update_with_text_infos(self, infos: Dict[str, dict]) -> bool:
+        """!
+        \brief add texts of text info database that are not in model
+
+        \return whether the model has changed
+        """
+        texts = {
+            text_id: self.read_text_info(info)
+            for text_id, info in infos.items()
+            if text_id not in self.doc_positions
+        }
+        self.add_documents(texts)
+        return len(texts) > 0
+
+
+def save_tfidf_model(path: str, model: TfIdfModel) -> None:
+    model.save(path)
+
+
+## stores of loaded models per path, a model is read again only if its file
+## changes
+MODEL_STORES: Dict[str, JsonStore] = {}
+
+
+def load_tfidf_model(path: str, infos: Optional[Dict[str, dict]] = None):
+    """!
+    \brief load model from path, fitting or updating it if necessary
+
+    \param path path to the model archive
+    \param infos text info database, texts missing from model are added and
+    the model is saved.
+
+    The model is kept in memory between calls. An update is done on a copy,
+    so that searches holding the previous model are not affected.
+    """
+    store = MODEL_STORES.setdefault(
+        path, JsonStore(path, TfIdfModel.load, save_tfidf_model)
+    )
+    with store.lock:
+        if store.file_stamp() is None:
+            model = TfIdfModel.from_texts({})
+            store.set(model)
+        else:
+            model = store.load()
+        if infos is not None and any(t not in model.doc_positions for t in infos):
+            model = model.copy()
+            model.update_with_text_infos(infos)
+            store.set(model)
+        store.flush()
+    return model
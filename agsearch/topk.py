@@ -0,0 +1,88 @@
+"""!
+\file topk.py
+
+Top k retrieval over postings lists
+"""
+# MaxScore evaluation with a bounded heap
+
+from typing import Any, List, Tuple
+import bisect
+import heapq
+
+
+def max_score_top_k(
+    postings: List[List[Tuple[Any, float]]], upper_bounds: List[float], k: int
+) -> List[Tuple[Any, float]]:
+    """!
+    \brief obtain the k documents with highest summed score
+
+    \param postings for each term, (doc key, score contribution) pairs sorted
+    by doc key
+    \param upper_bounds for each term, the largest contribution in its list
+    \param k number of documents to return
+
+    MaxScore: terms are ordered by upper bound and split into essential and
+    non essential terms. A document that only appears in non essential terms
+    cannot enter the top k, so candidates are taken from essential lists only.
+    Non essential lists are probed for a candidate only while its partial
+    score plus the remaining upper bounds can still beat the current k-th
+    score. The heap never holds more than k documents.
+
+    \return (doc key, score) pairs in decreasing order of score
+    """
+    if k <= 0 or not postings:
+        return []
+    order = sorted(range(len(postings)), key=lambda i: upper_bounds[i])
+    lists = [postings[i] for i in order]
+    bounds = [upper_bounds[i] for i in order]
+    keys = [[d for d, _ in plist] for plist in lists]
+    # cumulative[i] is the sum of upper bounds of lists 0..i
+    cumulative: List[float] = []
+    total = 0.0
+    for bound in bounds:
+        total += bound
+        cumulative.append(total)
+    positions = [0] * len(lists)
+    heap: List[Tuple[float, Any]] = []
+    threshold = float("-inf")
+    first_essential = 0
+    while True:
+        # lists whose bounds sum up to at most threshold are non essential
+        while first_essential < len(lists) and cumulative[first_essential] <= threshold:
+            first_essential += 1
+        if first_essential == len(lists):
+            break
+        # next candidate is the smallest current doc of essential lists
+        candidate = None
+        for i in range(first_essential, len(lists)):
+            if positions[i] < len(lists[i]):
+                doc = lists[i][positions[i]][0]
+                if candidate is None or doc < candidate:
+                    candidate = doc
+        if candidate is None:
+            break
+        score = 0.0
+        for i in range(first_essential, len(lists)):
+            pos = positions[i]
+            if pos < len(lists[i]) and lists[i][pos][0] == candidate:
+                score += lists[i][pos][1]
+                positions[i] = pos + 1
+        # probe non essential lists from the largest bound down
+        for i in range(first_essential - 1, -1, -1):
+            if score + cumulative[i] <= threshold:
+                break
+            pos = bisect.bisect_left(keys[i], candidate, positions[i])
+            positions[i] = pos
+            if pos < len(lists[i]) and keys[i][pos] == candidate:
+                score += lists[i][pos][1]
+        #
+        if len(heap) < k:
+            heapq.heappush(heap, (score, candidate))
+            if len(heap) == k:
+                threshold = heap[0][0]
+        elif score > threshold:
+            heapq.heapreplace(heap, (score, candidate))
+            threshold = heap[0][0]
+    results = [(doc, score) for score, doc in heap]
+    results.sort(key=lambda x: (-x[1], x[0]))
+    return results
@@ -2,8 +2,26 @@
 import os
 import sys
 import json
-from typing import Union, List, Dict, Any
-import pdb
+import threading
+from typing import TYPE_CHECKING, Union, List, Dict, Any, Optional, Set, Tuple
+
+from agsearch.termindex import TermIndex
+from agsearch.store import JsonStore
+from agsearch.resultlog import ResultLog
+from agsearch.segments import SegmentLog
+from agsearch.segments import apply_segment
+from agsearch.journal import Journal
+from agsearch.safeio import atomic_open
+from agsearch.profiling import PROFILER
+from agsearch.binindex import BinaryIndex
+from agsearch.binindex import write_binary_index
+from agsearch import tables
+from agsearch.positions import PositionalIndex
+from agsearch.positions import write_positional_index
+
+# compact postings need numpy, which is imported only by searches
+if TYPE_CHECKING:
+    from agsearch.postings import CompactIndex
 
 SOURCE_DIR = os.curdir
 PROJECT_DIR = os.path.join(SOURCE_DIR, "agsearch")
@@ -16,6 +34,17 @@ TEXTINFO_DB_PATH = os.path.join(DATA_DIR, "textinfo.json")
 TERMINFO_DB_PATH = os.path.join(DATA_DIR, "terminfo.json")
 SCOREINFO_DB_PATH = os.path.join(DATA_DIR, "scoreinfo.json")
 TFIDFINFO_DB_PATH = os.path.join(DATA_DIR, "tfidfinfo.json")
+TERMINFO_BIN_PATH = os.path.join(DATA_DIR, "terminfo.bin")
+TFIDF_MODEL_PATH = os.path.join(DATA_DIR, "tfidfmodel.npz")
+DOCINFO_DB_PATH = os.path.join(DATA_DIR, "docinfo.json")
+BM25INFO_DB_PATH = os.path.join(DATA_DIR, "bm25info.json")
+SCOREINFO_LOG_PATH = os.path.join(DATA_DIR, "scoreinfo.jsonl")
+TFIDFINFO_LOG_PATH = os.path.join(DATA_DIR, "tfidfinfo.jsonl")
+BM25INFO_LOG_PATH = os.path.join(DATA_DIR, "bm25info.jsonl")
+PHRASEINFO_LOG_PATH = os.path.join(DATA_DIR, "phraseinfo.jsonl")
+POSITIONS_PATH = os.path.join(DATA_DIR, "positions.bin")
+TERMINFO_SEGMENTS_PATH = os.path.join(DATA_DIR, "terminfo.segments.json")
+DOCREGISTRY_DB_PATH = os.path.join(DATA_DIR, "docregistry.json")
 
 GREEK_PUNCTUATION = [",", ";", ":", ".", "·"]
 
@@ -30,10 +59,45 @@ def read_json(path) -> Union[dict, list]:
 
 
 def write_json(path, f: Union[dict, list]) -> None:
-    with open(path, "w", encoding="utf-8") as ff:
+    "Write database to a temporary file that replaces path, see safeio.py"
+    with atomic_open(path, "w", encoding="utf-8") as ff:
         json.dump(f, ff, ensure_ascii=False, indent=2)
 
 
+def update_dict(db: dict, info: dict) -> None:
+    "Journal operation adding or replacing database members"
+    db.update(info)
+
+
+def set_doc_lengths(doc_info: dict, change: dict) -> None:
+    "Journal operation updating document lengths and their average"
+    doc_lengths = doc_info["lengths"]
+    doc_lengths.update(change["lengths"])
+    for doc_id in change["removed"]:
+        doc_lengths.pop(doc_id, None)
+    nb_docs = len(doc_lengths)
+    average = sum(doc_lengths.values()) / nb_docs if nb_docs > 0 else 0.0
+    doc_info["average_length"] = average
+
+
+def set_generation(doc_info: dict, generation: int) -> None:
+    "Journal operation increasing index generation"
+    doc_info["generation"] = max(doc_info.get("generation", 0), generation)
+
+
+## journal operations of dictionary shaped databases
+JOURNAL_OPERATIONS = {
+    "update": update_dict,
+    "doc_lengths": set_doc_lengths,
+    "generation": set_generation,
+}
+
+
+def make_journal(path: str) -> Journal:
+    "Write ahead journal next to database at path"
+    return Journal(path + ".journal", JOURNAL_OPERATIONS)
+
+
 def is_dict(el: Union[dict, list]) -> dict:
     if isinstance(el, dict):
         return el
@@ -48,91 +112,401 @@ def is_list(el: Union[dict, list]) -> list:
         raise ValueError("it should be a dict")
 
 
+# term info database is a base file followed by delta segments, see
+# segments.py
+TERMINFO_SEGMENTS = SegmentLog(TERMINFO_SEGMENTS_PATH)
+
+
+def read_term_info(path: str) -> dict:
+    "Read term info database and apply its delta segments"
+    return TERMINFO_SEGMENTS.apply_all(is_dict(read_json(path)))
+
+
+def write_term_info(path: str, f: dict) -> None:
+    "Write whole term info database, its delta segments are no longer needed"
+    write_json(path, f)
+    TERMINFO_SEGMENTS.clear()
+
+
+TERMINFO_STORE = JsonStore(
+    TERMINFO_DB_PATH,
+    read_term_info,
+    write_term_info,
+    depends=[TERMINFO_SEGMENTS_PATH],
+    journal=make_journal(TERMINFO_DB_PATH),
+)
+
+
+def read_compact_term_info(path: str) -> "CompactIndex":
+    "Read term info database with its segments and journal as a compact index"
+    from agsearch.postings import CompactIndex
+
+    return CompactIndex(TERMINFO_STORE.read())
+
+
+def write_compact_term_info(path: str, f: "CompactIndex") -> None:
+    write_term_info(path, {term: f[term] for term in f})
+
+
+## read only view of term info database used by searches, so that processes
+## that do not update the database do not keep it as dictionaries
+TERMINFO_COMPACT_STORE = JsonStore(
+    TERMINFO_DB_PATH,
+    read_compact_term_info,
+    write_compact_term_info,
+    depends=TERMINFO_STORE.depends,
+)
+TEXTINFO_STORE = JsonStore(
+    TEXTINFO_DB_PATH, read_json, write_json, journal=make_journal(TEXTINFO_DB_PATH)
+)
+DOCINFO_STORE = JsonStore(
+    DOCINFO_DB_PATH,
+    read_json,
+    write_json,
+    default={"lengths": {}, "average_length": 0.0, "generation": 0},
+    journal=make_journal(DOCINFO_DB_PATH),
+)
+DOCREGISTRY_STORE = JsonStore(DOCREGISTRY_DB_PATH, read_json, write_json, default={})
+STORES = [
+    TERMINFO_STORE,
+    TEXTINFO_STORE,
+    DOCINFO_STORE,
+    DOCREGISTRY_STORE,
+]
+
+## held by corpus updates, so that indexing jobs run one at a time
+CORPUS_LOCK = DOCREGISTRY_STORE.file_lock
+TERMINFO_BIN_STORE = JsonStore(TERMINFO_BIN_PATH, BinaryIndex, write_binary_index)
+POSITIONS_STORE = JsonStore(POSITIONS_PATH, PositionalIndex, write_positional_index)
+
+# results databases are append only logs, created from the list shaped json
+# databases they replace
+SCOREINFO_LOG = ResultLog(SCOREINFO_LOG_PATH, legacy_path=SCOREINFO_DB_PATH)
+TFIDFINFO_LOG = ResultLog(TFIDFINFO_LOG_PATH, legacy_path=TFIDFINFO_DB_PATH)
+BM25INFO_LOG = ResultLog(BM25INFO_LOG_PATH, legacy_path=BM25INFO_DB_PATH)
+PHRASEINFO_LOG = ResultLog(PHRASEINFO_LOG_PATH)
+RESULT_LOGS = [SCOREINFO_LOG, TFIDFINFO_LOG, BM25INFO_LOG, PHRASEINFO_LOG]
+
+
+def flush_dbs() -> None:
+    "Write pending changes of every database to disk"
+    for store in STORES:
+        store.flush()
+
+
 def get_term_info_db() -> dict:
-    el = read_json(TERMINFO_DB_PATH)
+    el = TERMINFO_STORE.load()
     return is_dict(el)
 
 
 def get_text_info_db() -> dict:
-    el = read_json(TEXTINFO_DB_PATH)
+    el = TEXTINFO_STORE.load()
     return is_dict(el)
 
 
 def get_score_info_db() -> List[dict]:
-    el = read_json(SCOREINFO_DB_PATH)
-    return is_list(el)
+    return list(SCOREINFO_LOG)
 
 
 def get_tfidf_info_db() -> List[dict]:
-    el = read_json(TFIDFINFO_DB_PATH)
-    return is_list(el)
+    return list(TFIDFINFO_LOG)
+
+
+def get_doc_info_db() -> dict:
+    el = DOCINFO_STORE.load()
+    return is_dict(el)
+
+
+def get_doc_registry() -> dict:
+    el = DOCREGISTRY_STORE.load()
+    return is_dict(el)
+
+
+def get_bm25_info_db() -> List[dict]:
+    return list(BM25INFO_LOG)
+
+
+def get_phrase_info_db() -> List[dict]:
+    return list(PHRASEINFO_LOG)
+
+
+def get_positional_index() -> PositionalIndex:
+    """!
+    \brief obtain positional index, opened again only if its file changes
+
+    \throws FileNotFoundError if the positional index has not been built
+    """
+    if POSITIONS_STORE.file_stamp() is None:
+        raise FileNotFoundError(
+            "positional index not found, update corpus with positions: "
+            + POSITIONS_PATH
+        )
+    return POSITIONS_STORE.load()
 
 
-def save_term_info_db(f: dict) -> None:
-    write_json(TERMINFO_DB_PATH, f)
+def save_to_store(store: JsonStore, f: Union[dict, list], flush: bool) -> None:
+    store.set(f)
+    if flush:
+        store.flush()
 
 
-def save_text_info_db(f: dict) -> None:
-    write_json(TEXTINFO_DB_PATH, f)
+def save_term_info_db(f: dict, flush: bool = True) -> None:
+    save_to_store(TERMINFO_STORE, f, flush)
 
 
-def save_score_info_db(f: dict) -> None:
-    write_json(SCOREINFO_DB_PATH, f)
+def save_text_info_db(f: dict, flush: bool = True) -> None:
+    save_to_store(TEXTINFO_STORE, f, flush)
+
+
+def save_score_info_db(f: list) -> None:
+    SCOREINFO_LOG.rewrite(is_list(f))
 
 
 def save_tfidf_info_db(f: list) -> None:
-    write_json(TFIDFINFO_DB_PATH, f)
+    TFIDFINFO_LOG.rewrite(is_list(f))
+
+
+def save_doc_info_db(f: dict, flush: bool = True) -> None:
+    save_to_store(DOCINFO_STORE, f, flush)
+
+
+def save_doc_registry(f: dict, flush: bool = True) -> None:
+    save_to_store(DOCREGISTRY_STORE, f, flush)
+
+
+def save_bm25_info_db(f: list) -> None:
+    BM25INFO_LOG.rewrite(is_list(f))
 
 
-def update_term_info_db(info: dict) -> None:
-    term_info = get_term_info_db()
+@PROFILER.timed("db.write.terminfo.bin")
+def save_term_info_bin(f: dict) -> None:
+    "Write term info database in binary format next to the json database"
+    write_binary_index(TERMINFO_BIN_PATH, f)
+
+
+def has_term_info_bin() -> bool:
+    """!
+    \brief check whether binary term info database can be used
+
+    The binary database is used if it exists and it is not older than the
+    json database and its segments, which stay the reference for updates.
+    """
+    bin_stamp = TERMINFO_BIN_STORE.file_stamp()
+    if bin_stamp is None:
+        return False
+    if TERMINFO_STORE.dirty:
+        return False
+    for path in [TERMINFO_DB_PATH, TERMINFO_SEGMENTS_PATH]:
+        json_stamp = TERMINFO_STORE.file_stamp(path)
+        if json_stamp is not None and bin_stamp[0] < json_stamp[0]:
+            return False
+    return True
+
+
+def update_term_info_db(info: dict, flush: bool = True) -> None:
     is_dict(info)
-    term_info.update(info)
-    save_term_info_db(term_info)
+    TERMINFO_STORE.apply("update", info, flush=flush)
 
 
-def update_text_info_db(info: dict) -> None:
-    text_info = get_text_info_db()
+def update_text_info_db(info: dict, flush: bool = True) -> None:
     is_dict(info)
-    text_info.update(info)
-    save_text_info_db(text_info)
+    TEXTINFO_STORE.apply("update", info, flush=flush)
+    bump_index_generation(flush=flush)
 
 
-def add_to_text_info_db(info: dict) -> None:
+def add_to_text_info_db(info: dict, flush: bool = True) -> None:
     ""
-    text_info = get_text_info_db()
     is_dict(info)
-    ks = list(info.keys())
-    for text_id in ks:
-        if text_id in text_info:
-            raise ValueError(
-                "the textinfo database already contains the text id: " + str(text_id)
-            )
-    text_info.update(info)
-    save_text_info_db(text_info)
-
-
-def add_to_score_info_db(info: dict) -> None:
-    score_info_db = get_score_info_db()
+    with TEXTINFO_STORE.lock, TEXTINFO_STORE.file_lock:
+        text_info = get_text_info_db()
+        ks = list(info.keys())
+        for text_id in ks:
+            if text_id in text_info:
+                raise ValueError(
+                    "the textinfo database already contains the text id: "
+                    + str(text_id)
+                )
+        TEXTINFO_STORE.apply("update", info, flush=flush)
+    # similarity and tf-idf scores depend on the texts of the database
+    bump_index_generation(flush=flush)
+
+
+def add_to_score_info_db(info: dict) -> int:
+    "Append result to score info log, return its id"
+    is_dict(info)
+    return SCOREINFO_LOG.append([info])[0]
+
+
+def add_many_to_score_info_db(infos: List[dict]) -> List[int]:
+    "Append results to score info log with a single write, return their ids"
+    for info in infos:
+        is_dict(info)
+    return SCOREINFO_LOG.append(infos)
+
+
+def add_to_tfidf_info_db(info: dict) -> int:
+    "Append result to tfidf info log, return its id"
     is_dict(info)
-    score_info_db.append(info)
-    save_score_info_db(score_info_db)
+    return TFIDFINFO_LOG.append([info])[0]
+
+
+def add_many_to_tfidf_info_db(infos: List[dict]) -> List[int]:
+    "Append results to tfidf info log with a single write, return their ids"
+    for info in infos:
+        is_dict(info)
+    return TFIDFINFO_LOG.append(infos)
 
 
-def add_to_tfidf_info_db(info: dict) -> None:
-    tfidf_info_db = get_tfidf_info_db()
+def add_to_bm25_info_db(info: dict) -> int:
+    "Append result to bm25 info log, return its id"
     is_dict(info)
-    tfidf_info_db.append(info)
-    save_tfidf_info_db(tfidf_info_db)
+    return BM25INFO_LOG.append([info])[0]
 
 
-def get_term_info(term: str) -> Union[dict, None]:
-    terms = get_term_info_db()
-    retval = None
-    for tm, info in terms.items():
-        if term in tm:
-            return info
-    return retval
+def add_many_to_bm25_info_db(infos: List[dict]) -> List[int]:
+    "Append results to bm25 info log with a single write, return their ids"
+    for info in infos:
+        is_dict(info)
+    return BM25INFO_LOG.append(infos)
+
+
+def add_to_phrase_info_db(info: dict) -> int:
+    "Append result to phrase info log, return its id"
+    is_dict(info)
+    return PHRASEINFO_LOG.append([info])[0]
+
+
+def add_many_to_phrase_info_db(infos: List[dict]) -> List[int]:
+    "Append results to phrase info log with a single write, return their ids"
+    for info in infos:
+        is_dict(info)
+    return PHRASEINFO_LOG.append(infos)
+
+
+def update_doc_lengths(
+    lengths: Dict[str, int], removed: Optional[Set[str]] = None, flush: bool = True
+) -> None:
+    """!
+    \brief add document lengths to doc info database
+
+    Document length is the number of terms of the document after
+    preprocessing. Average length is recomputed over all documents.
+
+    \param removed ids of documents removed from the index
+    """
+    change = {"lengths": lengths, "removed": sorted(removed or [])}
+    DOCINFO_STORE.apply("doc_lengths", change, flush=flush)
+
+
+## held while term info segments are written or merged
+TERMINFO_MERGE_LOCK = threading.Lock()
+
+
+@PROFILER.timed("db.add_segment")
+def add_term_info_segment(
+    removed: Dict[str, List[str]], postings: Dict[str, Dict[str, int]]
+) -> None:
+    """!
+    \brief write changes of term info database as a delta segment
+
+    Only the postings of the changed documents are written, the in memory
+    database is updated without reading the files again.
+
+    \param removed doc id to its terms, for documents that are changed or
+    deleted
+    \param postings term counts of documents that are added or changed
+    """
+    with TERMINFO_MERGE_LOCK, TERMINFO_STORE.lock, TERMINFO_STORE.file_lock:
+        term_db = get_term_info_db()
+        TERMINFO_SEGMENTS.add(removed, postings)
+        apply_segment(term_db, {"removed": removed, "postings": postings})
+        TERMINFO_STORE.refresh(term_db)
+
+
+@PROFILER.timed("db.merge_segments")
+def merge_term_info_segments() -> None:
+    """!
+    \brief write delta segments into the base term info database file
+
+    The file is written without holding the store lock, so that searches
+    are not blocked during the merge. They read the merged file once it is
+    written. An up to date binary database is written again.
+    """
+    with TERMINFO_MERGE_LOCK:
+        names = TERMINFO_SEGMENTS.names()
+        if not names:
+            return
+        term_db = get_term_info_db()
+        write_binary = has_term_info_bin()
+        with TERMINFO_STORE.file_lock:
+            write_json(TERMINFO_DB_PATH, term_db)
+            TERMINFO_SEGMENTS.remove(names)
+        if write_binary:
+            save_term_info_bin(term_db)
+
+
+def get_index_generation() -> int:
+    "Obtain the number of times the index or text info database changed"
+    return get_doc_info_db().get("generation", 0)
+
+
+def bump_index_generation(flush: bool = True) -> None:
+    """!
+    \brief register that documents were added to the index or to the text
+    info database
+
+    Cached search results of previous generations are no longer used.
+    """
+    with DOCINFO_STORE.lock, DOCINFO_STORE.file_lock:
+        generation = get_index_generation() + 1
+        DOCINFO_STORE.apply("generation", generation, flush=flush)
+
+
+def replay_journals() -> List[Tuple[str, int]]:
+    """!
+    \brief write operations left in journals by interrupted processes
+
+    \return journal path and number of replayed operations, per journal
+    """
+    replayed = []
+    for store in STORES:
+        if store.journal is None:
+            continue
+        with store.lock, store.file_lock:
+            nb_ops = len(store.journal)
+            if nb_ops > 0:
+                store.load()
+                store.mark_dirty()
+                store.flush()
+        replayed.append((store.journal.path, nb_ops))
+    return replayed
+
+
+def get_term_index() -> TermIndex:
+    """!
+    \brief obtain term dictionary of term info database, rebuilt only on change
+
+    Uses the binary database if it is up to date, so that only postings of
+    the looked up terms are decoded. Otherwise postings are held in a
+    CompactIndex.
+    """
+    if has_term_info_bin():
+        return TERMINFO_BIN_STORE.derive("term_index", TermIndex)
+    if TERMINFO_STORE.data is not None:
+        from agsearch.postings import CompactIndex
+
+        # this process updates the database, index its in memory version
+        return TERMINFO_STORE.derive(
+            "term_index", lambda term_db: TermIndex(CompactIndex(term_db))
+        )
+    return TERMINFO_COMPACT_STORE.derive("term_index", TermIndex)
+
+
+def get_term_info(term: str, index: Optional[TermIndex] = None) -> Union[dict, None]:
+    "Exact lookup of term in term info database"
+    if index is None:
+        index = get_term_index()
+    return index.get(term)
 
 
 def get_text_info(text_id: str) -> Union[dict, None]:
@@ -203,4 +577,5 @@ def generate_punctuation() -> List[str]:
     return general + supps + cjks + ideos
 
 
-PUNCTUATIONS = generate_punctuation()
+# generated once by maketables.py instead of on each import
+PUNCTUATIONS = tables.PUNCTUATIONS
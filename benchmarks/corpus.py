@@ -0,0 +1,284 @@
+"""!
+\file corpus.py
+
+Synthetic greek corpus generator
+"""
+# reproducible inscriptions like corpora of any size
+
+from typing import List, Optional
+import argparse
+import json
+import math
+import os
+import random
+import unicodedata
+
+from agsearch import tables
+
+## consonants and clusters starting a syllable, with repetitions for
+## frequency
+ONSETS = (
+    list("βγδζθκλμνξπρστφχψ")
+    + list("κλνπστ")
+    + [
+        "στ",
+        "πρ",
+        "τρ",
+        "κρ",
+        "γρ",
+        "φρ",
+        "θν",
+        "σκ",
+        "",
+        "",
+        "",
+    ]
+)
+
+## vowels and diphthongs
+NUCLEI = list("αεηιουω") + list("αεοι") + ["αι", "ει", "οι", "ου", "αυ", "ευ"]
+
+## consonants ending a syllable
+CODAS = ["", "", "", "", "ν", "ς", "ρ", "λ"]
+
+## combining accents: acute, grave, circumflex
+ACCENTS = ["́", "̀", "͂"]
+
+## combining breathings: smooth, rough
+BREATHINGS = ["̓", "̔"]
+
+## vowels that can take an iota subscript
+IOTA_VOWELS = "αηω"
+
+## punctuations following a word
+PUNCTUATION_MARKS = [",", ".", "·", ";", ":"]
+
+## stop words mixed into the text, they are frequent in real inscriptions
+STOP_WORDS = [w for w in tables.STOP_WORDS if len(w) > 1]
+
+
+def make_word(rng: random.Random) -> str:
+    """!
+    \brief build an accented greek word from random syllables
+    """
+    nb_syllables = rng.choice([1, 2, 2, 3, 3, 3, 4])
+    syllables: List[str] = []
+    for _ in range(nb_syllables):
+        syllables.append(rng.choice(ONSETS) + rng.choice(NUCLEI))
+    syllables[-1] += rng.choice(CODAS)
+    # accent on the vowel of one of the last three syllables
+    accented = rng.randrange(max(0, nb_syllables - 3), nb_syllables)
+    chars: List[str] = []
+    for i, syllable in enumerate(syllables):
+        done = i != accented
+        for ch in syllable:
+            chars.append(ch)
+            if not done and ch in "αεηιουω":
+                if ch in IOTA_VOWELS and rng.random() < 0.1:
+                    chars.append("ͅ")
+                chars.append(rng.choice(ACCENTS))
+                done = True
+    if chars[0] in "αεηιουω":
+        chars.insert(1, rng.choice(BREATHINGS))
+    word = "".join(chars)
+    if word.endswith("σ"):
+        word = word[:-1] + "ς"
+    return unicodedata.normalize("NFC", word)
+
+
+def make_vocabulary(size: int, rng: random.Random) -> List[str]:
+    """!
+    \brief distinct words in decreasing order of frequency
+    """
+    words: List[str] = []
+    seen = set()
+    while len(words) < size:
+        word = make_word(rng)
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def leiden(word: str, rng: random.Random) -> str:
+    """!
+    \brief mark word with a Leiden convention
+
+    Restored letters in square brackets, lacunae, uncertain letters with a
+    dot below, expanded abbreviations in parentheses, erasures in double
+    brackets and editorial additions in angle brackets.
+    """
+    kind = rng.randrange(6)
+    if kind == 0 and len(word) > 2:
+        start = rng.randrange(0, len(word) - 1)
+        end = rng.randrange(start + 1, len(word) + 1)
+        return word[:start] + "[" + word[start:end] + "]" + word[end:]
+    if kind == 1:
+        return rng.choice(["[- - -]", "[---]", "[- -]", "[.....]"])
+    if kind == 2:
+        i = rng.randrange(len(word))
+        return word[: i + 1] + "̣" + word[i + 1 :]
+    if kind == 3 and len(word) > 3:
+        cut = rng.randrange(1, len(word) - 1)
+        return word[:cut] + "(" + word[cut:] + ")"
+    if kind == 4:
+        return "⟦" + word + "⟧"
+    return "<" + word + ">"
+
+
+class CorpusGenerator:
+    """!
+    \brief generate a corpus of line chunked greek inscriptions
+
+    Words are drawn from a synthetic vocabulary following a Zipf law, mixed
+    with real stop words. Texts have accents, breathings, punctuation,
+    capitalized names, Leiden brackets and words split across lines with a
+    hyphen. The same seed always gives the same corpus.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        vocabulary_size: int = 20000,
+        zipf_exponent: float = 1.1,
+        mean_lines: float = 8.0,
+        mean_words_per_line: float = 6.0,
+    ):
+        """!
+        \brief constructor for corpus generator
+
+        \param seed seed of the random generator
+        \param vocabulary_size number of distinct words besides stop words
+        \param zipf_exponent exponent of the word frequency law
+        \param mean_lines average number of lines per text
+        \param mean_words_per_line average number of words per line
+        """
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        ## words in decreasing order of frequency
+        self.vocabulary = make_vocabulary(vocabulary_size, self.rng)
+
+        ## cumulative weights of vocabulary for sampling
+        self.cum_weights: List[float] = []
+        total = 0.0
+        for rank in range(1, vocabulary_size + 1):
+            total += 1.0 / math.pow(rank, zipf_exponent)
+            self.cum_weights.append(total)
+        self.mean_lines = mean_lines
+        self.mean_words_per_line = mean_words_per_line
+
+    def words(self, count: int) -> List[str]:
+        "Sample words with Zipf frequencies"
+        return self.rng.choices(self.vocabulary, cum_weights=self.cum_weights, k=count)
+
+    def line(self) -> List[str]:
+        """!
+        \brief obtain tokens of a line, words with their punctuation
+        """
+        nb_words = max(1, int(self.rng.expovariate(1.0 / self.mean_words_per_line)))
+        tokens: List[str] = []
+        for word in self.words(nb_words):
+            draw = self.rng.random()
+            if draw < 0.2:
+                word = self.rng.choice(STOP_WORDS)
+            elif draw < 0.25:
+                word = word[0].upper() + word[1:]
+            if self.rng.random() < 0.06:
+                word = leiden(word, self.rng)
+            if self.rng.random() < 0.08:
+                word += self.rng.choice(PUNCTUATION_MARKS)
+            tokens.append(word)
+        return tokens
+
+    def text(self) -> str:
+        """!
+        \brief obtain a text with one chunk per line
+        """
+        nb_lines = max(1, int(self.rng.lognormvariate(math.log(self.mean_lines), 0.6)))
+        lines = [self.line() for _ in range(nb_lines)]
+        for i in range(len(lines) - 1):
+            last = lines[i][-1]
+            # split a word across two lines as stone cutters did
+            if len(last) > 3 and last.isalpha() and self.rng.random() < 0.1:
+                cut = self.rng.randrange(1, len(last) - 1)
+                lines[i][-1] = last[:cut] + "-"
+                lines[i + 1].insert(0, last[cut:])
+        return "\n".join(" ".join(tokens) for tokens in lines) + "\n"
+
+    def queries(self, count: int, nb_terms: int = 3) -> List[List[str]]:
+        """!
+        \brief obtain search terms as they would be typed, with accents
+
+        Terms are drawn from the vocabulary with Zipf frequencies, so both
+        frequent and rare terms are searched.
+        """
+        rng = random.Random(self.seed + 1)
+        return [
+            rng.choices(self.vocabulary, cum_weights=self.cum_weights, k=nb_terms)
+            for _ in range(count)
+        ]
+
+    def write(self, data_dir: str, nb_docs: int, prefix: str = "bench") -> dict:
+        """!
+        \brief write texts and text info database to a data directory
+
+        \param data_dir directory laid out like agsearch/assets/data
+        \param nb_docs number of texts
+        \param prefix prefix of text ids
+        \return text info database
+        """
+        normalized = os.path.join(data_dir, "normalized")
+        os.makedirs(normalized, exist_ok=True)
+        infos = {}
+        width = len(str(nb_docs))
+        for i in range(nb_docs):
+            text_id = prefix + str(i).zfill(width)
+            local_path = "normalized/" + text_id + ".txt"
+            with open(os.path.join(data_dir, local_path), "w", encoding="utf-8") as f:
+                f.write(self.text())
+            infos[text_id] = {
+                "has_chunks": True,
+                "local_path": local_path,
+                "url": "",
+                "chunk_separator": "\n",
+            }
+        with open(os.path.join(data_dir, "textinfo.json"), "w", encoding="utf-8") as f:
+            json.dump(infos, f, ensure_ascii=False, indent=2)
+        return infos
+
+
+def make_workdir(
+    workdir: str,
+    nb_docs: int,
+    seed: int = 0,
+    generator: Optional[CorpusGenerator] = None,
+) -> str:
+    """!
+    \brief create a working directory holding a generated corpus
+
+    Databases are found relative to the current directory, so commands run
+    from workdir use the generated corpus and empty databases.
+
+    \return data directory of the corpus
+    """
+    if generator is None:
+        generator = CorpusGenerator(seed=seed)
+    data_dir = os.path.join(workdir, "agsearch", "assets", "data")
+    generator.write(data_dir, nb_docs)
+    with open(os.path.join(data_dir, "terminfo.json"), "w", encoding="utf-8") as f:
+        f.write("{}")
+    return data_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic greek corpus")
+    parser.add_argument(
+        "workdir", help="directory where agsearch/assets/data is created"
+    )
+    parser.add_argument("--docs", help="number of texts", type=int, default=1000)
+    parser.add_argument(
+        "--seed", help="seed of the random generator", type=int, default=0
+    )
+    args = parser.parse_args()
+    print(make_workdir(args.workdir, args.docs, seed=args.seed))
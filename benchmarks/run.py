@@ -0,0 +1,382 @@
+"""!
+\file run.py
+
+Indexing and search benchmarks over synthetic corpora
+"""
+# times cleaning, ingestion and searches, results are written as json
+
+from typing import Callable, Dict, List, Optional
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import CorpusGenerator
+from benchmarks.corpus import make_workdir
+
+## root of the repository, added to the path of benchmark processes
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+## corpus sizes benchmarked by default
+SIZES = [1000, 10000, 100000]
+
+## stages in the order they run, ingestion builds the databases searched
+## by the next ones
+STAGES = ["clean_text", "ingest", "tfidf_search", "score_search"]
+
+## version of the results file format
+RESULTS_VERSION = 1
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """!
+    \brief p50, p95, p99, mean and max of values, by nearest rank
+    """
+    if not values:
+        return {}
+    ordered = sorted(values)
+    result = {}
+    for p in [50, 95, 99]:
+        rank = max(0, -(-p * len(ordered) // 100) - 1)
+        result["p" + str(p)] = ordered[rank]
+    result["mean"] = sum(ordered) / len(ordered)
+    result["max"] = ordered[-1]
+    return result
+
+
+def peak_rss_mb() -> float:
+    """!
+    \brief peak resident set size of the current process in megabytes
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macos
+    if sys.platform == "darwin":
+        return peak / (1024.0 * 1024.0)
+    return peak / 1024.0
+
+
+def timed(func: Callable[[], object]) -> float:
+    "Wall time of calling func in milliseconds"
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000.0
+
+
+def read_texts(data_dir: str) -> List[str]:
+    "Raw texts of the corpus in data_dir"
+    with open(os.path.join(data_dir, "textinfo.json"), "r", encoding="utf-8") as f:
+        infos = json.load(f)
+    texts = []
+    for info in infos.values():
+        with open(
+            os.path.join(data_dir, info["local_path"]), "r", encoding="utf-8"
+        ) as f:
+            texts.append(f.read())
+    return texts
+
+
+def search_queries(args) -> List[List[str]]:
+    """!
+    \brief normalized search terms of the benchmark queries
+
+    Terms are normalized as SearchManager does for term files.
+    """
+    from agsearch.greekprocessing import GreekProcessing
+
+    proc = GreekProcessing("")
+    generator = CorpusGenerator(seed=args.seed)
+    return [
+        [proc.remove_accent(proc.to_lower(t)) for t in terms]
+        for terms in generator.queries(args.queries, args.terms)
+    ]
+
+
+def bench_clean_text(args) -> dict:
+    """!
+    \brief throughput and latency of GreekProcessing.clean_text per text
+    """
+    from agsearch.greekprocessing import GreekProcessing
+    from agsearch.utils import DATA_DIR
+
+    texts = read_texts(DATA_DIR)
+    proc = GreekProcessing("")
+    latencies = [timed(lambda: proc.clean_text(text)) for text in texts]
+    seconds = sum(latencies) / 1000.0
+    nb_bytes = sum(len(text.encode("utf-8")) for text in texts)
+    return {
+        "seconds": seconds,
+        "throughput": len(texts) / seconds,
+        "unit": "docs/s",
+        "mb_per_s": nb_bytes / (1024.0 * 1024.0) / seconds,
+        "latency_ms": percentiles(latencies),
+    }
+
+
+def bench_ingest(args) -> dict:
+    """!
+    \brief time to index the whole corpus with CorpusManager
+
+    The term info database, document registry and tf-idf model are built
+    from nothing, as on the first run over a corpus.
+    """
+    from agsearch.corpusmanager import CorpusManager
+
+    start = time.perf_counter()
+    manager = CorpusManager(workers=args.workers, merge=True)
+    manager.wait_merge()
+    seconds = time.perf_counter() - start
+    return {
+        "seconds": seconds,
+        "throughput": len(manager.text_info_db) / seconds,
+        "unit": "docs/s",
+        "workers": args.workers,
+    }
+
+
+def bench_queries(make_searcher: Callable[[List[str]], object], args) -> dict:
+    """!
+    \brief latency of searching every benchmark query
+
+    The first search also loads the index or model, it is reported apart
+    as load time and not counted in latencies.
+    """
+    queries = search_queries(args)
+    load_ms = timed(lambda: make_searcher(queries[0]).search())
+    latencies = [timed(lambda: make_searcher(terms).search()) for terms in queries]
+    seconds = sum(latencies) / 1000.0
+    return {
+        "seconds": seconds,
+        "throughput": len(latencies) / seconds,
+        "unit": "queries/s",
+        "load_ms": load_ms,
+        "latency_ms": percentiles(latencies),
+    }
+
+
+def bench_tfidf_search(args) -> dict:
+    """!
+    \brief latency of TfIdfInfo.search
+    """
+    from agsearch.tfidfinfo import TfIdfInfo
+
+    result = bench_queries(lambda terms: TfIdfInfo(terms, args.match), args)
+    result["match"] = args.match
+    return result
+
+
+def bench_score_search(args) -> dict:
+    """!
+    \brief latency of ScoreInfo.search
+    """
+    from agsearch.scoreinfo import ScoreInfo
+
+    return bench_queries(lambda terms: ScoreInfo(None, text="\n".join(terms)), args)
+
+
+## benchmark function of each stage
+STAGE_FUNCTIONS: Dict[str, Callable[[argparse.Namespace], dict]] = {
+    "clean_text": bench_clean_text,
+    "ingest": bench_ingest,
+    "tfidf_search": bench_tfidf_search,
+    "score_search": bench_score_search,
+}
+
+
+def run_stage(stage: str, size: int, workdir: str, args) -> dict:
+    """!
+    \brief run a stage in a new interpreter whose directory is workdir
+
+    Each stage has its own process, so its peak memory is measured alone
+    and no cache is shared between stages.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        p for p in [REPO_ROOT, env.get("PYTHONPATH", "")] if p
+    )
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.run",
+        "--stage",
+        stage,
+        "--seed",
+        str(args.seed),
+        "--queries",
+        str(args.queries),
+        "--terms",
+        str(args.terms),
+        "--match",
+        args.match,
+        "--workers",
+        str(args.workers),
+    ]
+    out = subprocess.run(
+        command, cwd=workdir, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result["stage"] = stage
+    result["size"] = size
+    return result
+
+
+def git_commit() -> Optional[str]:
+    "Commit of the repository, with a + suffix if the tree has changes"
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=REPO_ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + "+" if status else commit
+
+
+def run_benchmarks(sizes: List[int], stages: List[str], root: str, args) -> dict:
+    """!
+    \brief generate a corpus per size and run stages over it
+
+    \return results with the environment they were obtained in
+    """
+    results = []
+    for size in sizes:
+        workdir = os.path.join(root, "size-" + str(size))
+        if os.path.isdir(workdir):
+            shutil.rmtree(workdir)
+        start = time.perf_counter()
+        make_workdir(workdir, size, seed=args.seed)
+        print("corpus", size, round(time.perf_counter() - start, 2), "s", sep="\t")
+        for stage in stages:
+            result = run_stage(stage, size, workdir, args)
+            latency = result.get("latency_ms", None)
+            print(
+                stage,
+                size,
+                "{0:.1f} {1}".format(result["throughput"], result["unit"]),
+                "p95 {0:.2f} ms".format(latency["p95"]) if latency else "-",
+                "rss {0:.0f} MB".format(result["peak_rss_mb"]),
+                sep="\t",
+            )
+            results.append(result)
+    return {
+        "version": RESULTS_VERSION,
+        "commit": git_commit(),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "queries": args.queries,
+        "terms": args.terms,
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict) -> List[str]:
+    """!
+    \brief relative change of throughput, p95 latency and peak memory for
+    every stage and size found in both results
+
+    \return lines of a tab separated table
+    """
+    old = {(r["stage"], r["size"]): r for r in baseline["results"]}
+    lines = ["stage\tsize\tthroughput\tp95\trss"]
+    for result in current["results"]:
+        before = old.get((result["stage"], result["size"]), None)
+        if before is None:
+            continue
+        changes = []
+        for new, prev in [
+            (result["throughput"], before["throughput"]),
+            (
+                result.get("latency_ms", {}).get("p95", None),
+                before.get("latency_ms", {}).get("p95", None),
+            ),
+            (result["peak_rss_mb"], before["peak_rss_mb"]),
+        ]:
+            if new is None or not prev:
+                changes.append("-")
+            else:
+                changes.append("{0:+.1f}%".format((new - prev) * 100.0 / prev))
+        lines.append("\t".join([result["stage"], str(result["size"])] + changes))
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark cleaning, ingestion and searches on synthetic corpora"
+    )
+    parser.add_argument(
+        "--sizes",
+        help="numbers of documents of benchmarked corpora",
+        type=int,
+        nargs="+",
+        default=SIZES,
+    )
+    parser.add_argument(
+        "--stages", help="stages to run", nargs="+", choices=STAGES, default=STAGES
+    )
+    parser.add_argument(
+        "--output", help="results file", default="benchmark-results.json"
+    )
+    parser.add_argument(
+        "--baseline", help="results file of a previous run to compare with"
+    )
+    parser.add_argument(
+        "--workdir",
+        help="directory holding generated corpora, temporary if not given",
+    )
+    parser.add_argument("--seed", help="seed of corpus generator", type=int, default=0)
+    parser.add_argument(
+        "--queries", help="number of search queries", type=int, default=200
+    )
+    parser.add_argument("--terms", help="terms per query", type=int, default=3)
+    parser.add_argument(
+        "--match",
+        help="match mode of tf-idf searches",
+        choices=["exact", "prefix", "substring", "fuzzy"],
+        default="exact",
+    )
+    parser.add_argument(
+        "--workers", help="processes used for ingestion", type=int, default=1
+    )
+    parser.add_argument("--stage", help=argparse.SUPPRESS, choices=STAGES)
+    args = parser.parse_args()
+    if args.stage is not None:
+        # run by run_stage() from the corpus directory
+        result = STAGE_FUNCTIONS[args.stage](args)
+        result["peak_rss_mb"] = peak_rss_mb()
+        print(json.dumps(result))
+        sys.exit(0)
+    if args.workdir is None:
+        root = tempfile.mkdtemp(prefix="agsearch-bench-")
+    else:
+        root = args.workdir
+        os.makedirs(root, exist_ok=True)
+    try:
+        report = run_benchmarks(args.sizes, args.stages, root, args)
+    finally:
+        if args.workdir is None:
+            shutil.rmtree(root)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(args.output)
+    if args.baseline is not None:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\n".join(compare(baseline, report)))
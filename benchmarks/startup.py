@@ -0,0 +1,110 @@
+"""!
+\file startup.py
+
+Startup time budget of command line entry points
+"""
+# checks that entry points start fast and do not load heavy dependencies
+
+from typing import List, Tuple
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+## modules that only searches should load
+HEAVY_MODULES = [
+    "numpy",
+    "scipy",
+    "sklearn",
+    "cltk",
+    "greek_accentuation",
+]
+
+## name and python arguments of each checked entry point
+ENTRY_POINTS: List[Tuple[str, List[str]]] = [
+    ("import utils", ["-c", "import agsearch.utils"]),
+    ("import search", ["-c", "import agsearch.search"]),
+    ("search --help", ["-m", "agsearch.search", "--help"]),
+    ("add_textinfo --help", ["-m", "agsearch.add_textinfo", "--help"]),
+    ("journal replay", ["-m", "agsearch.journal"]),
+]
+
+## modules imported by entry points of a search tool that does not search
+CHECKED_IMPORTS = ["agsearch.search", "agsearch.add_textinfo", "agsearch.corpusmanager"]
+
+
+def time_command(args: List[str], repeat: int) -> float:
+    """!
+    \brief median wall time of running python with args, in milliseconds
+    """
+    times: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable] + args,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        times.append((time.perf_counter() - start) * 1000.0)
+    return statistics.median(times)
+
+
+def loaded_heavy_modules(module: str) -> List[str]:
+    """!
+    \brief heavy modules loaded by importing module in a new interpreter
+    """
+    code = "import json, sys, {0}; print(json.dumps(sorted(sys.modules)))"
+    out = subprocess.run(
+        [sys.executable, "-c", code.format(module)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    modules = set(json.loads(out))
+    return [m for m in HEAVY_MODULES if m in modules]
+
+
+def check_startup(budget_ms: float, repeat: int) -> List[str]:
+    """!
+    \brief run startup checks
+
+    \return failures, empty if every entry point is within budget
+    """
+    failures: List[str] = []
+    baseline = time_command(["-c", "pass"], repeat)
+    print("interpreter", round(baseline, 1), "ms", sep="\t")
+    for name, args in ENTRY_POINTS:
+        elapsed = time_command(args, repeat)
+        print(name, round(elapsed, 1), "ms", sep="\t")
+        if elapsed - baseline > budget_ms:
+            failures.append(
+                "{0} takes {1:.0f} ms over interpreter startup, budget is {2:.0f}".format(
+                    name, elapsed - baseline, budget_ms
+                )
+            )
+    for module in CHECKED_IMPORTS:
+        heavy = loaded_heavy_modules(module)
+        if heavy:
+            failures.append(module + " imports " + ", ".join(heavy))
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check startup time of entry points")
+    parser.add_argument(
+        "--budget-ms",
+        help="largest time an entry point may add to interpreter startup",
+        type=float,
+        default=250.0,
+    )
+    parser.add_argument(
+        "--repeat", help="number of runs per entry point", type=int, default=5
+    )
+    args = parser.parse_args()
+    failures = check_startup(args.budget_ms, args.repeat)
+    for failure in failures:
+        print("FAIL", failure, sep="\t")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,243 @@
+"""!
+\file test_asyncsearch.py
+
+Tests of the asyncio search front
+"""
+# searches are replaced by a function waiting on an event, so that tests
+# decide when workers are busy
+
+import asyncio
+import json
+import threading
+import unittest
+from unittest import mock
+
+from agsearch import asyncsearch
+from agsearch.asyncsearch import AsyncSearchManager
+from agsearch.asyncsearch import handle_connection
+
+## longest wait of a test, in seconds
+WAIT = 5
+
+
+class FakeSearch:
+    """!
+    \brief stand in for search_query, queries with "wait" block until
+    release() is called
+    """
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.started = threading.Event()
+        self.calls = []
+
+    def __call__(self, query: dict, preproc_choice: int = 2):
+        self.calls.append(query["text"])
+        if query.get("wait", False):
+            self.started.set()
+            self.gate.wait(WAIT)
+        return [[query["text"], 1.0]]
+
+    def release(self) -> None:
+        self.gate.set()
+
+    async def wait_started(self) -> None:
+        "Wait until a worker runs a blocking query"
+        for _ in range(WAIT * 100):
+            if self.started.is_set():
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError("query did not start")
+
+
+class FakeWriter:
+    "Stream writer collecting json lines"
+
+    def __init__(self):
+        self.lines: asyncio.Queue = asyncio.Queue()
+        self.closed = False
+
+    def write(self, data: bytes) -> None:
+        for line in data.decode("utf-8").splitlines():
+            self.lines.put_nowait(json.loads(line))
+
+    async def drain(self) -> None:
+        pass
+
+    def is_closing(self) -> bool:
+        return self.closed
+
+    def close(self) -> None:
+        self.closed = True
+
+    async def read(self) -> dict:
+        return await asyncio.wait_for(self.lines.get(), WAIT)
+
+
+class AsyncTestCase(unittest.TestCase):
+    def setUp(self):
+        self.search = FakeSearch()
+        patches = [
+            mock.patch.object(asyncsearch, "search_query", self.search),
+            mock.patch.object(asyncsearch, "warm_up", lambda: None),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        # never leave a worker blocked
+        self.addCleanup(self.search.release)
+
+
+class TestAsyncSearchManager(AsyncTestCase):
+    def test_search(self):
+        async def main():
+            async with AsyncSearchManager(workers=2) as manager:
+                return await asyncio.gather(
+                    manager.search({"text": "α"}), manager.search({"text": "β"})
+                )
+
+        self.assertEqual(asyncio.run(main()), [[["α", 1.0]], [["β", 1.0]]])
+
+    def test_max_pending_rejects(self):
+        async def main():
+            async with AsyncSearchManager(workers=1, max_pending=1) as manager:
+                first = asyncio.ensure_future(
+                    manager.search({"text": "α", "wait": True})
+                )
+                await self.search.wait_started()
+                with self.assertRaises(asyncio.QueueFull):
+                    await manager.search({"text": "β"}, block=False)
+                self.assertEqual(manager.pending, 1)
+                # a blocking search waits for the slot
+                second = asyncio.ensure_future(manager.search({"text": "γ"}))
+                await asyncio.sleep(0.05)
+                self.assertFalse(second.done())
+                self.search.release()
+                results = [await first, await second]
+                self.assertEqual(manager.pending, 0)
+                return results
+
+        self.assertEqual(asyncio.run(main()), [[["α", 1.0]], [["γ", 1.0]]])
+        self.assertEqual(self.search.calls, ["α", "γ"])
+
+    def test_cancel_queued_query(self):
+        async def main():
+            async with AsyncSearchManager(workers=1, max_pending=2) as manager:
+                first = asyncio.ensure_future(
+                    manager.search({"text": "α", "wait": True})
+                )
+                await self.search.wait_started()
+                queued = asyncio.ensure_future(manager.search({"text": "β"}))
+                await asyncio.sleep(0.05)
+                self.assertEqual(manager.pending, 2)
+                queued.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await queued
+                # the query is removed from the pool and its slot given back
+                await asyncio.sleep(0.05)
+                self.assertEqual(manager.pending, 1)
+                self.search.release()
+                return await first
+
+        self.assertEqual(asyncio.run(main()), [["α", 1.0]])
+        self.assertEqual(self.search.calls, ["α"])
+
+    def test_timeout(self):
+        async def main():
+            async with AsyncSearchManager(workers=1, timeout=0.05) as manager:
+                with self.assertRaises(asyncio.TimeoutError):
+                    await manager.search({"text": "α", "wait": True})
+                self.search.release()
+
+        asyncio.run(main())
+
+
+class TestHandleConnection(AsyncTestCase):
+    def run_connection(self, script) -> list:
+        """!
+        \brief run a connection fed by script(send, writer), return the
+        responses left unread
+        """
+
+        async def main():
+            reader = asyncio.StreamReader()
+            writer = FakeWriter()
+
+            def send(body) -> None:
+                text = body if isinstance(body, str) else json.dumps(body)
+                reader.feed_data(text.encode("utf-8") + b"\n")
+
+            async with AsyncSearchManager(workers=1, max_pending=4) as manager:
+                connection = asyncio.ensure_future(
+                    handle_connection(manager, reader, writer)
+                )
+                await script(send, writer)
+                reader.feed_eof()
+                await asyncio.wait_for(connection, WAIT)
+                # running queries are not interrupted, let them end
+                self.search.release()
+            self.assertTrue(writer.closed)
+            return [writer.lines.get_nowait() for _ in range(writer.lines.qsize())]
+
+        return asyncio.run(main())
+
+    def test_queries_and_errors(self):
+        async def script(send, writer):
+            send({"id": 1, "text": "α"})
+            self.assertEqual(await writer.read(), {"id": 1, "results": [["α", 1.0]]})
+            send("{not json")
+            self.assertEqual((await writer.read())["id"], None)
+            send({"id": [1], "text": "α"})
+            self.assertIn("error", await writer.read())
+
+        self.assertEqual(self.run_connection(script), [])
+
+    def test_queries_without_id_do_not_collide(self):
+        async def script(send, writer):
+            send({"text": "α", "wait": True})
+            await self.search.wait_started()
+            send({"text": "β"})
+            send({"text": "γ"})
+            await asyncio.sleep(0.05)
+            self.search.release()
+            responses = [await writer.read() for _ in range(3)]
+            self.assertEqual(
+                sorted(r["results"][0][0] for r in responses), ["α", "β", "γ"]
+            )
+
+        self.assertEqual(self.run_connection(script), [])
+
+    def test_cancel_by_id(self):
+        async def script(send, writer):
+            send({"id": "a", "text": "α", "wait": True})
+            await self.search.wait_started()
+            send({"id": "b", "text": "β"})
+            # an id already in flight is rejected and does not replace it
+            send({"id": "b", "text": "γ"})
+            self.assertEqual(
+                await writer.read(), {"id": "b", "error": "id already in use"}
+            )
+            send({"cancel": "b"})
+            self.assertEqual(await writer.read(), {"id": "b", "error": "cancelled"})
+            self.search.release()
+            self.assertEqual(await writer.read(), {"id": "a", "results": [["α", 1.0]]})
+            # the id may be used again once its query has ended
+            send({"id": "b", "text": "δ"})
+            self.assertEqual(await writer.read(), {"id": "b", "results": [["δ", 1.0]]})
+
+        self.assertEqual(self.run_connection(script), [])
+        self.assertEqual(self.search.calls, ["α", "δ"])
+
+    def test_closing_cancels_queries(self):
+        async def script(send, writer):
+            send({"id": "a", "text": "α", "wait": True})
+            await self.search.wait_started()
+            send({"id": "b", "text": "β"})
+            await asyncio.sleep(0.05)
+
+        self.run_connection(script)
+        self.assertEqual(self.search.calls, ["α"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+"""!
+\file test_batch.py
+
+Tests of batch queries
+"""
+# batch results against single searches, result cache and bulk saves
+
+import os
+import unittest
+from unittest import mock
+
+from agsearch import utils
+from agsearch.corpusmanager import CorpusManager
+from agsearch.resultcache import ResultCache
+from agsearch.smanager import SearchManager
+from agsearch.smanager import read_query_paths
+from agsearch.smanager import searcher_class
+from tests.test_corpusmanager import CorpusTestCase
+
+TEXTS = {
+    "a": "λόγος καὶ ἔργον\nἄνθρωπος\n",
+    "b": "λόγος λόγος ἵππος\n",
+    "c": "θάλασσα ἵππος\n",
+}
+
+## search terms of query files, one term per line
+QUERIES = {
+    "q1.txt": "λόγος\n",
+    "q2.txt": "ἵππος\nθάλασσα\n",
+    "q3.txt": "ἄνθρωπος\n",
+}
+
+
+class TestSearchBatch(CorpusTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_texts(TEXTS)
+        CorpusManager()
+        os.makedirs("queries")
+        for name, text in QUERIES.items():
+            with open(os.path.join("queries", name), "w", encoding="utf-8") as f:
+                f.write(text)
+
+    def path(self, name: str) -> str:
+        return os.path.join("queries", name)
+
+    def test_same_results_as_single_searches(self):
+        paths = [self.path(n) for n in ["q1.txt", "q2.txt", "q3.txt", "q1.txt"]]
+        for choice in [1, 2, 3]:
+            manager = SearchManager(None, choice=choice, top_k=2, cache=None)
+            results = manager.search_batch(paths)
+            for path, result in zip(paths, results):
+                with open(path, "r", encoding="utf-8") as f:
+                    expected = manager.search_text(f.read())
+                self.assertEqual(result, expected, (choice, path))
+
+    def test_results_are_saved_with_a_single_write(self):
+        manager = SearchManager(None, choice=2, cache=ResultCache())
+        module = searcher_class(2).__module__
+        paths = [self.path(n) for n in ["q1.txt", "q2.txt", "q1.txt"]]
+        with mock.patch(
+            module + ".add_many_to_tfidf_info_db",
+            wraps=utils.add_many_to_tfidf_info_db,
+        ) as add_many:
+            self.assertIsNone(manager.search_batch(paths))
+            # the repeated query is searched and saved once
+            self.assertEqual(add_many.call_count, 1)
+            self.assertEqual(len(add_many.call_args[0][0]), 2)
+            self.assertEqual(len(utils.get_tfidf_info_db()), 2)
+            # results of cached queries are not saved again
+            manager.search_batch(paths)
+            self.assertEqual(add_many.call_count, 1)
+            manager.search_batch([self.path("q3.txt"), self.path("q2.txt")])
+            self.assertEqual(add_many.call_count, 2)
+            self.assertEqual(len(add_many.call_args[0][0]), 1)
+        single = SearchManager(None, choice=2, cache=None)
+        expected = [single.search_text(QUERIES[n]) for n in ["q1.txt", "q2.txt"]]
+        expected.append(single.search_text(QUERIES["q3.txt"]))
+        self.assertEqual(utils.get_tfidf_info_db(), expected)
+
+    def test_cached_queries_are_not_searched_again(self):
+        manager = SearchManager(None, choice=3, top_k=3, cache=ResultCache())
+        paths = [self.path("q1.txt"), self.path("q2.txt")]
+        first = manager.search_batch(paths)
+        with mock.patch.object(
+            manager, "make_searcher", side_effect=AssertionError("searched")
+        ):
+            self.assertEqual(manager.search_batch(paths), first)
+        # a new index generation invalidates cached results
+        utils.bump_index_generation()
+        with mock.patch.object(
+            manager, "make_searcher", wraps=manager.make_searcher
+        ) as make_searcher:
+            self.assertEqual(manager.search_batch(paths), first)
+            self.assertEqual(make_searcher.call_count, 2)
+
+
+class TestReadQueryPaths(CorpusTestCase):
+    def test_directory_and_manifest(self):
+        os.makedirs(os.path.join("batch", "queries"))
+        for name in ["b.txt", "a.txt"]:
+            with open(os.path.join("batch", "queries", name), "w") as f:
+                f.write("λόγος\n")
+        os.makedirs(os.path.join("batch", "queries", "subdir"))
+        expected = [os.path.join("batch", "queries", n) for n in ["a.txt", "b.txt"]]
+        self.assertEqual(read_query_paths(os.path.join("batch", "queries")), expected)
+        manifest = os.path.join("batch", "manifest.txt")
+        with open(manifest, "w", encoding="utf-8") as f:
+            f.write("# queries of the batch\nqueries/a.txt\n\n  queries/b.txt  \n")
+        self.assertEqual(read_query_paths(manifest), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
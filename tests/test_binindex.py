@@ -0,0 +1,109 @@
+"""!
+\file test_binindex.py
+
+Tests of the binary term info database
+"""
+# varint roundtrips and binary index against the json database
+
+import json
+import os
+import random
+import tempfile
+import unittest
+
+from agsearch.binindex import BinaryIndex
+from agsearch.binindex import decode_varint
+from agsearch.binindex import encode_varint
+from agsearch.binindex import write_binary_index
+from benchmarks.corpus import CorpusGenerator
+
+## term info database shipped with the package
+TERMINFO_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "agsearch",
+    "assets",
+    "data",
+    "terminfo.json",
+)
+
+
+def make_term_db(nb_docs: int, seed: int) -> dict:
+    "Term info database of a synthetic corpus, words are split on spaces"
+    generator = CorpusGenerator(seed=seed, vocabulary_size=5000)
+    term_db: dict = {}
+    for i in range(nb_docs):
+        doc_id = "doc" + str(i)
+        for word in generator.text().split():
+            counts = term_db.setdefault(word, {})
+            counts[doc_id] = counts.get(doc_id, 0) + 1
+    return term_db
+
+
+class TestVarint(unittest.TestCase):
+    def test_roundtrip(self):
+        rng = random.Random(0)
+        values = [0, 1, 127, 128, 255, 16383, 16384, 2**32 - 1, 2**63]
+        values += [rng.getrandbits(rng.randint(1, 40)) for _ in range(1000)]
+        buf = bytearray()
+        for value in values:
+            encode_varint(value, buf)
+        pos = 0
+        for value in values:
+            decoded, pos = decode_varint(buf, pos)
+            self.assertEqual(decoded, value)
+        self.assertEqual(pos, len(buf))
+
+    def test_byte_length(self):
+        for value, size in [(0, 1), (127, 1), (128, 2), (16383, 2), (16384, 3)]:
+            buf = bytearray()
+            encode_varint(value, buf)
+            self.assertEqual(len(buf), size)
+
+
+class TestBinaryIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def roundtrip(self, term_db: dict) -> None:
+        json_path = os.path.join(self.tmp.name, "terminfo.json")
+        bin_path = os.path.join(self.tmp.name, "terminfo.bin")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(term_db, f, ensure_ascii=False)
+        with open(json_path, "r", encoding="utf-8") as f:
+            expected = json.load(f)
+        write_binary_index(bin_path, expected)
+        with BinaryIndex(bin_path) as index:
+            self.assertEqual(len(index), len(expected))
+            self.assertEqual(set(index), set(expected))
+            for term, counts in expected.items():
+                self.assertEqual(index[term], counts)
+                self.assertEqual(index.doc_freq(term), len(counts))
+                docs, values = index.arrays(term)
+                self.assertEqual(
+                    {
+                        index.doc_ids[d]: c
+                        for d, c in zip(docs.tolist(), values.tolist())
+                    },
+                    counts,
+                )
+            self.assertNotIn("absent", index)
+            self.assertEqual(index.doc_freq("absent"), 0)
+
+    def test_shipped_database(self):
+        with open(TERMINFO_PATH, "r", encoding="utf-8") as f:
+            self.roundtrip(json.load(f))
+
+    def test_synthetic_database(self):
+        term_db = make_term_db(300, seed=1)
+        self.assertGreater(len(term_db), 1000)
+        self.roundtrip(term_db)
+
+    def test_empty_database(self):
+        self.roundtrip({})
+
+
+if __name__ == "__main__":
+    unittest.main()
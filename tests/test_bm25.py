@@ -0,0 +1,111 @@
+"""!
+\file test_bm25.py
+
+Tests of bm25 ranking
+"""
+# bm25 scores against a direct computation on texts indexed in a temporary
+# data directory
+
+import math
+import unittest
+
+from agsearch.bm25info import BM25Info
+from agsearch.corpusmanager import CorpusManager
+from agsearch.greekprocessing import GreekProcessing
+from agsearch.utils import get_doc_info_db
+from tests.test_corpusmanager import CorpusTestCase
+from tests.test_corpusmanager import reset_stores
+
+## tolerance of scores summed in a different order
+EPSILON = 1e-9
+
+## c contains none of the query terms λογος and εργον
+TEXTS = {
+    "a": "λόγος λόγος ἔργον\n",
+    "b": "λόγος ἄνθρωπος\nἵππος θάλασσα\n",
+    "c": "ἵππος\n",
+}
+
+
+def reference_bm25(texts: dict, terms: list, k1: float = 1.2, b: float = 0.75):
+    "Okapi bm25 score of every text, counting its tokens directly"
+    proc = GreekProcessing("")
+    tokens = {
+        d: [t for line in text.split("\n") for t in proc.tokenize(line)]
+        for d, text in texts.items()
+    }
+    average = sum(len(t) for t in tokens.values()) / len(tokens)
+    scores = {d: 0.0 for d in texts}
+    for term in set(terms):
+        doc_freq = sum(1 for t in tokens.values() if term in t)
+        if doc_freq == 0:
+            continue
+        idf = math.log(1 + (len(texts) - doc_freq + 0.5) / (doc_freq + 0.5))
+        for doc_id, doc_tokens in tokens.items():
+            freq = doc_tokens.count(term)
+            norm = k1 * (1 - b + b * len(doc_tokens) / average)
+            scores[doc_id] += idf * freq * (k1 + 1) / (freq + norm)
+    return scores
+
+
+class TestBM25(CorpusTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_texts(TEXTS)
+        CorpusManager()
+
+    def search(self, terms: list) -> dict:
+        searcher = BM25Info(terms)
+        searcher.search()
+        return searcher.search_results
+
+    def test_hand_computed_scores(self):
+        # 3 documents of 3, 4 and 1 terms, λογος is in 2 of them
+        idf = math.log(1 + (3 - 2 + 0.5) / (2 + 0.5))
+        average = 8 / 3
+        norm_a = 1.2 * (0.25 + 0.75 * 3 / average)
+        norm_b = 1.2 * (0.25 + 0.75 * 4 / average)
+        results = self.search(["λογος"])
+        self.assertEqual(set(results), {"a", "b"})
+        self.assertAlmostEqual(results["a"], idf * 2 * 2.2 / (2 + norm_a))
+        self.assertAlmostEqual(results["b"], idf * 1 * 2.2 / (1 + norm_b))
+
+    def test_reference_scores(self):
+        for terms in [["λογος"], ["λογος", "εργον"], ["ιππος", "λογος", "ιππος"]]:
+            expected = reference_bm25(TEXTS, terms)
+            results = self.search(terms)
+            self.assertEqual(set(results), {d for d, s in expected.items() if s})
+            for doc_id, score in results.items():
+                self.assertAlmostEqual(score, expected[doc_id], delta=EPSILON)
+
+    def test_unknown_term(self):
+        self.assertEqual(self.search(["ψψψψ"]), {})
+        self.assertEqual(BM25Info(["ψψψψ"]).top_k(3), [])
+
+    def test_top_k_excludes_documents_without_terms(self):
+        result = BM25Info(["λογος", "εργον"]).top_k(3)
+        self.assertEqual([d for d, _ in result], ["a", "b"])
+        self.assertEqual(BM25Info(["λογος", "εργον"]).top_k(1), result[:1])
+        expected = reference_bm25(TEXTS, ["λογος", "εργον"])
+        for doc_id, score in result:
+            self.assertAlmostEqual(score, expected[doc_id], delta=EPSILON)
+
+    def test_doc_lengths_follow_index_updates(self):
+        doc_info = get_doc_info_db()
+        self.assertEqual(doc_info["lengths"], {"a": 3, "b": 4, "c": 1})
+        self.assertAlmostEqual(doc_info["average_length"], 8 / 3)
+        texts = {"a": "λόγος\n", "b": TEXTS["b"]}
+        # a is modified and c removed from the text info database
+        self.write_texts(texts)
+        CorpusManager()
+        reset_stores()
+        doc_info = get_doc_info_db()
+        self.assertEqual(doc_info["lengths"], {"a": 1, "b": 4})
+        self.assertAlmostEqual(doc_info["average_length"], 5 / 2)
+        expected = reference_bm25(texts, ["λογος"])
+        for doc_id, score in self.search(["λογος"]).items():
+            self.assertAlmostEqual(score, expected[doc_id], delta=EPSILON)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+"""!
+\file test_corpusmanager.py
+
+Tests of corpus updates
+"""
+# corpus manager runs in a temporary directory laid out like the package data
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from agsearch import tfidfmodel
+from agsearch import utils
+from agsearch.corpusmanager import CorpusManager
+from agsearch.greekprocessing import GreekProcessing
+from agsearch.greektext import GreekText
+from agsearch.resultcache import RESULT_CACHE
+from agsearch.utils import DATA_DIR
+from agsearch.utils import get_doc_info_db
+from agsearch.utils import get_doc_registry
+from agsearch.utils import get_term_info_db
+
+## texts whose words contain stop words, such as ἐν in γενέτας
+TEXTS = {
+    "a": "ἐνθάδε κεῖται ὁ γενέτας\nκαὶ ἡ γυνὴ αὐτοῦ\n",
+    "b": "γενέτας καὶ ἄλλος· χαῖρε\n",
+    "c": "χαῖρε παροδῖτα\n",
+}
+
+
+def reset_stores() -> None:
+    "Forget databases and results kept in memory, they are read again from disk"
+    for store in utils.STORES + [
+        utils.TERMINFO_COMPACT_STORE,
+        utils.TERMINFO_BIN_STORE,
+        utils.POSITIONS_STORE,
+    ]:
+        store.data = None
+        store.stamp = None
+        store.dirty = False
+        store.replaced = False
+        store.derived = {}
+    tfidfmodel.MODEL_STORES.clear()
+    RESULT_CACHE.clear()
+
+
+def expected_term_db(texts: dict) -> dict:
+    "Term counts of texts tokenized line by line"
+    proc = GreekProcessing("")
+    term_db: dict = {}
+    for text_id, text in texts.items():
+        for line in text.split("\n"):
+            for term in proc.tokenize(line):
+                counts = term_db.setdefault(term, {})
+                counts[text_id] = counts.get(text_id, 0) + 1
+    return term_db
+
+
+def doc_lengths(texts: dict) -> dict:
+    lengths: dict = {}
+    for term, counts in expected_term_db(texts).items():
+        for text_id, count in counts.items():
+            lengths[text_id] = lengths.get(text_id, 0) + count
+    return lengths
+
+
+class CorpusTestCase(unittest.TestCase):
+    """!
+    \brief databases are found relative to the current directory, so each
+    test runs in its own temporary directory
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        os.makedirs(os.path.join(DATA_DIR, "normalized"))
+        # an empty term info database, as benchmarks.corpus.make_workdir()
+        self.write_json("terminfo.json", {})
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        reset_stores()
+        self.tmp.cleanup()
+
+    def write_texts(self, texts: dict) -> None:
+        "Write texts and a text info database listing them"
+        infos = {}
+        for text_id, text in texts.items():
+            local_path = "normalized/" + text_id + ".txt"
+            with open(os.path.join(DATA_DIR, local_path), "w", encoding="utf-8") as f:
+                f.write(text)
+            infos[text_id] = {
+                "has_chunks": True,
+                "local_path": local_path,
+                "url": "",
+                "chunk_separator": "\n",
+            }
+        self.write_json("textinfo.json", infos)
+
+    def write_json(self, name: str, data: dict) -> None:
+        with open(os.path.join(DATA_DIR, name), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        reset_stores()
+
+    def assertIndexed(self, texts: dict) -> None:
+        "Term info database and document lengths are those of texts"
+        self.assertEqual(get_term_info_db(), expected_term_db(texts))
+        self.assertEqual(get_doc_info_db()["lengths"], doc_lengths(texts))
+        self.assertEqual(set(get_doc_registry().keys()), set(texts.keys()))
+
+
+class TestTokenizerVersion(CorpusTestCase):
+    def test_terms_of_substring_stop_words_are_dropped(self):
+        self.write_texts(TEXTS)
+        # term info database written by the former tokenizer, which removed
+        # stop words inside words, without document registry
+        self.write_json(
+            "terminfo.json",
+            {
+                "θαδε": {"a": 1},
+                "κειται": {"a": 1},
+                "νετας": {"a": 1, "b": 1},
+                "γυνη": {"a": 1},
+                "αλλος": {"b": 1},
+                "χαιρε": {"b": 1, "c": 1},
+                "παροδιτα": {"c": 1},
+            },
+        )
+        CorpusManager()
+        reset_stores()
+        self.assertIndexed(TEXTS)
+        self.assertNotIn("νετας", get_term_info_db())
+        self.assertIn("γενετας", get_term_info_db())
+
+    def test_new_tokenizer_version_reindexes(self):
+        self.write_texts(TEXTS)
+        CorpusManager()
+        generation = utils.get_index_generation()
+        with mock.patch.object(GreekText, "TOKENIZER_VERSION", 3):
+            CorpusManager()
+        registry = get_doc_registry()
+        self.assertTrue(all(e["tokenizer"] == [2, 3] for e in registry.values()))
+        self.assertEqual(utils.get_index_generation(), generation + 1)
+        reset_stores()
+        # counts of texts indexed again are not added to the previous ones
+        self.assertIndexed(TEXTS)
+        CorpusManager()
+        self.assertEqual(utils.get_index_generation(), generation + 2)
+        # nothing to do once every text has the current version
+        CorpusManager()
+        self.assertEqual(utils.get_index_generation(), generation + 2)
+
+    def test_rebuild(self):
+        self.write_texts(TEXTS)
+        CorpusManager()
+        # stray postings that the registry does not know of
+        term_db = get_term_info_db()
+        term_db["ταρ"] = {"a": 1}
+        term_db["γενετας"]["c"] = 1
+        utils.save_term_info_db(term_db)
+        CorpusManager()
+        self.assertIn("ταρ", get_term_info_db())
+        CorpusManager(rebuild=True)
+        reset_stores()
+        self.assertIndexed(TEXTS)
+
+
+if __name__ == "__main__":
+    unittest.main()
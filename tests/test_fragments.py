@@ -0,0 +1,173 @@
+"""!
+\file test_fragments.py
+
+Tests of wildcard terms for fragmentary texts
+"""
+# wildcard parsing, Leiden lacunae and wildcard lookups in the term index
+
+import random
+import re
+import unittest
+
+from agsearch.fragments import fragment_terms
+from agsearch.fragments import lacuna_segments
+from agsearch.fragments import parse_wildcard
+from agsearch.fragments import render_wildcard
+from agsearch.greekprocessing import GreekProcessing
+from agsearch.smanager import SearchManager
+from agsearch.termindex import TermIndex
+from benchmarks.corpus import CorpusGenerator
+
+## wildcards of the query syntax, translated independently of fragments.py
+SYNTAX = re.compile(r"\?\{(\d+)\}|\?\{(\d+),(\d*)\}|\?|\*|[^?*]")
+
+
+def syntax_regex(pattern: str):
+    "Regular expression of a wildcard pattern written out by hand"
+    parts = []
+    for match in SYNTAX.finditer(pattern):
+        token = match.group(0)
+        if match.group(1) is not None:
+            parts.append(".{" + match.group(1) + "}")
+        elif match.group(2) is not None:
+            parts.append(".{" + match.group(2) + "," + match.group(3) + "}")
+        elif token == "?":
+            parts.append(".")
+        elif token == "*":
+            parts.append(".*")
+        else:
+            parts.append(re.escape(token))
+    return re.compile("".join(parts), re.DOTALL)
+
+
+def random_pattern(term: str, rng: random.Random) -> str:
+    "Replace a few runs of letters of term with wildcards"
+    pattern = ""
+    pos = 0
+    while pos < len(term):
+        size = rng.randint(1, 3)
+        kind = rng.random()
+        if kind < 0.5:
+            pattern += term[pos : pos + size]
+        elif kind < 0.7:
+            pattern += "?" * min(size, len(term) - pos)
+        elif kind < 0.85:
+            pattern += "?{" + str(max(0, size - 1)) + "," + str(size + 1) + "}"
+        else:
+            pattern += "*"
+        pos += size
+    return pattern
+
+
+class TestParseWildcard(unittest.TestCase):
+    def test_syntax(self):
+        self.assertEqual(parse_wildcard("ψα*"), ["ψα", (0, None)])
+        self.assertEqual(parse_wildcard("ε?{2,4}ος"), ["ε", (2, 4), "ος"])
+        self.assertEqual(parse_wildcard("?{3}ος"), [(3, 3), "ος"])
+        self.assertEqual(parse_wildcard("α?{2,}"), ["α", (2, None)])
+        self.assertEqual(parse_wildcard("θεος"), ["θεος"])
+        self.assertEqual(parse_wildcard(""), [])
+
+    def test_consecutive_gaps_are_merged(self):
+        self.assertEqual(parse_wildcard("α??β"), ["α", (2, 2), "β"])
+        self.assertEqual(parse_wildcard("α?*β"), ["α", (1, None), "β"])
+        self.assertEqual(parse_wildcard("α?{1,2}?{3,4}"), ["α", (4, 6)])
+
+    def test_reversed_range(self):
+        self.assertEqual(parse_wildcard("α?{4,2}"), ["α", (4, 4)])
+
+    def test_render_roundtrip(self):
+        for pattern in ["ψα*", "ε?{2,4}ος", "??ος", "α?*", "θεος", "?{2,}α"]:
+            segments = parse_wildcard(pattern)
+            self.assertEqual(parse_wildcard(render_wildcard(segments)), segments)
+
+
+class TestLacunae(unittest.TestCase):
+    def test_metrical_signs(self):
+        self.assertEqual(lacuna_segments("⏑⏑––"), [(1, 3), (1, 3), (1, 4), (1, 4)])
+        self.assertEqual(lacuna_segments("⏓–⏑"), [(1, 4), (1, 4), (1, 3)])
+
+    def test_estimated_length(self):
+        self.assertEqual(lacuna_segments("ca. 5"), [(3, 7)])
+        self.assertEqual(lacuna_segments("c.3"), [(1, 5)])
+        self.assertEqual(lacuna_segments("ca. 1"), [(0, 3)])
+
+    def test_dots_and_dashes(self):
+        self.assertEqual(lacuna_segments("..."), [(1, 1)] * 3)
+        self.assertEqual(lacuna_segments("— — —"), [(0, None)] * 3)
+
+    def test_restored_words(self):
+        self.assertEqual(lacuna_segments("ν ἀγαθ"), ["ν", None, "ἀ", "γ", "α", "θ"])
+
+
+class TestFragmentTerms(unittest.TestCase):
+    def setUp(self):
+        self.normalize = SearchManager(None, choice=2, match="wildcard").clean_letters
+
+    def terms(self, line: str):
+        return fragment_terms(line, self.normalize)
+
+    def test_shipped_examples(self):
+        self.assertEqual(self.terms("ΕΜ̣[⏑⏑––]"), ["εμ?{4,14}"])
+        self.assertEqual(self.terms("[γ]α̣ῖ̣ά̣"), ["γαια"])
+        self.assertEqual(self.terms("[γ]α̣ῖ̣ά̣ μ̣ε"), ["γαια", "με"])
+        self.assertEqual(self.terms("ψα[— — —]"), ["ψα*"])
+
+    def test_estimates_and_dots(self):
+        self.assertEqual(self.terms("[ca. 5]ος λ[...]ος"), ["?{3,7}ος", "λ???ος"])
+
+    def test_unclosed_brackets(self):
+        # an opening bracket runs to the end of the line
+        self.assertEqual(self.terms("ψα[— —"), ["ψα*"])
+        self.assertEqual(self.terms("ψα[...ος"), ["ψα???ος"])
+        # a closing bracket runs from the start of the line
+        self.assertEqual(self.terms("— —]ος"), ["*ος"])
+        self.assertEqual(self.terms("..]ος θεος"), ["??ος", "θεος"])
+
+    def test_lacuna_alone_is_dropped(self):
+        self.assertEqual(self.terms("[— — —]"), [])
+        self.assertEqual(self.terms("θεος [...] θεου"), ["θεος", "θεου"])
+
+    def test_typed_wildcards(self):
+        self.assertEqual(self.terms("Θε?{1,2}ς *ος"), ["θε?{1,2}ς", "*ος"])
+
+
+class TestWildcardTerms(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        proc = GreekProcessing("")
+        generator = CorpusGenerator(seed=4, vocabulary_size=5000)
+        terms = set(proc.remove_accent(proc.to_lower(w)) for w in generator.vocabulary)
+        cls.terms = sorted(t for t in terms if t)
+        cls.index = TermIndex({t: {"doc": 1} for t in cls.terms})
+
+    def check(self, pattern: str) -> None:
+        regex = syntax_regex(pattern)
+        expected = [t for t in self.terms if regex.fullmatch(t) is not None]
+        self.assertEqual(self.index.wildcard_terms(pattern), expected, pattern)
+        self.assertEqual(self.index.match(pattern, "wildcard"), expected, pattern)
+
+    def test_against_full_scan(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            self.check(random_pattern(rng.choice(self.terms), rng))
+
+    def test_special_patterns(self):
+        term = self.terms[len(self.terms) // 2]
+        for pattern in [
+            term,
+            term + "*",
+            "*" + term[-2:],
+            "?" + term[1:],
+            term[:1] + "*",
+            "*" + term[1:2] + "*",
+            "?{2,3}",
+            "*",
+            "ωωωω*",
+            "",
+        ]:
+            self.check(pattern)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+"""!
+\file test_fuzzy.py
+
+Tests of orthographic variant matching
+"""
+# weighted edit distance and symmetric delete index against a full scan
+
+import math
+import random
+import unittest
+
+from agsearch.fuzzy import FUZZY_MIN_LENGTH
+from agsearch.fuzzy import VARIANT_COSTS
+from agsearch.fuzzy import FuzzyIndex
+from agsearch.fuzzy import variant_key
+from agsearch.fuzzy import variant_weight
+from agsearch.fuzzy import weighted_distance
+from agsearch.greekprocessing import GreekProcessing
+from benchmarks.corpus import CorpusGenerator
+
+## tolerance of summed costs
+EPSILON = 1e-9
+
+
+class TestWeightedDistance(unittest.TestCase):
+    def assertDistance(self, first: str, second: str, expected: float) -> None:
+        self.assertAlmostEqual(
+            weighted_distance(first, second), expected, delta=EPSILON
+        )
+        self.assertAlmostEqual(
+            weighted_distance(second, first), expected, delta=EPSILON
+        )
+
+    def test_identical(self):
+        self.assertEqual(weighted_distance("θεος", "θεος"), 0.0)
+        self.assertEqual(weighted_distance("", ""), 0.0)
+
+    def test_itacism(self):
+        self.assertDistance("σωσιγενης", "σωσιγενις", 0.3)
+        self.assertDistance("ειρηνη", "ιρηνη", 0.3)
+        self.assertDistance("καισαρ", "κεσαρ", 0.3)
+        self.assertDistance("λυπη", "λοιπη", 0.3)
+        # two variants add up
+        self.assertDistance("ειρηνη", "ιρινη", 0.6)
+
+    def test_other_variants(self):
+        self.assertDistance("θεος", "θεως", 0.3)
+        self.assertDistance("νομος", "νομους", 0.5)
+        self.assertDistance("σμυρνα", "ζμυρνα", 0.5)
+        self.assertDistance("θεος", "θεοσ", 0.1)
+        self.assertDistance("συμβιος", "συνβιος", 0.5)
+
+    def test_doubled_consonants(self):
+        self.assertDistance("αππολλωνιος", "απολλωνιος", 0.4)
+        self.assertDistance("απολλωνιος", "απολωνιος", 0.4)
+        self.assertDistance("αππολλωνιος", "απολωνιος", 0.8)
+
+    def test_plain_edits(self):
+        self.assertDistance("θεος", "θεου", 1.0)
+        self.assertDistance("θεος", "θος", 1.0)
+        self.assertDistance("", "θεος", 4.0)
+        self.assertDistance("αβγδ", "δγβα", 4.0)
+
+    def test_limit(self):
+        self.assertEqual(weighted_distance("θεος", "θεου", limit=1.0), 1.0)
+        self.assertEqual(weighted_distance("θεος", "θεου", limit=0.9), math.inf)
+        self.assertEqual(weighted_distance("θεος", "θεοισιν", limit=2.0), math.inf)
+        self.assertAlmostEqual(
+            weighted_distance("σωσιγενης", "σωσιγενις", limit=0.3), 0.3, delta=EPSILON
+        )
+        self.assertEqual(
+            weighted_distance("σωσιγενης", "σωσιγενις", limit=0.2), math.inf
+        )
+        # the cutoff never changes distances within the limit
+        rng = random.Random(0)
+        letters = "αεηιουωσςλνμκχ"
+        for _ in range(500):
+            first = "".join(rng.choice(letters) for _ in range(rng.randint(0, 7)))
+            second = "".join(rng.choice(letters) for _ in range(rng.randint(0, 7)))
+            full = weighted_distance(first, second)
+            limit = rng.choice([0.3, 0.5, 1.0, 1.5, 2.0])
+            cut = weighted_distance(first, second, limit)
+            if full <= limit:
+                self.assertAlmostEqual(cut, full, delta=EPSILON)
+            else:
+                self.assertEqual(cut, math.inf)
+
+    def test_variant_weight(self):
+        self.assertEqual(variant_weight(0.0), 1.0)
+        self.assertAlmostEqual(variant_weight(1.0, 0.5), 0.5)
+        self.assertAlmostEqual(variant_weight(0.3, 0.5), 0.5**0.3)
+
+    def test_variant_key(self):
+        self.assertEqual(variant_key("σωσιγενης"), variant_key("σωσιγενις"))
+        self.assertEqual(variant_key("φιλος"), variant_key("πιλως"))
+        self.assertEqual(variant_key("λυπη"), variant_key("λοιπη"))
+        self.assertEqual(variant_key("καισαρ"), variant_key("κεσαρ"))
+        self.assertEqual(variant_key("αππολλωνιος"), variant_key("απολωνιος"))
+        self.assertNotEqual(variant_key("θεος"), variant_key("θεου"))
+        # a variant spelling never changes the key, whatever its context
+        rng = random.Random(3)
+        letters = "αεηιουωσςλνμκχγπφτ"
+        for first, second, _ in VARIANT_COSTS:
+            for _ in range(200):
+                before = "".join(rng.choice(letters) for _ in range(rng.randint(0, 4)))
+                after = "".join(rng.choice(letters) for _ in range(rng.randint(0, 4)))
+                self.assertEqual(
+                    variant_key(before + first + after),
+                    variant_key(before + second + after),
+                )
+
+
+class TestFuzzyIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        proc = GreekProcessing("")
+        generator = CorpusGenerator(seed=5, vocabulary_size=2000)
+        terms = set(proc.remove_accent(proc.to_lower(w)) for w in generator.vocabulary)
+        # itacistic and simplified spellings of some terms, so that there
+        # are variants to find
+        rng = random.Random(1)
+        for term in sorted(terms)[::10]:
+            terms.add(term.replace("ι", "η", 1).replace("λλ", "λ"))
+            terms.add(term.replace("ο", "ω", 1))
+            if len(term) > 4:
+                pos = rng.randrange(len(term))
+                terms.add(term[:pos] + term[pos + 1 :])
+        cls.terms = sorted(t for t in terms if t)
+        cls.index = FuzzyIndex(cls.terms)
+
+    def brute_force(self, term: str, max_distance: float) -> list:
+        matches = []
+        for candidate in self.terms:
+            distance = weighted_distance(term, candidate, max_distance)
+            if distance <= max_distance:
+                matches.append((candidate, distance))
+        matches.sort(key=lambda x: (x[1], x[0]))
+        return matches
+
+    def assertMatches(self, found: list, expected: list, term: str) -> None:
+        self.assertEqual([t for t, _ in found], [t for t, _ in expected], term)
+        for (_, d1), (_, d2) in zip(found, expected):
+            self.assertAlmostEqual(d1, d2, delta=EPSILON)
+
+    def test_against_full_scan(self):
+        rng = random.Random(2)
+        queries = [t for t in self.terms if len(t) >= FUZZY_MIN_LENGTH]
+        found_variants = 0
+        for i, term in enumerate(rng.sample(queries, 60)):
+            # one edit and variants only, sometimes a larger distance,
+            # which compares all terms
+            distances = [1.0, 0.5, 1.3] if i % 6 == 0 else [1.0, 0.5]
+            for max_distance in distances:
+                expected = self.brute_force(term, max_distance)
+                found = self.index.lookup(term, max_distance)
+                self.assertMatches(found, expected, term)
+                found_variants += len(found) > 1
+        self.assertGreater(found_variants, 20)
+
+    def test_query_outside_lexicon(self):
+        term = "σωσιγενης"
+        index = FuzzyIndex(["σωσιγενις", "σωσιγενην", "σωσιγενους", "θεος"])
+        self.assertEqual(
+            index.lookup(term, 1.0), [("σωσιγενις", 0.3), ("σωσιγενην", 1.0)]
+        )
+        self.assertEqual(index.lookup(term, 0.2), [])
+
+    def test_short_terms_match_same_key_only(self):
+        index = FuzzyIndex(["νιν", "νην", "νον", "νι"])
+        # νι is one edit away but has another key
+        self.assertEqual([t for t, _ in index.lookup("νιν")], ["νιν", "νην", "νον"])
+
+
+if __name__ == "__main__":
+    unittest.main()
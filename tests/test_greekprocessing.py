@@ -0,0 +1,145 @@
+"""!
+\file test_greekprocessing.py
+
+Tests of greek text cleaning
+"""
+# precompiled normalizer against the cltk and greek_accentuation pipeline
+
+import random
+import unicodedata
+import unittest
+
+from cltk.corpus.greek.alphabet import filter_non_greek
+from cltk.stop.greek.stops import STOPS_LIST
+from greek_accentuation.characters import base
+
+from agsearch import maketables
+from agsearch.greekprocessing import GreekProcessing
+from agsearch.greekprocessing import get_normalizer
+from agsearch.utils import GREEK_PUNCTUATION
+from agsearch.utils import PUNCTUATIONS
+from benchmarks.corpus import CorpusGenerator
+
+## characters delimiting tokens besides white space
+DELIMITERS = set(PUNCTUATIONS + GREEK_PUNCTUATION)
+
+
+def reference_stop_words(txt: str) -> str:
+    "Replace whole tokens that are stop words with a space, char by char"
+    stop_words = set(STOPS_LIST)
+    # the list spells acute accents with oxia, texts usually with tonos
+    stop_words.update(unicodedata.normalize("NFC", w) for w in STOPS_LIST)
+    out = []
+    token = ""
+    for ch in txt + " ":
+        if ch.isspace() or ch in DELIMITERS:
+            out.append(" " if token in stop_words else token)
+            out.append(ch)
+            token = ""
+        else:
+            token += ch
+    return "".join(out)[:-1]
+
+
+def reference_clean_text(txt: str) -> str:
+    "Cleaning with cltk and greek_accentuation, one pass per step"
+    txt = reference_stop_words(txt.lower())
+    for punk in PUNCTUATIONS:
+        txt = txt.replace(punk, " ")
+    return "".join(base(ch) for ch in txt)
+
+
+def mixed_strings(count: int, seed: int) -> list:
+    """!
+    \brief random strings of greek, latin and cyrillic letters, accents,
+    digits, punctuations, letterlike symbols, white space and stop words
+    """
+    rng = random.Random(seed)
+    pool = (
+        [chr(c) for c in range(0x0370, 0x0400)]
+        + [chr(c) for c in range(0x1F00, 0x2000)]
+        + [chr(c) for c in range(0x00C0, 0x0180)]
+        + [chr(c) for c in range(0x0400, 0x0460)]
+        + [chr(c) for c in range(0x2000, 0x2400)]
+        + [chr(c) for c in range(0x0300, 0x0370)]
+        + list("abcXYZ0123456789 \t\n()[]<>⟦⟧-")
+        + list(PUNCTUATIONS)
+        + GREEK_PUNCTUATION
+    )
+    strings = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(0, 12)):
+            if rng.random() < 0.3:
+                parts.append(" " + rng.choice(STOPS_LIST) + " ")
+            else:
+                parts.append("".join(rng.choices(pool, k=rng.randint(1, 6))))
+        strings.append("".join(parts))
+    return strings
+
+
+class TestGreekNormalizer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        generator = CorpusGenerator(seed=6, vocabulary_size=2000)
+        cls.samples = [generator.text() for _ in range(50)]
+        cls.samples += mixed_strings(500, seed=7)
+        cls.samples += ["", " ", "ἄρχω", "Ἀθῆναι, καὶ τὰ ἄλλα· τί;"]
+
+    def test_remove_accent(self):
+        normalizer = get_normalizer()
+        for txt in self.samples:
+            expected = "".join(base(ch) for ch in txt)
+            self.assertEqual(normalizer.remove_accent(txt), expected, txt)
+
+    def test_remove_non_greek(self):
+        normalizer = get_normalizer()
+        for txt in self.samples:
+            self.assertEqual(
+                normalizer.remove_non_greek(txt), filter_non_greek(txt), txt
+            )
+
+    def test_clean_text(self):
+        proc = GreekProcessing("")
+        for txt in self.samples:
+            self.assertEqual(proc.clean_text(txt), reference_clean_text(txt), txt)
+
+    def test_tables_are_up_to_date(self):
+        self.assertTrue(
+            maketables.tables_up_to_date(),
+            "run python -m agsearch.maketables to generate tables.py",
+        )
+
+
+class TestTokens(unittest.TestCase):
+    def test_words_containing_stop_words_are_kept(self):
+        normalizer = get_normalizer()
+        # the former substring removal cut γενέτας into νέτας, ἐνθάδε into
+        # θάδε and τοιγὰρ into τοι
+        tokens = list(normalizer.tokens("Ἐνθάδε κεῖται ὁ γενέτας, τοιγὰρ καὶ δέ"))
+        self.assertEqual(tokens, ["ενθαδε", "κειται", "γενετας", "τοιγαρ"])
+        for word in ["γενέτας", "ἐνθάδε", "τοιγὰρ"]:
+            self.assertNotEqual(reference_stop_words(word), " ")
+            self.assertTrue(any(s in word for s in STOPS_LIST if len(s) > 1))
+
+    def test_stop_words_are_dropped(self):
+        normalizer = get_normalizer()
+        text = " ".join(STOPS_LIST) + " Καὶ, καί· ΚΑΊ."
+        self.assertEqual(list(normalizer.tokens(text)), [])
+        self.assertEqual(list(GreekProcessing("").tokenize(text)), [])
+
+    def test_tokenize_is_clean_text_split(self):
+        proc = GreekProcessing("")
+        generator = CorpusGenerator(seed=8, vocabulary_size=2000)
+        for _ in range(50):
+            line = generator.text().split("\n")[0]
+            expected = [
+                t
+                for t in (proc.clean_chunk(w) for w in proc.clean_text(line).split())
+                if t
+            ]
+            self.assertEqual(list(proc.tokenize(line)), expected, line)
+
+
+if __name__ == "__main__":
+    unittest.main()
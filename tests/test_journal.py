@@ -0,0 +1,95 @@
+"""!
+\file test_journal.py
+
+Tests of the write ahead journal
+"""
+# replay of journaled operations after a crash
+
+import json
+import os
+import tempfile
+import unittest
+
+from agsearch.journal import Journal
+from agsearch.store import JsonStore
+
+
+def set_item(data: dict, payload: list) -> None:
+    data[payload[0]] = payload[1]
+
+
+OPERATIONS = {"set": set_item}
+
+
+def read_json(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json(path: str, data: dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "docinfo.json")
+        self.journal_path = self.db_path + ".journal"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_store(self) -> JsonStore:
+        journal = Journal(self.journal_path, OPERATIONS)
+        return JsonStore(self.db_path, read_json, write_json, {}, journal=journal)
+
+    def test_replay(self):
+        journal = Journal(self.journal_path, OPERATIONS)
+        journal.append("set", ["a", 1])
+        journal.append("set", ["b", 2])
+        journal.append("set", ["a", 3])
+        data = {"c": 0}
+        self.assertEqual(journal.replay(data), 3)
+        self.assertEqual(data, {"a": 3, "b": 2, "c": 0})
+        self.assertEqual(len(journal), 3)
+        journal.clear()
+        self.assertEqual(len(journal), 0)
+        journal.clear()
+
+    def test_unterminated_last_line_is_ignored(self):
+        journal = Journal(self.journal_path, OPERATIONS)
+        journal.append("set", ["a", 1])
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"op": "set", "payload": ["b", ')
+        data: dict = {}
+        self.assertEqual(journal.replay(data), 1)
+        self.assertEqual(data, {"a": 1})
+
+    def test_unknown_operation(self):
+        journal = Journal(self.journal_path, OPERATIONS)
+        with self.assertRaises(ValueError):
+            journal.append("drop", None)
+        self.assertFalse(os.path.exists(self.journal_path))
+
+    def test_store_replays_after_crash(self):
+        write_json(self.db_path, {"a": 0})
+        store = self.make_store()
+        store.apply("set", ["a", 1], flush=False)
+        store.apply("set", ["b", 2], flush=False)
+        # the process dies before flush, the file is unchanged
+        self.assertEqual(read_json(self.db_path), {"a": 0})
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"op": "set"')
+        self.assertEqual(self.make_store().load(), {"a": 1, "b": 2})
+
+    def test_store_flush_clears_journal(self):
+        store = self.make_store()
+        store.apply("set", ["a", 1])
+        self.assertFalse(os.path.exists(self.journal_path))
+        self.assertEqual(read_json(self.db_path), {"a": 1})
+        self.assertEqual(self.make_store().load(), {"a": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+"""!
+\file test_positions.py
+
+Tests of the positional index and phrase search
+"""
+# occurrence encoding, phrase and NEAR/k spans against a brute force scan
+
+import os
+import random
+import tempfile
+import unittest
+
+from agsearch.phraseinfo import PhraseInfo
+from agsearch.positions import PositionalIndex
+from agsearch.positions import decode_occurrences
+from agsearch.positions import encode_occurrences
+from agsearch.positions import near_spans
+from agsearch.positions import phrase_spans
+from agsearch.positions import write_positional_index
+
+## small vocabulary, so that phrases and repeated terms are frequent
+VOCABULARY = ["a", "b", "c"]
+
+
+def random_chunks(rng: random.Random) -> list:
+    "Tokens of each chunk of a document, some chunks have a single token"
+    return [
+        [rng.choice(VOCABULARY) for _ in range(rng.randint(1, 8))]
+        for _ in range(rng.randint(1, 5))
+    ]
+
+
+def occurrences_of(chunks: list, term: str) -> list:
+    return [
+        (c, o)
+        for c, tokens in enumerate(chunks)
+        for o, t in enumerate(tokens)
+        if t == term
+    ]
+
+
+def brute_phrase(chunks: list, phrase: list) -> list:
+    "Spans where the tokens of a chunk are the phrase"
+    spans = []
+    for c, tokens in enumerate(chunks):
+        for o in range(len(tokens) - len(phrase) + 1):
+            if tokens[o : o + len(phrase)] == phrase:
+                spans.append((c, o, o + len(phrase) - 1))
+    return spans
+
+
+def brute_near(left: list, right: list, distance: int) -> list:
+    """!
+    \brief spans covering a left and a right span of the same chunk whose
+    gap, in either order, is at most distance
+    """
+    spans = set()
+    for chunk, start, end in left:
+        for r_chunk, r_start, r_end in right:
+            if r_chunk != chunk or (r_start, r_end) == (start, end):
+                continue
+            if max(r_start - end, start - r_end) <= distance:
+                spans.add((chunk, min(start, r_start), max(end, r_end)))
+    return sorted(spans)
+
+
+def random_phrase(rng: random.Random) -> list:
+    return [rng.choice(VOCABULARY) for _ in range(rng.randint(1, 3))]
+
+
+class TestOccurrenceEncoding(unittest.TestCase):
+    def roundtrip(self, occurrences: list) -> None:
+        encoded = encode_occurrences(occurrences)
+        self.assertEqual(decode_occurrences(encoded, 0, len(encoded)), occurrences)
+
+    def test_chunk_changes(self):
+        self.roundtrip([])
+        self.roundtrip([(0, 0)])
+        # offsets start again from zero in a new chunk, even when they are
+        # smaller than the last offset of the previous chunk
+        self.roundtrip([(0, 5), (0, 9), (1, 0), (1, 3), (4, 2), (200, 1000)])
+        self.roundtrip([(3, 7), (4, 7), (5, 0)])
+
+    def test_random(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            occurrences = sorted(
+                set(
+                    (rng.randint(0, 50), rng.randint(0, 300))
+                    for _ in range(rng.randint(0, 40))
+                )
+            )
+            self.roundtrip(occurrences)
+
+    def test_decode_inside_buffer(self):
+        first = encode_occurrences([(0, 1), (2, 3)])
+        second = encode_occurrences([(1, 4), (1, 6)])
+        buf = b"\xff" + first + second
+        start = 1 + len(first)
+        self.assertEqual(decode_occurrences(buf, start, len(buf)), [(1, 4), (1, 6)])
+
+
+class TestSpans(unittest.TestCase):
+    def test_repeated_terms(self):
+        chunks = [["a", "a", "a", "b"], ["a", "a"]]
+        a = occurrences_of(chunks, "a")
+        self.assertEqual(phrase_spans([a, a]), [(0, 0, 1), (0, 1, 2), (1, 0, 1)])
+        self.assertEqual(phrase_spans([a, a, a]), [(0, 0, 2)])
+
+    def test_chunk_boundaries(self):
+        chunks = [["b", "a"], ["b", "c"], ["a"]]
+        a = occurrences_of(chunks, "a")
+        b = occurrences_of(chunks, "b")
+        c = occurrences_of(chunks, "c")
+        # "a b" spans two chunks and does not match
+        self.assertEqual(phrase_spans([a, b]), [])
+        # phrases ending and starting a chunk match
+        self.assertEqual(phrase_spans([b, a]), [(0, 0, 1)])
+        self.assertEqual(phrase_spans([b, c]), [(1, 0, 1)])
+        # nor does a NEAR across chunks
+        self.assertEqual(near_spans(phrase_spans([a]), phrase_spans([c]), 5), [])
+
+    def test_near_both_orders(self):
+        chunks = [["a", "c", "b", "c", "c", "a"]]
+        a = phrase_spans([occurrences_of(chunks, "a")])
+        b = phrase_spans([occurrences_of(chunks, "b")])
+        # b is two tokens after the first a and three before the second one
+        self.assertEqual(near_spans(a, b, 1), [])
+        self.assertEqual(near_spans(a, b, 2), [(0, 0, 2)])
+        self.assertEqual(near_spans(a, b, 3), [(0, 0, 2), (0, 2, 5)])
+        self.assertEqual(near_spans(b, a, 3), near_spans(a, b, 3))
+
+    def test_near_same_term(self):
+        chunks = [["a", "b", "a"]]
+        a = phrase_spans([occurrences_of(chunks, "a")])
+        # an occurrence is not near itself
+        self.assertEqual(near_spans(a, a, 1), [])
+        self.assertEqual(near_spans(a, a, 2), [(0, 0, 2)])
+
+    def test_random_against_brute_force(self):
+        rng = random.Random(1)
+        for _ in range(1000):
+            chunks = random_chunks(rng)
+            first = random_phrase(rng)
+            second = random_phrase(rng)
+            left = phrase_spans([occurrences_of(chunks, t) for t in first])
+            right = phrase_spans([occurrences_of(chunks, t) for t in second])
+            self.assertEqual(left, brute_phrase(chunks, first))
+            self.assertEqual(right, brute_phrase(chunks, second))
+            distance = rng.randint(0, 4)
+            expected = brute_near(left, right, distance)
+            self.assertEqual(near_spans(left, right, distance), expected)
+            self.assertEqual(near_spans(right, left, distance), expected)
+
+
+class TestPhraseInfo(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "positions.bin")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_against_brute_force(self):
+        rng = random.Random(2)
+        docs = {"doc" + str(i): random_chunks(rng) for i in range(30)}
+        postings: dict = {}
+        for doc_id, chunks in docs.items():
+            for term in VOCABULARY:
+                occurrences = occurrences_of(chunks, term)
+                if occurrences:
+                    postings.setdefault(term, {})[doc_id] = encode_occurrences(
+                        occurrences
+                    )
+        write_positional_index(self.path, postings)
+        with PositionalIndex(self.path) as index:
+            for term, encoded in postings.items():
+                self.assertEqual(index.encoded(term), encoded)
+            for _ in range(200):
+                first = random_phrase(rng)
+                second = random_phrase(rng)
+                distance = rng.randint(0, 3)
+                if rng.random() < 0.5:
+                    query = " ".join(first)
+                else:
+                    query = " ".join(first) + " NEAR/" + str(distance) + " "
+                    query += " ".join(second)
+                expected = {}
+                for doc_id, chunks in docs.items():
+                    spans = brute_phrase(chunks, first)
+                    if "NEAR" in query:
+                        spans = brute_near(
+                            spans, brute_phrase(chunks, second), distance
+                        )
+                    if spans:
+                        expected[doc_id] = len(spans)
+                searcher = PhraseInfo([query], str.split, index=index)
+                self.assertEqual(searcher.scores(), expected, query)
+
+
+if __name__ == "__main__":
+    unittest.main()
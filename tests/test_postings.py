@@ -0,0 +1,117 @@
+"""!
+\file test_postings.py
+
+Tests of the compact term info database
+"""
+# compact index against the dictionary it is built from
+
+import json
+import random
+import unittest
+
+import numpy as np
+
+from agsearch.postings import CompactIndex
+from agsearch.postings import merge_arrays
+from agsearch.postings import merge_weighted_arrays
+from agsearch.termindex import TermIndex
+from tests.test_binindex import TERMINFO_PATH
+from tests.test_binindex import make_term_db
+
+
+def as_dict(index: CompactIndex, docs: np.ndarray, values: np.ndarray) -> dict:
+    "Postings of document numbers as a doc id to value mapping"
+    return {index.doc_ids[d]: v for d, v in zip(docs.tolist(), values.tolist())}
+
+
+class TestCompactIndex(unittest.TestCase):
+    def check(self, term_db: dict) -> None:
+        index = CompactIndex(term_db)
+        self.assertEqual(len(index), len(term_db))
+        self.assertEqual(list(index), list(term_db))
+        self.assertEqual(dict(index.items()), term_db)
+        self.assertEqual(
+            index.doc_ids, sorted(set(d for c in term_db.values() for d in c))
+        )
+        for term, counts in term_db.items():
+            self.assertIn(term, index)
+            self.assertEqual(index[term], counts)
+            self.assertEqual(index.get(term), counts)
+            self.assertEqual(index.doc_freq(term), len(counts))
+            docs, values = index.arrays(term)
+            self.assertEqual(docs.dtype, np.uint32)
+            self.assertEqual(values.dtype, np.uint32)
+            self.assertTrue(np.all(docs[1:] > docs[:-1]))
+            self.assertEqual(as_dict(index, docs, values), counts)
+        self.assertNotIn("absent", index)
+        self.assertIsNone(index.get("absent"))
+        self.assertEqual(index.doc_freq("absent"), 0)
+        with self.assertRaises(KeyError):
+            index["absent"]
+        with self.assertRaises(KeyError):
+            index.arrays("absent")
+        nb_postings = sum(len(c) for c in term_db.values())
+        self.assertEqual(index.nbytes(), 8 * (len(term_db) + 1) + 8 * nb_postings)
+
+    def test_shipped_database(self):
+        with open(TERMINFO_PATH, "r", encoding="utf-8") as f:
+            self.check(json.load(f))
+
+    def test_synthetic_database(self):
+        self.check(make_term_db(300, seed=2))
+
+    def test_small_databases(self):
+        self.check({})
+        self.check({"α": {"b": 2, "a": 1}, "β": {}, "γ": {"c": 3}})
+
+
+class TestMergeArrays(unittest.TestCase):
+    def setUp(self):
+        self.term_db = make_term_db(100, seed=3)
+        self.index = CompactIndex(self.term_db)
+        self.terms = random.Random(4).sample(sorted(self.term_db), 50)
+
+    def test_merge_arrays(self):
+        for i in range(len(self.terms) - 3):
+            terms = self.terms[i : i + 1 + i % 4]
+            expected: dict = {}
+            for term in terms:
+                for doc_id, count in self.term_db[term].items():
+                    expected[doc_id] = expected.get(doc_id, 0) + count
+            docs, counts = merge_arrays([self.index.arrays(t) for t in terms])
+            self.assertTrue(np.all(docs[1:] > docs[:-1]))
+            self.assertEqual(as_dict(self.index, docs, counts), expected)
+        self.assertEqual(merge_arrays([])[0].shape, (0,))
+
+    def test_merge_weighted_arrays(self):
+        for i in range(len(self.terms) - 3):
+            terms = self.terms[i : i + 1 + i % 4]
+            weights = [1.0 / (1 + j) for j in range(len(terms))]
+            expected: dict = {}
+            for term, weight in zip(terms, weights):
+                for doc_id, count in self.term_db[term].items():
+                    expected[doc_id] = expected.get(doc_id, 0.0) + weight * count
+            docs, values = merge_weighted_arrays(
+                [self.index.arrays(t) for t in terms], weights
+            )
+            self.assertEqual(values.dtype, np.float64)
+            result = as_dict(self.index, docs, values)
+            self.assertEqual(set(result), set(expected))
+            for doc_id, value in result.items():
+                self.assertAlmostEqual(value, expected[doc_id])
+
+    def test_align(self):
+        term_index = TermIndex(self.index)
+        doc_ids = list(reversed(self.index.doc_ids))[::2] + ["absent"]
+        aligned = term_index.align(doc_ids)
+        self.assertIs(term_index.align(doc_ids), aligned)
+        for number, doc_id in enumerate(self.index.doc_ids):
+            position = aligned[number]
+            if doc_id in doc_ids:
+                self.assertEqual(doc_ids[position], doc_id)
+            else:
+                self.assertEqual(position, -1)
+
+
+if __name__ == "__main__":
+    unittest.main()
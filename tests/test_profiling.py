@@ -0,0 +1,220 @@
+"""!
+\file test_profiling.py
+
+Tests of stage timers and counters
+"""
+# recorded metrics, their prometheus exposition and profiling at exit
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from agsearch.corpusmanager import CorpusManager
+from agsearch.profiling import NULL_TIMER
+from agsearch.profiling import PROFILER
+from agsearch.profiling import PROFILE_ENV
+from agsearch.profiling import PROFILE_OUTPUT_ENV
+from agsearch.profiling import Profiler
+from agsearch.profiling import escape_label
+from agsearch.smanager import SearchManager
+from tests.test_corpusmanager import CorpusTestCase
+from tests.test_corpusmanager import TEXTS
+
+## directory containing the agsearch package
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestProfiler(unittest.TestCase):
+    def test_disabled(self):
+        profiler = Profiler()
+
+        @profiler.timed("stage.decorated")
+        def double(x):
+            return 2 * x
+
+        self.assertIs(profiler.timer("stage"), NULL_TIMER)
+        with profiler.timer("stage"):
+            pass
+        self.assertEqual(double(2), 4)
+        profiler.count("events")
+        self.assertEqual(profiler.snapshot(), {"timers": {}, "counters": {}})
+
+    def test_timers_and_counters(self):
+        profiler = Profiler(enabled=True)
+
+        @profiler.timed("stage.decorated")
+        def fail():
+            raise ValueError("failed")
+
+        for _ in range(3):
+            with profiler.timer("stage.block"):
+                pass
+        with self.assertRaises(ValueError):
+            fail()
+        with self.assertRaises(KeyError):
+            with profiler.timer("stage.block"):
+                raise KeyError("failed")
+        profiler.count("events")
+        profiler.count("events", 2.5)
+        metrics = profiler.snapshot()
+        self.assertEqual(list(metrics["timers"]), ["stage.block", "stage.decorated"])
+        block = metrics["timers"]["stage.block"]
+        self.assertEqual(block["count"], 4)
+        self.assertGreaterEqual(block["total_s"], block["max_s"])
+        self.assertAlmostEqual(block["mean_s"], block["total_s"] / 4)
+        self.assertEqual(metrics["timers"]["stage.decorated"]["count"], 1)
+        self.assertEqual(metrics["counters"], {"events": 3.5})
+        self.assertEqual(fail.__name__, "fail")
+        profiler.reset()
+        self.assertEqual(profiler.snapshot(), {"timers": {}, "counters": {}})
+
+    def test_record(self):
+        profiler = Profiler(enabled=True)
+        for seconds in [0.5, 2.0, 1.0]:
+            profiler.record("stage", seconds)
+        self.assertEqual(
+            profiler.snapshot()["timers"]["stage"],
+            {"count": 3, "total_s": 3.5, "mean_s": 3.5 / 3, "max_s": 2.0},
+        )
+        lines = profiler.summary().splitlines()
+        self.assertEqual(lines[0], "stage\tcalls\ttotal ms\tmean ms\tmax ms")
+        self.assertEqual(lines[1], "stage\t3\t3500.000\t1166.667\t2000.000")
+
+    def test_threads(self):
+        profiler = Profiler(enabled=True)
+
+        def work():
+            for _ in range(1000):
+                profiler.count("events")
+                profiler.record("stage", 0.001)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        metrics = profiler.snapshot()
+        self.assertEqual(metrics["counters"]["events"], 4000)
+        self.assertEqual(metrics["timers"]["stage"]["count"], 4000)
+
+
+class TestExposition(unittest.TestCase):
+    def setUp(self):
+        self.profiler = Profiler(enabled=True)
+        self.profiler.record("db.read", 0.25)
+        self.profiler.record("db.read", 0.5)
+        self.profiler.record('odd "stage"\\', 1.0)
+        self.profiler.count("cache.hit", 3)
+
+    def test_prometheus(self):
+        expected = [
+            "# HELP agsearch_stage_seconds wall time spent in a stage",
+            "# TYPE agsearch_stage_seconds summary",
+            'agsearch_stage_seconds_sum{stage="db.read"} 0.75',
+            'agsearch_stage_seconds_count{stage="db.read"} 2',
+            'agsearch_stage_seconds_sum{stage="odd \\"stage\\"\\\\"} 1.0',
+            'agsearch_stage_seconds_count{stage="odd \\"stage\\"\\\\"} 1',
+            "# HELP agsearch_stage_max_seconds longest call of a stage",
+            "# TYPE agsearch_stage_max_seconds gauge",
+            'agsearch_stage_max_seconds{stage="db.read"} 0.5',
+            'agsearch_stage_max_seconds{stage="odd \\"stage\\"\\\\"} 1.0',
+            "# HELP agsearch_events_total number of events",
+            "# TYPE agsearch_events_total counter",
+            'agsearch_events_total{counter="cache.hit"} 3.0',
+        ]
+        self.assertEqual(self.profiler.to_prometheus(), "\n".join(expected) + "\n")
+
+    def test_escape_label(self):
+        self.assertEqual(escape_label('a"b\\c\nd'), 'a\\"b\\\\c\\nd')
+
+    def test_dump(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ["metrics.prom", "metrics.txt"]:
+                path = os.path.join(tmp, name)
+                self.profiler.dump(path)
+                with open(path, "r", encoding="utf-8") as f:
+                    self.assertEqual(f.read(), self.profiler.to_prometheus())
+            path = os.path.join(tmp, "metrics.json")
+            self.profiler.dump(path)
+            with open(path, "r", encoding="utf-8") as f:
+                self.assertEqual(json.load(f), self.profiler.snapshot())
+
+
+class TestInstrumentedStages(CorpusTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_texts(TEXTS)
+        PROFILER.reset()
+        patch = mock.patch.object(PROFILER, "enabled", True)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.addCleanup(PROFILER.reset)
+
+    def test_update_and_search(self):
+        CorpusManager()
+        manager = SearchManager(None, choice=3, top_k=2)
+        manager.search_text("γενέτας")
+        manager.search_text("γενέτας")
+        metrics = PROFILER.snapshot()
+        for stage in [
+            "corpus.update",
+            "corpus.get_term_info_diff",
+            "corpus.index_texts",
+            "search.make_searcher",
+            "preprocess.search_terms",
+        ]:
+            self.assertIn(stage, metrics["timers"])
+        self.assertEqual(metrics["timers"]["corpus.update"]["count"], 1)
+        self.assertEqual(metrics["timers"]["search.make_searcher"]["count"], 1)
+        self.assertEqual(metrics["counters"]["corpus.texts_added"], 3)
+        self.assertEqual(metrics["counters"]["cache.miss"], 1)
+        self.assertEqual(metrics["counters"]["cache.hit"], 1)
+        self.assertIn(
+            'agsearch_events_total{counter="cache.hit"} 1.0', PROFILER.to_prometheus()
+        )
+
+
+class TestProfileEnvironment(unittest.TestCase):
+    def run_profiled(self, env: dict) -> subprocess.CompletedProcess:
+        "Run a timed stage in a new interpreter with environment variables"
+        code = (
+            "from agsearch.profiling import PROFILER\n"
+            "with PROFILER.timer('stage.test'):\n"
+            "    PROFILER.count('events')\n"
+        )
+        environ = dict(os.environ)
+        environ.pop(PROFILE_ENV, None)
+        environ.pop(PROFILE_OUTPUT_ENV, None)
+        environ.update(env)
+        return subprocess.run(
+            [sys.executable, "-c", code],
+            check=True,
+            capture_output=True,
+            text=True,
+            cwd=PROJECT_ROOT,
+            env=environ,
+        )
+
+    def test_metrics_written_at_exit(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "metrics.json")
+            result = self.run_profiled({PROFILE_OUTPUT_ENV: path})
+            with open(path, "r", encoding="utf-8") as f:
+                metrics = json.load(f)
+        self.assertEqual(metrics["timers"]["stage.test"]["count"], 1)
+        self.assertEqual(metrics["counters"], {"events": 1})
+        self.assertIn("stage.test\t1\t", result.stderr)
+
+    def test_enabled_by_environment(self):
+        self.assertIn("stage.test", self.run_profiled({PROFILE_ENV: "1"}).stderr)
+        self.assertEqual(self.run_profiled({PROFILE_ENV: "0"}).stderr, "")
+        self.assertEqual(self.run_profiled({}).stderr, "")
+
+
+if __name__ == "__main__":
+    unittest.main()
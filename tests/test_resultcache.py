@@ -0,0 +1,96 @@
+"""!
+\file test_resultcache.py
+
+Tests of the search result cache
+"""
+# on disk tier must only touch its own files, and cached results must follow
+# changes of the text info database
+
+import os
+import tempfile
+import unittest
+
+from agsearch.corpusmanager import CorpusManager
+from agsearch.resultcache import ResultCache
+from agsearch.smanager import SearchManager
+from agsearch.utils import DATA_DIR
+from agsearch.utils import add_to_text_info_db
+from agsearch.utils import get_index_generation
+from tests.test_corpusmanager import CorpusTestCase
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name: str) -> str:
+        path = os.path.join(self.cache_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{}")
+        return path
+
+    def test_new_generation_keeps_other_files(self):
+        notes = self.write("my_notes.json")
+        terms = self.write("terminfo.json")
+        old = self.write("2-" + "a" * 40 + ".json")
+        cache = ResultCache(cache_dir=self.cache_dir)
+        self.assertIsNone(cache.get("k", 3))
+        self.assertTrue(os.path.exists(notes))
+        self.assertTrue(os.path.exists(terms))
+        self.assertFalse(os.path.exists(old))
+
+    def test_key_depends_on_preprocessor(self):
+        greek = ResultCache.make_key(4, "exact", 5, ["χαιρε"], preproc_choice=2)
+        simple = ResultCache.make_key(4, "exact", 5, ["χαιρε"], preproc_choice=1)
+        self.assertNotEqual(greek, simple)
+
+    def test_entry_survives_restart(self):
+        cache = ResultCache(cache_dir=self.cache_dir)
+        cache.put("k", 3, {"results": [1, 2]})
+        other = ResultCache(cache_dir=self.cache_dir)
+        self.assertEqual(other.get("k", 3), {"results": [1, 2]})
+        self.assertIsNone(other.get("k", 4))
+
+
+class TestTextInfoChanges(CorpusTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_texts({"a": "λόγος καὶ ἔργον\n", "b": "θάλασσα\n"})
+        CorpusManager()
+
+    def test_added_text_is_found(self):
+        managers = [
+            SearchManager(None, choice=choice, top_k=5, cache=ResultCache())
+            for choice in [1, 2]
+        ]
+        for manager in managers:
+            self.assertEqual([d for d, _ in manager.search_text("λόγος")], ["a"])
+        with open(os.path.join(DATA_DIR, "normalized", "c.txt"), "w") as f:
+            f.write("λόγος λόγος\n")
+        generation = get_index_generation()
+        add_to_text_info_db(
+            {
+                "c": {
+                    "has_chunks": True,
+                    "local_path": "normalized/c.txt",
+                    "url": "",
+                    "chunk_separator": "\n",
+                }
+            }
+        )
+        self.assertEqual(get_index_generation(), generation + 1)
+        # similarity search reads texts of the text info database, tf-idf
+        # search their postings once the corpus is indexed
+        result = managers[0].search_text("λόγος")
+        self.assertEqual([d for d, _ in result], ["c", "a"])
+        CorpusManager()
+        result = managers[1].search_text("λόγος")
+        self.assertEqual([d for d, _ in result], ["c", "a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
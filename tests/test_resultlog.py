@@ -0,0 +1,157 @@
+"""!
+\file test_resultlog.py
+
+Tests of the append only results log
+"""
+# offset index rebuilding, recovery from interrupted appends and the results
+# databases built on logs
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from agsearch import utils
+from agsearch.bm25info import BM25Info
+from agsearch.corpusmanager import CorpusManager
+from agsearch.resultlog import ResultLog
+from agsearch.utils import DATA_DIR
+from tests.test_corpusmanager import CorpusTestCase
+
+
+class TestResultLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "tfidfinfo.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_append_and_get(self):
+        log = ResultLog(self.path)
+        self.assertEqual(len(log), 0)
+        self.assertEqual(log.append([{"a": 1}, {"b": "χαιρε"}]), [0, 1])
+        self.assertEqual(log.append([{"c": 3}]), [2])
+        self.assertEqual(log.get(1), {"b": "χαιρε"})
+        self.assertEqual(list(log), [{"a": 1}, {"b": "χαιρε"}, {"c": 3}])
+        with self.assertRaises(IndexError):
+            log.get(3)
+
+    def test_rebuilds_missing_index(self):
+        ResultLog(self.path).append([{"a": 1}, {"b": 2}])
+        os.remove(self.path + ".idx")
+        log = ResultLog(self.path)
+        self.assertEqual(len(log), 2)
+        self.assertEqual(log.get(1), {"b": 2})
+
+    def test_rebuilds_stale_index(self):
+        ResultLog(self.path).append([{"a": 1}])
+        # lines written by an append interrupted before the index
+        with open(self.path, "ab") as f:
+            f.write(b'{"b": 2}\n{"c": 3}\n')
+        log = ResultLog(self.path)
+        self.assertEqual(len(log), 3)
+        self.assertEqual(log.get(2), {"c": 3})
+
+    def test_truncates_partial_last_line(self):
+        ResultLog(self.path).append([{"a": 1}, {"b": 2}])
+        size = os.path.getsize(self.path)
+        with open(self.path, "ab") as f:
+            f.write(b'{"c": ')
+        log = ResultLog(self.path)
+        self.assertEqual(len(log), 2)
+        self.assertEqual(os.path.getsize(self.path), size)
+        self.assertEqual(log.append([{"d": 4}]), [2])
+        self.assertEqual(list(log), [{"a": 1}, {"b": 2}, {"d": 4}])
+
+    def test_migrate_and_compact(self):
+        legacy = os.path.join(self.tmp.name, "tfidfinfo.json")
+        with open(legacy, "w", encoding="utf-8") as f:
+            json.dump([{"a": 1}, {"b": 2}, {"a": 1}], f)
+        log = ResultLog(self.path, legacy_path=legacy)
+        self.assertEqual(len(log), 3)
+        self.assertEqual(log.compact(), 2)
+        self.assertEqual(list(log), [{"b": 2}, {"a": 1}])
+        # the legacy database is left as it is
+        with open(legacy, "r", encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)), 3)
+
+    def test_migrate_needs_a_list(self):
+        legacy = os.path.join(self.tmp.name, "tfidfinfo.json")
+        with open(legacy, "w", encoding="utf-8") as f:
+            json.dump({"a": 1}, f)
+        with self.assertRaises(ValueError):
+            len(ResultLog(self.path, legacy_path=legacy))
+
+    def test_compact_keep_last(self):
+        log = ResultLog(self.path)
+        log.append([{"a": 1}, {"b": 2}, {"c": 3}, {"b": 2}])
+        self.assertEqual(log.compact(keep_last=2), 2)
+        self.assertEqual(list(log), [{"c": 3}, {"b": 2}])
+        self.assertEqual(log.get(0), {"c": 3})
+
+    def test_rewrite(self):
+        log = ResultLog(self.path)
+        log.append([{"a": 1}])
+        log.rewrite([{"b": 2}, {"c": 3}])
+        self.assertEqual(len(log), 2)
+        self.assertEqual(log.get(1), {"c": 3})
+        self.assertEqual(log.append([{"d": 4}]), [2])
+
+    def test_concurrent_appends(self):
+        log = ResultLog(self.path)
+
+        def append(worker: int) -> None:
+            for i in range(20):
+                log.append([{"worker": worker, "i": i}, {"worker": worker}])
+
+        threads = [threading.Thread(target=append, args=(w,)) for w in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        entries = list(ResultLog(self.path))
+        self.assertEqual(len(entries), 160)
+        self.assertEqual([log.get(i) for i in range(160)], entries)
+        # entries of an append stay together
+        for first, second in zip(entries[::2], entries[1::2]):
+            self.assertEqual(second, {"worker": first["worker"]})
+        for worker in range(4):
+            numbers = [e["i"] for e in entries[::2] if e["worker"] == worker]
+            self.assertEqual(numbers, list(range(20)))
+
+
+class TestResultDatabases(CorpusTestCase):
+    def test_add_and_save(self):
+        self.assertEqual(utils.get_score_info_db(), [])
+        self.assertEqual(utils.add_to_score_info_db({"a": 1}), 0)
+        self.assertEqual(utils.add_many_to_score_info_db([{"b": 2}, {"c": 3}]), [1, 2])
+        self.assertEqual(utils.get_score_info_db(), [{"a": 1}, {"b": 2}, {"c": 3}])
+        utils.save_score_info_db([{"d": 4}])
+        self.assertEqual(utils.get_score_info_db(), [{"d": 4}])
+        with self.assertRaises(ValueError):
+            utils.add_many_to_tfidf_info_db([{"a": 1}, [2]])
+        self.assertEqual(utils.get_tfidf_info_db(), [])
+
+    def test_legacy_database_is_migrated(self):
+        self.write_json("tfidfinfo.json", [{"a": 1.0}, {"b": 2.0}])
+        self.assertEqual(utils.add_to_tfidf_info_db({"c": 3.0}), 2)
+        self.assertEqual(
+            utils.get_tfidf_info_db(), [{"a": 1.0}, {"b": 2.0}, {"c": 3.0}]
+        )
+        self.assertTrue(os.path.exists(os.path.join(DATA_DIR, "tfidfinfo.json")))
+
+    def test_searcher_results_are_appended(self):
+        self.write_texts({"a": "λόγος καὶ ἔργον\n", "b": "λόγος\n"})
+        CorpusManager()
+        searcher = BM25Info(["λογος"])
+        searcher.search()
+        searcher.save_results()
+        BM25Info.save_many_results([searcher.result_info()] * 2)
+        self.assertEqual(utils.get_bm25_info_db(), [searcher.result_info()] * 3)
+        self.assertEqual(utils.get_score_info_db(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""!
+\file test_safeio.py
+
+Tests of atomic writes and file locks
+"""
+# crash safety of atomic_open and reentrancy of FileLock
+
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from agsearch.safeio import FileLock
+from agsearch.safeio import atomic_open
+
+
+def increment(path: str, times: int) -> None:
+    "Increment the counter in path under its lock, from another process"
+    lock = FileLock(path)
+    for _ in range(times):
+        with lock:
+            with open(path, "r", encoding="utf-8") as f:
+                value = int(f.read())
+            with atomic_open(path) as f:
+                f.write(str(value + 1))
+
+
+class TestAtomicOpen(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "terminfo.json")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("old")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self) -> str:
+        with open(self.path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def test_replaces_file(self):
+        with atomic_open(self.path) as f:
+            f.write("new")
+        self.assertEqual(self.read(), "new")
+        self.assertEqual(os.listdir(self.tmp.name), ["terminfo.json"])
+
+    def test_keeps_old_file_when_write_raises(self):
+        with self.assertRaises(RuntimeError):
+            with atomic_open(self.path) as f:
+                f.write("half written")
+                raise RuntimeError("crash")
+        self.assertEqual(self.read(), "old")
+        self.assertEqual(os.listdir(self.tmp.name), ["terminfo.json"])
+
+    def test_binary_mode(self):
+        with atomic_open(self.path, "wb") as f:
+            f.write(b"\x00\x01")
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"\x00\x01")
+
+
+class TestFileLock(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "terminfo.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reentrant(self):
+        lock = FileLock(self.path)
+        with lock:
+            with lock:
+                self.assertEqual(lock.depth, 2)
+            self.assertEqual(lock.depth, 1)
+            self.assertGreaterEqual(lock.fd, 0)
+        self.assertEqual(lock.depth, 0)
+        self.assertEqual(lock.fd, -1)
+        # released for good, it can be taken again
+        with lock:
+            self.assertEqual(lock.depth, 1)
+
+    def test_blocks_other_threads(self):
+        lock = FileLock(self.path)
+        events = []
+
+        def worker():
+            with lock:
+                events.append("worker")
+
+        with lock:
+            thread = threading.Thread(target=worker)
+            thread.start()
+            time.sleep(0.1)
+            events.append("holder")
+        thread.join()
+        self.assertEqual(events, ["holder", "worker"])
+
+    def test_serializes_processes(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("0")
+        processes = [
+            multiprocessing.Process(target=increment, args=(self.path, 50))
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "200")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""!
+\file test_segments.py
+
+Tests of incremental corpus updates
+"""
+# added, changed and removed texts written as delta segments, and merging
+
+import os
+import unittest
+
+from agsearch import utils
+from agsearch.corpusmanager import CorpusManager
+from agsearch.segments import apply_segment
+from agsearch.utils import DATA_DIR
+from agsearch.utils import TERMINFO_DB_PATH
+from agsearch.utils import TERMINFO_SEGMENTS
+from agsearch.utils import get_doc_registry
+from agsearch.utils import get_index_generation
+from agsearch.utils import get_term_info_db
+from agsearch.utils import merge_term_info_segments
+from agsearch.utils import read_json
+from tests.test_corpusmanager import CorpusTestCase
+from tests.test_corpusmanager import TEXTS
+from tests.test_corpusmanager import reset_stores
+
+
+class TestApplySegment(unittest.TestCase):
+    def test_apply_twice(self):
+        term_db = {"α": {"a": 1, "b": 2}, "β": {"a": 3}, "γ": {"c": 1}}
+        segment = {
+            "removed": {"a": ["α", "β"], "d": ["δ"]},
+            "postings": {"α": {"a": 4}, "ε": {"a": 1}},
+        }
+        expected = {"α": {"a": 4, "b": 2}, "γ": {"c": 1}, "ε": {"a": 1}}
+        self.assertEqual(apply_segment(term_db, segment), expected)
+        self.assertEqual(apply_segment(term_db, segment), expected)
+
+
+class TestIncrementalUpdates(CorpusTestCase):
+    def setUp(self):
+        super().setUp()
+        self.texts = dict(TEXTS)
+        self.write_texts(self.texts)
+        CorpusManager(merge=True)
+        self.base = read_json(TERMINFO_DB_PATH)
+
+    def update(self, texts: dict, **kwargs) -> CorpusManager:
+        "Write texts, index them and read databases from disk again"
+        self.texts = texts
+        self.write_texts(texts)
+        manager = CorpusManager(**kwargs)
+        manager.wait_merge()
+        reset_stores()
+        return manager
+
+    def test_added_text_is_a_segment(self):
+        generation = get_index_generation()
+        self.update(dict(self.texts, d="νέον κείμενον\n"))
+        self.assertEqual(len(TERMINFO_SEGMENTS), 1)
+        segment = TERMINFO_SEGMENTS.read(TERMINFO_SEGMENTS.names()[0])
+        self.assertEqual(segment["removed"], {})
+        self.assertEqual(segment["postings"], {"νεον": {"d": 1}, "κειμενον": {"d": 1}})
+        # the base file is not written again
+        self.assertEqual(read_json(TERMINFO_DB_PATH), self.base)
+        self.assertIndexed(self.texts)
+        self.assertEqual(get_index_generation(), generation + 1)
+
+    def test_changed_text_is_indexed_again(self):
+        texts = dict(self.texts, a="γενέτας γενέτας\nθάλασσα\n")
+        self.update(texts)
+        self.assertIndexed(texts)
+        self.assertEqual(get_term_info_db()["γενετας"], {"a": 2, "b": 1})
+        self.assertNotIn("κειται", get_term_info_db())
+        self.assertEqual(get_doc_registry()["a"]["terms"], ["γενετας", "θαλασσα"])
+
+    def test_removed_text_postings_are_dropped(self):
+        texts = {"a": self.texts["a"], "b": self.texts["b"]}
+        self.update(texts)
+        self.assertIndexed(texts)
+        self.assertNotIn("παροδιτα", get_term_info_db())
+        self.assertEqual(get_term_info_db()["χαιρε"], {"b": 1})
+        self.assertNotIn("c", utils.get_doc_info_db()["lengths"])
+
+    def test_merge_gives_replayed_database(self):
+        self.update(dict(self.texts, d="νέον κείμενον\n"))
+        self.update(dict(self.texts, a="ἄλλος λόγος\n"))
+        self.update({"a": self.texts["a"], "c": "χαῖρε\n"})
+        self.assertEqual(len(TERMINFO_SEGMENTS), 3)
+        replayed = get_term_info_db()
+        self.assertIndexed(self.texts)
+        merge_term_info_segments()
+        self.assertEqual(len(TERMINFO_SEGMENTS), 0)
+        self.assertEqual(read_json(TERMINFO_DB_PATH), replayed)
+        reset_stores()
+        self.assertEqual(get_term_info_db(), replayed)
+        manifest = os.path.basename(TERMINFO_SEGMENTS.manifest_path)
+        segment_files = [
+            n
+            for n in os.listdir(DATA_DIR)
+            if n.startswith(TERMINFO_SEGMENTS.prefix + ".") and n != manifest
+        ]
+        self.assertEqual(segment_files, [])
+
+    def test_background_merge(self):
+        self.update(dict(self.texts, d="νέον\n"))
+        manager = self.update(dict(self.texts, e="κείμενον\n"), max_segments=2)
+        self.assertTrue(manager.merge_thread.daemon)
+        self.assertEqual(len(TERMINFO_SEGMENTS), 0)
+        self.assertIndexed(self.texts)
+
+    def test_same_content_is_not_indexed_again(self):
+        path = os.path.join(DATA_DIR, "normalized", "a.txt")
+        stamp = get_doc_registry()["a"]["stamp"]
+        generation = get_index_generation()
+        # a newer modification time with the same content is only recorded
+        os.utime(path, ns=(stamp[0] + 10**9, stamp[0] + 10**9))
+        CorpusManager()
+        reset_stores()
+        self.assertEqual(len(TERMINFO_SEGMENTS), 0)
+        self.assertEqual(get_index_generation(), generation)
+        self.assertEqual(get_doc_registry()["a"]["stamp"][0], stamp[0] + 10**9)
+        # the same size with another content is indexed again
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.texts["a"].replace("γενέτας", "γενέτης"))
+        CorpusManager()
+        reset_stores()
+        self.assertEqual(len(TERMINFO_SEGMENTS), 1)
+        self.assertEqual(get_index_generation(), generation + 1)
+        self.assertEqual(get_term_info_db()["γενετης"], {"a": 1})
+        self.assertEqual(get_term_info_db()["γενετας"], {"b": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
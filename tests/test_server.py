@@ -0,0 +1,151 @@
+"""!
+\file test_server.py
+
+Tests of the query server
+"""
+# requests sent to servers on a tcp port and on a unix socket
+
+from http.client import HTTPConnection
+import json
+import socket
+import threading
+import unittest
+from unittest import mock
+
+from agsearch.bm25info import BM25Info
+from agsearch.corpusmanager import CorpusManager
+from agsearch.profiling import PROFILER
+from agsearch.server import make_server
+from agsearch.server import warm_up
+from tests.test_corpusmanager import CorpusTestCase
+
+TEXTS = {
+    "a": "λόγος καὶ ἔργον\n",
+    "b": "λόγος λόγος ἵππος\n",
+    "c": "θάλασσα\n",
+}
+
+
+class UnixConnection(HTTPConnection):
+    "Http connection over a unix socket"
+
+    def __init__(self, path: str):
+        super().__init__("localhost")
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+class ServerTestCase(CorpusTestCase):
+    "Corpus served by a query server running in a thread"
+
+    def setUp(self):
+        super().setUp()
+        self.write_texts(TEXTS)
+        CorpusManager()
+        warm_up()
+        self.server = self.make_server()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        super().tearDown()
+
+    def make_server(self):
+        return make_server(port=0, quiet=True)
+
+    def connect(self) -> HTTPConnection:
+        host, port = self.server.server_address[:2]
+        return HTTPConnection(host, port, timeout=10)
+
+    def request(self, method: str, path: str, body=None):
+        "Send request, return status, content type and decoded body"
+        conn = self.connect()
+        try:
+            if isinstance(body, (dict, list)):
+                body = json.dumps(body)
+            conn.request(method, path, body=body)
+            response = conn.getresponse()
+            data = response.read().decode("utf-8")
+            content_type = response.getheader("Content-Type")
+        finally:
+            conn.close()
+        if content_type.startswith("application/json"):
+            return response.status, json.loads(data)
+        return response.status, data
+
+
+class TestQueryServer(ServerTestCase):
+    def test_health(self):
+        self.assertEqual(
+            self.request("GET", "/health"), (200, {"status": "ok", "texts": 3})
+        )
+
+    def test_search(self):
+        query = {"terms": ["λόγος"], "searcher": 3, "top_k": 5}
+        status, body = self.request("POST", "/search", query)
+        self.assertEqual(status, 200)
+        expected = [[d, s] for d, s in BM25Info(["λογος"]).top_k(5)]
+        self.assertEqual(body["results"], expected)
+        self.assertEqual([d for d, _ in expected], ["b", "a"])
+
+    def test_bad_queries(self):
+        for body in ["{not json", "[1, 2]", json.dumps({"text": 3})]:
+            status, response = self.request("POST", "/search", body)
+            self.assertEqual(status, 400, body)
+            self.assertIn("error", response)
+        for query in [
+            {"terms": ["λόγος"], "searcher": 7},
+            {"terms": ["λόγος"], "match": "regex"},
+            {"terms": ["λόγος"], "top_k": "5"},
+            {"terms": ["λόγος"], "max_distance": True},
+            {"query": "λόγος"},
+        ]:
+            self.assertEqual(self.request("POST", "/search", query)[0], 400, query)
+
+    def test_unknown_paths(self):
+        self.assertEqual(self.request("GET", "/search")[0], 404)
+        self.assertEqual(self.request("POST", "/health", {})[0], 404)
+
+    def test_metrics_need_profiling(self):
+        with mock.patch.object(PROFILER, "enabled", False):
+            self.assertEqual(self.request("GET", "/metrics")[0], 404)
+            self.assertEqual(self.request("GET", "/metrics.json")[0], 404)
+        PROFILER.reset()
+        with mock.patch.object(PROFILER, "enabled", True):
+            query = {"terms": ["λόγος"], "searcher": 2, "top_k": 1}
+            self.assertEqual(self.request("POST", "/search", query)[0], 200)
+            status, text = self.request("GET", "/metrics")
+            self.assertEqual(status, 200)
+            self.assertIn(
+                'agsearch_stage_seconds_count{stage="search.make_searcher"}', text
+            )
+            status, metrics = self.request("GET", "/metrics.json")
+        PROFILER.reset()
+        self.assertEqual(status, 200)
+        self.assertEqual(metrics["timers"]["search.make_searcher"]["count"], 1)
+
+
+class TestUnixQueryServer(ServerTestCase):
+    def make_server(self):
+        return make_server(socket_path="agsearch.sock", quiet=True)
+
+    def connect(self) -> HTTPConnection:
+        return UnixConnection(self.server.server_address)
+
+    def test_health_and_search(self):
+        self.assertEqual(self.request("GET", "/health")[1]["texts"], 3)
+        query = {"text": "ἵππος\nθάλασσα", "searcher": 3, "top_k": 5}
+        status, body = self.request("POST", "/search", query)
+        self.assertEqual(status, 200)
+        self.assertEqual([d for d, _ in body["results"]], ["c", "b"])
+        self.assertEqual(self.request("POST", "/search", "{")[0], 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
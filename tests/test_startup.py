@@ -0,0 +1,61 @@
+"""!
+\file test_startup.py
+
+Tests of lazy imports
+"""
+# modules loaded by entry points, checked in new interpreters
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from agsearch.smanager import SEARCHER_CLASSES
+from agsearch.smanager import searcher_class
+from benchmarks.startup import CHECKED_IMPORTS
+from benchmarks.startup import loaded_heavy_modules
+
+## directory containing the agsearch package
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loaded_modules(code: str) -> set:
+    "Modules loaded after running code in a new interpreter"
+    code += "\nimport json, sys; print(json.dumps(sorted(sys.modules)))"
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=PROJECT_ROOT,
+    ).stdout
+    return set(json.loads(out.splitlines()[-1]))
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_entry_points_skip_heavy_modules(self):
+        for module in CHECKED_IMPORTS:
+            self.assertEqual(loaded_heavy_modules(module), [], module)
+
+    def test_searchers_are_imported_on_first_use(self):
+        searchers = set(m for m, _ in SEARCHER_CLASSES.values())
+        modules = loaded_modules("import agsearch.smanager")
+        self.assertEqual(searchers.intersection(modules), set())
+        modules = loaded_modules(
+            "from agsearch.smanager import searcher_class\nsearcher_class(3)"
+        )
+        self.assertEqual(searchers.intersection(modules), {"agsearch.bm25info"})
+        self.assertIn("numpy", modules)
+        self.assertNotIn("sklearn", modules)
+
+    def test_searcher_class(self):
+        for choice, (module, name) in SEARCHER_CLASSES.items():
+            cls = searcher_class(choice)
+            self.assertEqual((cls.__module__, cls.__name__), (module, name))
+        with self.assertRaises(ValueError):
+            searcher_class(5)
+
+
+if __name__ == "__main__":
+    unittest.main()
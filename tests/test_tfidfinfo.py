@@ -0,0 +1,114 @@
+"""!
+\file test_tfidfinfo.py
+
+Tests of tf-idf search
+"""
+# array scoring against a direct computation over a small term database
+
+import math
+import unittest
+
+from agsearch.tfidfinfo import TfIdfInfo
+from tests.test_corpusmanager import CorpusTestCase
+
+## tolerance of scores summed in a different order
+EPSILON = 1e-9
+
+## f is a text without any term, it only counts in the number of texts
+TERM_DB = {
+    "λογος": {"a": 3, "b": 1},
+    "λογοι": {"b": 2, "d": 1},
+    "εργον": {"a": 1, "c": 2, "d": 1},
+    "θαλασσα": {"e": 4},
+    "και": {"a": 2, "b": 1, "c": 1, "d": 3, "e": 1},
+}
+DOC_IDS = ["a", "b", "c", "d", "e", "f"]
+
+
+def reference_tf_idf(term_db: dict, nb_docs: int, term_counts: list) -> dict:
+    """!
+    \brief tf-idf search results computed term by term
+
+    \param term_counts doc id to count mapping of each query term found in
+    the database, counts of terms matching a query term are summed
+
+    The score of a document is the sum of its tf-idf values divided by the
+    number of query terms found, terms that are not found do not lower it.
+    """
+    per_term = {}
+    per_doc: dict = {}
+    infos = {}
+    for term, counts in term_counts:
+        idf = math.log(nb_docs / len(counts))
+        infos[term] = {d: idf * c for d, c in counts.items()}
+        per_term[term] = sum(infos[term].values()) / nb_docs
+        for doc_id, value in infos[term].items():
+            per_doc[doc_id] = per_doc.get(doc_id, 0.0) + value / len(term_counts)
+    infos["average_score_per_term"] = per_term
+    infos["average_score_per_document"] = per_doc
+    return infos
+
+
+def found_terms(terms: list) -> list:
+    "Query terms of TERM_DB with their counts, each term once"
+    return [(t, TERM_DB[t]) for t in dict.fromkeys(terms) if t in TERM_DB]
+
+
+class TestTfIdfInfo(CorpusTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_json("textinfo.json", {d: {} for d in DOC_IDS})
+        self.write_json("terminfo.json", TERM_DB)
+
+    def assertResults(self, results: dict, expected: dict) -> None:
+        self.assertEqual(set(results), set(expected))
+        for key, values in expected.items():
+            self.assertEqual(set(results[key]), set(values), key)
+            for name, value in values.items():
+                self.assertAlmostEqual(results[key][name], value, delta=EPSILON)
+
+    def assertTopK(self, searcher: TfIdfInfo, expected: dict) -> None:
+        ranked = sorted(expected.values(), reverse=True)
+        for k in [1, 2, 3, 10]:
+            result = searcher.top_k(k)
+            self.assertEqual(len(result), min(k, len(ranked)))
+            for (doc_id, score), best in zip(result, ranked):
+                self.assertAlmostEqual(score, best, delta=EPSILON)
+                self.assertAlmostEqual(score, expected[doc_id], delta=EPSILON)
+
+    def test_exact_terms(self):
+        for terms in [
+            ["λογος"],
+            ["λογος", "εργον"],
+            ["εργον", "θαλασσα", "και"],
+            # repeated and unknown terms count once and not at all
+            ["λογος", "λογος", "ψψψψ", "θαλασσα"],
+            ["ψψψψ"],
+            [],
+        ]:
+            searcher = TfIdfInfo(terms)
+            searcher.search()
+            expected = reference_tf_idf(TERM_DB, len(DOC_IDS), found_terms(terms))
+            self.assertResults(searcher.result_info(), expected)
+            self.assertTopK(searcher, expected["average_score_per_document"])
+
+    def test_averaging_ignores_missing_terms(self):
+        searcher = TfIdfInfo(["θαλασσα", "ψψψψ"])
+        searcher.search()
+        score = searcher.result_info()["average_score_per_document"]["e"]
+        self.assertAlmostEqual(score, 4 * math.log(6), delta=EPSILON)
+
+    def test_prefix_terms(self):
+        # λογ matches λογος and λογοι, their counts are summed per document
+        searcher = TfIdfInfo(["λογ", "θαλασσα"], match="prefix")
+        searcher.search()
+        counts = {"a": 3, "b": 3, "d": 1}
+        expected = reference_tf_idf(
+            TERM_DB, len(DOC_IDS), [("λογ", counts), ("θαλασσα", TERM_DB["θαλασσα"])]
+        )
+        self.assertResults(searcher.result_info(), expected)
+        self.assertTopK(searcher, expected["average_score_per_document"])
+
+
+if __name__ == "__main__":
+    unittest.main()
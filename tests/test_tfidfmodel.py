@@ -0,0 +1,113 @@
+"""!
+\file test_tfidfmodel.py
+
+Tests of the persisted tf-idf model
+"""
+# cosine similarities against scikit-learn and incremental updates
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from agsearch.greekprocessing import clean_greek_text
+from agsearch.tfidfmodel import TfIdfModel
+from benchmarks.corpus import CorpusGenerator
+
+## tolerance of similarities computed in a different order
+EPSILON = 1e-9
+
+
+def make_texts(nb_docs: int, seed: int) -> dict:
+    generator = CorpusGenerator(seed=seed, vocabulary_size=300)
+    return {"doc" + str(i): generator.text() for i in range(nb_docs)}
+
+
+def make_queries(texts: dict) -> list:
+    "Queries made of words of the texts, and one without any known word"
+    queries = []
+    for text in texts.values():
+        words = text.split()
+        queries.append(" ".join(words[:3]))
+        queries.append(" ".join(words[-2:]))
+    queries.append("")
+    queries.append("ψψψψ")
+    return queries
+
+
+class TestTfIdfModel(unittest.TestCase):
+    def setUp(self):
+        self.texts = make_texts(12, seed=3)
+        self.queries = make_queries(self.texts)
+        self.model = TfIdfModel.from_texts(self.texts)
+
+    def assertScores(self, first: TfIdfModel, second: TfIdfModel) -> None:
+        "Same documents in the same order and the same scores for every query"
+        self.assertEqual(first.doc_ids, second.doc_ids)
+        for query in self.queries:
+            np.testing.assert_allclose(
+                first.scores(query), second.scores(query), atol=EPSILON
+            )
+
+    def test_same_scores_as_sklearn(self):
+        vectorizer = TfidfVectorizer(
+            vocabulary=self.model.vocabulary,
+            preprocessor=clean_greek_text,
+            lowercase=False,
+        )
+        docs = vectorizer.fit_transform([self.texts[d] for d in self.model.doc_ids])
+        expected = (docs @ vectorizer.transform(self.queries).T).toarray()
+        for i, query in enumerate(self.queries):
+            np.testing.assert_allclose(
+                self.model.scores(query), expected[:, i], atol=EPSILON
+            )
+        np.testing.assert_allclose(
+            self.model.scores_many(self.queries), expected, atol=EPSILON
+        )
+
+    def test_add_one_at_a_time(self):
+        model = TfIdfModel.from_texts({})
+        for doc_id, text in self.texts.items():
+            model.add_documents({doc_id: text})
+        self.assertEqual(model.vocabulary, self.model.vocabulary)
+        self.assertScores(model, self.model)
+        # documents already in the model are ignored
+        model.add_documents({"doc0": "ψψψψ ψψψψ"})
+        self.assertScores(model, self.model)
+
+    def test_remove_documents(self):
+        removed = {"doc2", "doc7"}
+        kept = {d: t for d, t in self.texts.items() if d not in removed}
+        model = self.model.copy()
+        self.assertTrue(model.remove_documents(removed))
+        self.assertFalse(model.remove_documents(removed))
+        refitted = TfIdfModel.from_texts(kept)
+        # terms only found in removed documents stay in vocabulary, where
+        # they change the norm of queries containing them
+        self.queries = make_queries(kept)
+        self.assertScores(model, refitted)
+
+    def test_copy_is_independent(self):
+        model = self.model.copy()
+        model.add_documents({"new": "ψψψψ ωωωω"})
+        model.remove_documents({"doc0"})
+        self.assertNotIn("new", self.model.doc_positions)
+        self.assertIn("doc0", self.model.doc_positions)
+        self.assertNotIn("ψψψψ", self.model.vocabulary)
+        self.assertScores(self.model, TfIdfModel.from_texts(self.texts))
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tfidfmodel.npz")
+            self.model.save(path)
+            loaded = TfIdfModel.load(path)
+        self.assertEqual(loaded.vocabulary, self.model.vocabulary)
+        self.assertScores(loaded, self.model)
+        np.testing.assert_allclose(loaded.idf, self.model.idf)
+        np.testing.assert_allclose(loaded.norms, self.model.norms)
+
+
+if __name__ == "__main__":
+    unittest.main()
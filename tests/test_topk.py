@@ -0,0 +1,149 @@
+"""!
+\file test_topk.py
+
+Tests of top k retrieval
+"""
+# max_score_top_k against a full sort of tf-idf scores, and top k of
+# similarity search
+
+import math
+import random
+import unittest
+
+from agsearch.scoreinfo import ScoreInfo
+from agsearch.topk import max_score_top_k
+from tests.test_corpusmanager import CorpusTestCase
+
+## tolerance of scores summed in a different order
+EPSILON = 1e-9
+
+
+def make_term_db(nb_docs: int, nb_terms: int, rng: random.Random) -> dict:
+    """!
+    \brief random term to {doc number: count} mapping
+
+    Term frequencies follow a rough power law and counts are small, so
+    that many documents have the same score.
+    """
+    term_db = {}
+    for t in range(nb_terms):
+        df = max(1, int(nb_docs / (t + 1) ** 0.8))
+        docs = rng.sample(range(nb_docs), df)
+        term_db["t" + str(t)] = {d: rng.randint(1, 3) for d in docs}
+    return term_db
+
+
+def tf_idf_lists(term_db: dict, terms: list, nb_docs: int):
+    """!
+    \brief postings and upper bounds of terms, scored as TfIdfInfo.top_k
+    """
+    found = [term_db[t] for t in dict.fromkeys(terms) if t in term_db]
+    postings = []
+    upper_bounds = []
+    for counts in found:
+        weight = math.log(nb_docs / len(counts)) / len(found)
+        postings.append(sorted((d, weight * c) for d, c in counts.items()))
+        upper_bounds.append(weight * max(counts.values()))
+    return postings, upper_bounds
+
+
+def full_scores(postings: list) -> dict:
+    scores: dict = {}
+    for plist in postings:
+        for doc, value in plist:
+            scores[doc] = scores.get(doc, 0.0) + value
+    return scores
+
+
+class TestMaxScoreTopK(unittest.TestCase):
+    def check(self, postings: list, upper_bounds: list, k: int) -> None:
+        scores = full_scores(postings)
+        expected = sorted(scores.values(), reverse=True)[:k]
+        result = max_score_top_k(postings, upper_bounds, k)
+        self.assertEqual(len(result), min(k, len(scores)))
+        self.assertEqual(len(set(d for d, _ in result)), len(result))
+        for (doc, score), best in zip(result, expected):
+            self.assertAlmostEqual(score, scores[doc], delta=EPSILON)
+            self.assertAlmostEqual(score, best, delta=EPSILON)
+        # with ties any of the tied documents may be returned, but every
+        # document scoring above the last one must be
+        if result:
+            last = result[-1][1]
+            returned = set(d for d, _ in result)
+            for doc, score in scores.items():
+                if score > last + EPSILON:
+                    self.assertIn(doc, returned)
+
+    def test_random_queries(self):
+        rng = random.Random(0)
+        nb_docs = 500
+        term_db = make_term_db(nb_docs, 200, rng)
+        terms = list(term_db)
+        for _ in range(300):
+            query = [rng.choice(terms) for _ in range(rng.randint(1, 5))]
+            postings, upper_bounds = tf_idf_lists(term_db, query, nb_docs)
+            for k in [1, 3, 10, 50]:
+                self.check(postings, upper_bounds, k)
+
+    def test_k_larger_than_matches(self):
+        rng = random.Random(1)
+        nb_docs = 500
+        term_db = make_term_db(nb_docs, 200, rng)
+        rare = [t for t, counts in term_db.items() if len(counts) < 5]
+        postings, upper_bounds = tf_idf_lists(term_db, rare[:3], nb_docs)
+        self.check(postings, upper_bounds, 1000)
+        self.assertEqual(
+            len(max_score_top_k(postings, upper_bounds, 1000)),
+            len(full_scores(postings)),
+        )
+
+    def test_ties(self):
+        postings = [[(d, 1.0) for d in range(20)], [(d, 1.0) for d in range(0, 20, 2)]]
+        result = max_score_top_k(postings, [1.0, 1.0], 5)
+        self.assertEqual([s for _, s in result], [2.0] * 5)
+        self.assertTrue(all(d % 2 == 0 for d, _ in result))
+        self.check(postings, [1.0, 1.0], 15)
+
+    def test_empty(self):
+        self.assertEqual(max_score_top_k([], [], 5), [])
+        self.assertEqual(max_score_top_k([[(0, 1.0)]], [1.0], 0), [])
+
+
+class TestScoreInfoTopK(CorpusTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write_texts(
+            {
+                "a": "λόγος καὶ ἔργον\n",
+                "b": "λόγος λόγος ἄνθρωπος\n",
+                "c": "θάλασσα\n",
+                "d": "ἵππος ἄνθρωπος\n",
+            }
+        )
+
+    def test_documents_without_terms_are_not_ranked(self):
+        searcher = ScoreInfo(None, text="λόγος")
+        result = searcher.top_k(10)
+        self.assertEqual([d for d, _ in result], ["b", "a"])
+        self.assertTrue(all(score > 0 for _, score in result))
+        self.assertEqual(searcher.top_k(1), result[:1])
+
+    def test_same_order_as_result_info(self):
+        searcher = ScoreInfo(None, text="λόγος\nἄνθρωπος")
+        searcher.search()
+        docs = searcher.result_info()["docs"]
+        expected = sorted(
+            ((d, s) for d, s in docs.items() if s > 0), key=lambda x: -x[1]
+        )
+        result = searcher.top_k(10)
+        self.assertEqual([d for d, _ in result], [d for d, _ in expected])
+        for (_, score), (_, best) in zip(result, expected):
+            self.assertAlmostEqual(score, best, delta=EPSILON)
+        self.assertNotIn("c", dict(result))
+
+    def test_no_match(self):
+        self.assertEqual(ScoreInfo(None, text="ψψψψ").top_k(5), [])
+
+
+if __name__ == "__main__":
+    unittest.main()